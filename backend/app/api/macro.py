@@ -1,12 +1,19 @@
-from fastapi import APIRouter
-from typing import Dict, List, Optional
+from fastapi import APIRouter, HTTPException, Query
+from typing import Optional
 from pydantic import BaseModel
 from datetime import datetime, timedelta
-import yfinance as yf
-import os
-from fredapi import Fred
+from concurrent.futures import TimeoutError as FutureTimeout
+import time
 import pytz
 import pandas as pd
+from app.services.macro_query import UnknownSeries, available_series, macro_query
+from app.services.macro_store import MACRO_SERIES, fred, macro_store
+from app.services.market_calendar import NYSE
+from app.utils.cache import get_cache, set_cache
+from app.utils.downsample import MAX_POINTS, MIN_POINTS, cached_history, downsample_history
+from app.utils.refresh import RefreshCoordinator, Snapshot
+from app.utils.shared_snapshot import SharedSnapshotStore
+from app.utils.upstream import UPSTREAM_EXECUTOR, run_blocking
 
 router = APIRouter()
 
@@ -17,53 +24,29 @@ class MacroIndicator(BaseModel):
     change: Optional[float] = None
     timestamp: datetime
 
-# FRED API 초기화
-FRED_API_KEY = os.getenv("FRED_API_KEY")
-fred = Fred(api_key=FRED_API_KEY) if FRED_API_KEY else None
+def stored_series(name: str, days: int) -> pd.Series:
+    """매크로 스토어에 저장된 최근 N일 관측값 (업스트림 호출 없음)"""
+    start_date = (datetime.now() - timedelta(days=days)).strftime('%Y-%m-%d')
+    return macro_store.series(name, start=start_date)
 
-# 캐시 저장소
-_macro_cache: Dict[str, any] = {
-    "data": {},
-    "last_update": None,
-    "updating": False
-}
+# 다운샘플한 히스토리 응답 캐시 (스토어 데이터 버전이 바뀌면 키가 달라짐)
+MACRO_HISTORY_TTL = 600
 
-def clear_macro_cache():
-    """매크로 캐시 초기화"""
-    global _macro_cache
-    _macro_cache = {
-        "data": {},
-        "last_update": None,
-        "updating": False
-    }
-    print("🗑️ 매크로 캐시 초기화 완료")
+def downsampled_history(series: str, span: int, max_points: Optional[int], method: str, build) -> dict:
+    """히스토리 응답을 max_points로 다운샘플 - (시리즈, 기간, 스토어 버전, max_points) 단위 캐시"""
+    cache_key = f"macro:history:{series}:{span}:{macro_store.data_version()}"
+    return cached_history(cache_key, max_points, method, build, ttl_seconds=MACRO_HISTORY_TTL)
 
 def get_california_time():
     """캘리포니아 시간대 현재 시간"""
     pacific = pytz.timezone('America/Los_Angeles')
     return datetime.now(pacific)
 
-def should_update_cache():
-    """캐시를 업데이트해야 하는지 확인 (미국 장 개장 시간 기준)"""
-    if not _macro_cache["last_update"]:
-        return True
-    
-    now = get_california_time()
-    last_update = _macro_cache["last_update"]
-    
-    # 마지막 업데이트가 6시간 이상 지났으면 업데이트 (더 자주 업데이트)
-    time_diff = now - last_update
-    if time_diff.total_seconds() > 6 * 3600:  # 6시간
-        return True
-    
-    # 마지막 업데이트가 오늘 아니면 업데이트
-    if last_update.date() != now.date():
-        # 장 개장 시간(06:30 PST) 이후인지 확인
-        market_open = now.replace(hour=6, minute=30, second=0, microsecond=0)
-        if now >= market_open:
-            return True
-    
-    return False
+# 장중 매크로 지표 갱신 주기 (장외에는 NYSE 캘린더 기준 마감 후 1회, 다음 개장 직후 1회)
+MACRO_OPEN_INTERVAL = timedelta(hours=1)
+
+# Fear & Greed 수집 제한 시간 (초) - CNN 스크래핑과 대체 소스를 모두 포함
+FEAR_GREED_TIMEOUT = 15.0
 
 def get_fear_greed_index():
     """CNN Fear & Greed Index 가져오기 (CNN 공식 데이터 스크래핑)"""
@@ -229,6 +212,10 @@ def get_fear_greed_index():
         pass
     
     # 최종 Fallback: 기본값
+    return get_default_fear_greed()
+
+def get_default_fear_greed():
+    """Fear & Greed 기본값 (모든 소스 실패 시)"""
     return {
         "value": 50, 
         "classification": "Neutral", 
@@ -239,12 +226,10 @@ def get_fear_greed_index():
 def get_vix_index():
     """VIX 지수 가져오기"""
     try:
-        vix = yf.Ticker("^VIX")
-        hist = vix.history(period="5d")
-        if not hist.empty:
-            current = round(hist['Close'].iloc[-1], 2)
-            prev = round(hist['Close'].iloc[-2], 2) if len(hist) > 1 else current
-            change = round(current - prev, 2)
+        latest = macro_store.latest_change("^VIX")
+        if latest:
+            current = latest["value"]
+            change = latest["change"]
             
             if current < 15:
                 status = "Low"
@@ -263,184 +248,165 @@ def get_vix_index():
     return {"value": 13.8, "change": 0, "status": "Low"}
 
 def get_m2_money_supply():
-    """M2 통화량 가져오기"""
-    try:
-        if fred:
-            from datetime import datetime, timedelta
-            # 최근 6개월 데이터 가져오기
-            start_date = (datetime.now() - timedelta(days=180)).strftime('%Y-%m-%d')
-            m2_data = fred.get_series('M2SL', observation_start=start_date)
-            if len(m2_data) > 0:
-                current = round(m2_data.iloc[-1] / 1000, 2)  # Billions to Trillions
-                prev = round(m2_data.iloc[-2] / 1000, 2) if len(m2_data) > 1 else current
-                change = round(current - prev, 2)
-                return {"value": current, "change": change}
-    except Exception as e:
-        print(f"M2 에러: {e}")
+    """M2 통화량 (매크로 스토어의 최근 관측값)"""
+    latest = macro_store.latest_change("M2SL", scale=1000)  # Billions to Trillions
+    if latest:
+        return {"value": latest["value"], "change": latest["change"]}
     return {"value": 21.2, "change": 0.1}
 
 def get_fed_funds_rate():
-    """연준 기준금리 가져오기"""
-    try:
-        if fred:
-            from datetime import datetime, timedelta
-            # 최근 6개월 데이터 가져오기
-            start_date = (datetime.now() - timedelta(days=180)).strftime('%Y-%m-%d')
-            rate_data = fred.get_series('FEDFUNDS', observation_start=start_date)
-            if len(rate_data) > 0:
-                current = round(rate_data.iloc[-1], 2)
-                prev = round(rate_data.iloc[-2], 2) if len(rate_data) > 1 else current
-                change = round(current - prev, 2)
-                return {"value": current, "change": change}
-    except Exception as e:
-        print(f"Fed Rate 에러: {e}")
+    """연준 기준금리 (매크로 스토어의 최근 관측값)"""
+    latest = macro_store.latest_change("FEDFUNDS")
+    if latest:
+        return {"value": latest["value"], "change": latest["change"]}
     return {"value": 5.5, "change": 0}
 
-def update_macro_cache():
-    """매크로 지표 캐시 업데이트"""
-    global _macro_cache
+def get_usd_krw():
+    """USD/KRW 환율 (매크로 스토어의 최근 관측값)"""
+    latest = macro_store.latest_change("KRW=X")
+    if latest:
+        return {"value": latest["value"], "change": latest["change"]}
+    return {"value": 1308.50, "change": 0}
+
+def get_dxy():
+    """달러 인덱스 (매크로 스토어의 최근 관측값)"""
+    latest = macro_store.latest_change("DX-Y.NYB")
+    if latest:
+        return {"value": latest["value"], "change": latest["change"]}
+    return {"value": 104.25, "change": 0}
+
+# 개요 지표 -> 매크로 스토어 시리즈
+MACRO_INDICATOR_SERIES = {
+    "vix": "^VIX",
+    "m2": "M2SL",
+    "fed_funds_rate": "FEDFUNDS",
+    "usd_krw": "KRW=X",
+    "dxy": "DX-Y.NYB",
+}
+
+MACRO_INDICATOR_READERS = {
+    "vix": get_vix_index,
+    "m2": get_m2_money_supply,
+    "fed_funds_rate": get_fed_funds_rate,
+    "usd_krw": get_usd_krw,
+    "dxy": get_dxy,
+}
+
+def load_macro_snapshot() -> dict:
+    """
+    스냅샷 loader: 모든 매크로 지표를 한 주기에 한 번씩 동시에 수집
     
-    if _macro_cache["updating"]:
-        print("⏳ 이미 업데이트 중입니다.")
-        return
+    - 스토어 시리즈(FRED, yfinance)는 시리즈별로 동시에 증분 동기화 (소스별 제한 시간)
+    - Fear & Greed는 같은 시간에 별도 스레드에서 수집
+    - 제한 시간을 넘기거나 실패한 지표는 저장된 / 직전 스냅샷 값을 쓰고 freshness에 기록
     
-    _macro_cache["updating"] = True
-    print("🔄 매크로 지표 캐시 업데이트 시작...")
+    전체 소요 시간은 가장 느린 소스 하나의 제한 시간을 넘지 않습니다.
+    """
+    previous = macro_refresh.snapshot
+    previous_data = previous.data if previous else {}
+    start_time = time.monotonic()
     
+    fear_greed_future = UPSTREAM_EXECUTOR.submit(get_fear_greed_index)
+    macro_refresh.report_progress("시계열 동기화", 0, len(MACRO_SERIES))
+    sync_results = macro_store.sync()
+    
+    macro_refresh.report_progress("Fear & Greed 수집")
+    fetched_at = datetime.now()
     try:
-        vix = get_vix_index()
-        m2 = get_m2_money_supply()
-        fed_rate = get_fed_funds_rate()
-        fear_greed = get_fear_greed_index()
-        
-        # 환율 정보 가져오기
-        try:
-            krw_ticker = yf.Ticker("KRW=X")
-            krw_hist = krw_ticker.history(period="5d")
-            if not krw_hist.empty:
-                current_krw = round(krw_hist['Close'].iloc[-1], 2)
-                prev_krw = round(krw_hist['Close'].iloc[-2], 2) if len(krw_hist) > 1 else current_krw
-                usd_krw = {
-                    "value": current_krw,
-                    "change": round(current_krw - prev_krw, 2)
-                }
-            else:
-                usd_krw = {"value": 1308.50, "change": 0}
-        except:
-            usd_krw = {"value": 1308.50, "change": 0}
-        
-        # DXY 가져오기
-        try:
-            dxy_ticker = yf.Ticker("DX-Y.NYB")
-            dxy_hist = dxy_ticker.history(period="5d")
-            if not dxy_hist.empty:
-                current_dxy = round(dxy_hist['Close'].iloc[-1], 2)
-                prev_dxy = round(dxy_hist['Close'].iloc[-2], 2) if len(dxy_hist) > 1 else current_dxy
-                dxy = {
-                    "value": current_dxy,
-                    "change": round(current_dxy - prev_dxy, 2)
-                }
-            else:
-                dxy = {"value": 104.25, "change": 0}
-        except:
-            dxy = {"value": 104.25, "change": 0}
-        
-        _macro_cache["data"] = {
-            "fear_greed": fear_greed,
-            "m2": m2,
-            "fed_funds_rate": fed_rate,
-            "vix": vix,
-            "usd_krw": usd_krw,
-            "dxy": dxy
-        }
-        _macro_cache["last_update"] = get_california_time()
-        print(f"✅ 매크로 지표 캐시 업데이트 완료: {_macro_cache['last_update'].strftime('%Y-%m-%d %H:%M:%S %Z')}")
+        remaining = max(0.0, FEAR_GREED_TIMEOUT - (time.monotonic() - start_time))
+        fear_greed = fear_greed_future.result(timeout=remaining)
+        fear_greed_status = "fallback" if fear_greed.get("source") == "Default" else "ok"
+    except FutureTimeout:
+        print(f"⏱️ Fear & Greed 수집 시간 초과 ({FEAR_GREED_TIMEOUT:.0f}초)")
+        fear_greed, fear_greed_status = None, "timeout"
     except Exception as e:
-        print(f"❌ 매크로 지표 캐시 업데이트 실패: {e}")
-    finally:
-        _macro_cache["updating"] = False
-
-def get_cached_macro_data():
-    """캐시된 매크로 데이터 가져오기 (6시간마다 자동 갱신)"""
-    # 캐시가 비어있거나 오래되었으면 동기적으로 업데이트
-    if not _macro_cache["data"] or should_update_cache():
-        if not _macro_cache["updating"]:
-            print("🔄 캐시가 비어있거나 오래되어 업데이트 시작...")
-            update_macro_cache()
+        print(f"❌ Fear & Greed 수집 실패: {e}")
+        fear_greed, fear_greed_status = None, "error"
+    
+    data = {}
+    freshness = {}
+    for key, series in MACRO_INDICATOR_SERIES.items():
+        data[key] = MACRO_INDICATOR_READERS[key]()
+        synced_at = macro_store.synced_at(series)
+        latest = macro_store.latest(series, count=1)
+        freshness[key] = {
+            "status": sync_results[series]["status"],
+            "source": MACRO_SERIES[series].source,
+            "as_of": latest[-1][0] if latest else None,
+            "synced_at": synced_at.isoformat() if synced_at else None,
+        }
     
-    # 백그라운드 업데이트는 비활성화 (항상 최신 데이터 보장)
-    # if should_update_cache() and not _macro_cache["updating"]:
-    #     from threading import Thread
-    #     Thread(target=update_macro_cache, daemon=True).start()
+    previous_fear_greed = previous_data.get("fear_greed")
+    if fear_greed_status != "ok" and previous_fear_greed and \
+            previous_fear_greed.get("source") != "Default":
+        # 직전 스냅샷의 정상 값 유지
+        data["fear_greed"] = previous_fear_greed
+        synced_at = previous_data.get("freshness", {}).get("fear_greed", {}).get("synced_at")
+    else:
+        data["fear_greed"] = fear_greed or get_default_fear_greed()
+        synced_at = fetched_at.isoformat() if fear_greed_status == "ok" else None
+    timestamp = data["fear_greed"].get("timestamp")
+    freshness["fear_greed"] = {
+        "status": fear_greed_status,
+        "source": data["fear_greed"].get("source"),
+        "as_of": timestamp.strftime("%Y-%m-%d") if isinstance(timestamp, datetime) else None,
+        "synced_at": synced_at,
+    }
     
-    return _macro_cache["data"], _macro_cache["last_update"]
+    data["freshness"] = freshness
+    return data
+
+# 매크로 스냅샷 갱신 코디네이터 (stale-while-revalidate)
+# 멀티 워커에서는 한 워커만 수집하고 나머지는 공유 스냅샷 파일을 읽음
+macro_refresh = RefreshCoordinator(
+    "macro",
+    load_macro_snapshot,
+    max_age=lambda built_at: NYSE.refresh_interval(built_at, open_interval=MACRO_OPEN_INTERVAL),
+    # 스냅샷 형식(freshness 포함)이 바뀌어 이전 파일을 읽지 않도록 이름 변경
+    shared=SharedSnapshotStore("macro-v2"),
+)
+
+# 요청으로 갱신을 앞당길 수 있는 최소 스냅샷 나이 (대시보드가 매 폴링마다 요청하므로)
+MACRO_REQUEST_REFRESH_MIN_AGE = timedelta(minutes=5)
+
+# 첫 스냅샷 수집 전 응답
+MACRO_WARMING_DETAIL = "매크로 지표 수집 중입니다. 잠시 후 다시 시도하세요."
+
+def get_macro_snapshot(refresh: bool = False) -> Optional[Snapshot]:
+    """
+    현재 매크로 스냅샷 (읽기 전용 - 업스트림 수집을 기다리지 않음)
+    
+    만료됐거나 아직 없으면 백그라운드 갱신만 트리거하고 기존 스냅샷(또는 None)을 반환합니다.
+    refresh면 스냅샷이 MACRO_REQUEST_REFRESH_MIN_AGE보다 오래된 경우 백그라운드 갱신을 앞당깁니다.
+    """
+    snapshot = macro_refresh.get()
+    if refresh and snapshot is not None and snapshot.age() >= MACRO_REQUEST_REFRESH_MIN_AGE:
+        macro_refresh.refresh_async(force=True)
+    return snapshot
 
 @router.get("/overview")
 async def get_macro_overview(force_refresh: bool = False):
     """
     매크로 지표 개요
     
-    - 6시간마다 자동 갱신
+    - 장중 1시간마다, 마감 후 1회, 다음 개장 직후 자동 갱신 (NYSE 캘린더)
     - 마지막 업데이트 시간 포함
-    - force_refresh=true로 강제 새로고침 가능
+    - 저장된 스냅샷만 읽음 (첫 수집 전이면 503)
+    - force_refresh=true면 스냅샷이 5분 넘게 지났을 때 백그라운드 갱신을 시작 (응답은 기존 값)
     """
-    # force_refresh가 True이면 캐시 무시하고 즉시 업데이트
-    if force_refresh:
-        print("🔄 강제 새로고침 요청 - 캐시 무시")
-        clear_macro_cache()
-        update_macro_cache()
-        cached_data, last_update = get_cached_macro_data()
-    else:
-        # 캐시를 강제로 확인하고 필요시 업데이트
-        cached_data, last_update = get_cached_macro_data()
-    
-    # 캐시가 없거나 오래된 데이터면 즉시 새로 가져오기
-    if not cached_data or should_update_cache():
-        print("⚠️ 캐시가 없거나 오래되어 즉시 업데이트...")
-        vix = get_vix_index()
-        m2 = get_m2_money_supply()
-        fed_rate = get_fed_funds_rate()
-        fear_greed = get_fear_greed_index()
-        # 환율 정보 가져오기
-        try:
-            krw_ticker = yf.Ticker("KRW=X")
-            krw_hist = krw_ticker.history(period="5d")
-            if not krw_hist.empty:
-                current_krw = round(krw_hist['Close'].iloc[-1], 2)
-                prev_krw = round(krw_hist['Close'].iloc[-2], 2) if len(krw_hist) > 1 else current_krw
-                usd_krw = {
-                    "value": current_krw,
-                    "change": round(current_krw - prev_krw, 2)
-                }
-            else:
-                usd_krw = {"value": 1308.50, "change": 0}
-        except:
-            usd_krw = {"value": 1308.50, "change": 0}
-        
-        # DXY 가져오기
-        try:
-            dxy_ticker = yf.Ticker("DX-Y.NYB")
-            dxy_hist = dxy_ticker.history(period="5d")
-            if not dxy_hist.empty:
-                current_dxy = round(dxy_hist['Close'].iloc[-1], 2)
-                prev_dxy = round(dxy_hist['Close'].iloc[-2], 2) if len(dxy_hist) > 1 else current_dxy
-                dxy = {
-                    "value": current_dxy,
-                    "change": round(current_dxy - prev_dxy, 2)
-                }
-            else:
-                dxy = {"value": 104.25, "change": 0}
-        except:
-            dxy = {"value": 104.25, "change": 0}
-        
-        last_update = get_california_time()
-    else:
-        fear_greed = cached_data.get("fear_greed", {})
-        m2 = cached_data.get("m2", {})
-        fed_rate = cached_data.get("fed_funds_rate", {})
-        vix = cached_data.get("vix", {})
-        usd_krw = cached_data.get("usd_krw", {"value": 1308.50, "change": 0})
-        dxy = cached_data.get("dxy", {"value": 104.25, "change": 0})
+    snapshot = get_macro_snapshot(refresh=force_refresh)
+    if snapshot is None:
+        raise HTTPException(status_code=503, detail=MACRO_WARMING_DETAIL)
+    cached_data = snapshot.data
+    last_update = snapshot.built_at
+    timestamp = last_update
+    
+    fear_greed = cached_data.get("fear_greed", {})
+    m2 = cached_data.get("m2", {})
+    fed_rate = cached_data.get("fed_funds_rate", {})
+    vix = cached_data.get("vix", {})
+    usd_krw = cached_data.get("usd_krw", {"value": 1308.50, "change": 0})
+    dxy = cached_data.get("dxy", {"value": 104.25, "change": 0})
     
     return {
         "indicators": {
@@ -455,77 +421,65 @@ async def get_macro_overview(force_refresh: bool = False):
                 "value": m2.get("value", 21.2),
                 "change": m2.get("change", 0),
                 "unit": "Trillion USD",
-                "timestamp": datetime.now()
+                "timestamp": timestamp
             },
             "fed_funds_rate": {
                 "name": "Federal Funds Rate",
                 "value": fed_rate.get("value", 5.5),
                 "change": fed_rate.get("change", 0),
                 "unit": "Percent",
-                "timestamp": datetime.now()
+                "timestamp": timestamp
             },
             "vix": {
                 "name": "VIX Index",
                 "value": vix.get("value", 13.8),
                 "change": vix.get("change", 0),
                 "status": vix.get("status", "Low"),
-                "timestamp": datetime.now()
+                "timestamp": timestamp
             },
             "usd_krw": {
                 "name": "USD/KRW",
                 "value": usd_krw.get("value", 1308.50),
                 "change": usd_krw.get("change", 0),
                 "unit": "원",
-                "timestamp": datetime.now()
+                "timestamp": timestamp
             },
             "dxy": {
                 "name": "Dollar Index (DXY)",
                 "value": dxy.get("value", 104.25),
                 "change": dxy.get("change", 0),
                 "unit": "Index",
-                "timestamp": datetime.now()
+                "timestamp": timestamp
             }
         },
-        "last_update": last_update.isoformat() if last_update else None,
-        "next_update": "6시간마다 자동 갱신 (또는 수동 새로고침)"
+        "freshness": cached_data.get("freshness", {}),
+        "last_update": last_update.isoformat(),
+        "next_update": NYSE.next_refresh_at(last_update, open_interval=MACRO_OPEN_INTERVAL).isoformat()
     }
 
 @router.get("/fear-greed")
 async def get_fear_greed_endpoint():
-    """Fear & Greed Index (실시간 API)"""
-    return get_fear_greed_index()
+    """Fear & Greed Index (매크로 스냅샷 값 - CNN 스크래핑은 스냅샷 갱신 때만)"""
+    snapshot = get_macro_snapshot()
+    fear_greed = snapshot.data.get("fear_greed") if snapshot else None
+    return fear_greed or get_default_fear_greed()
 
 @router.get("/interest-rates")
 async def get_interest_rates():
-    """금리 정보 (FRED API 실시간 데이터)"""
+    """금리 정보 (매크로 스토어에 저장된 FRED 최근 관측값)"""
     fed_rate = get_fed_funds_rate()
     
-    # 국채 수익률 가져오기
+    # 국채 수익률
     treasury_10y = {"value": 4.35, "unit": "percent"}
     treasury_2y = {"value": 4.82, "unit": "percent"}
     
-    try:
-        if fred:
-            from datetime import timedelta
-            start_date = (datetime.now() - timedelta(days=30)).strftime('%Y-%m-%d')
-            
-            # 10년물 국채
-            dgs10 = fred.get_series('DGS10', observation_start=start_date)
-            if len(dgs10) > 0:
-                treasury_10y = {
-                    "value": round(dgs10.iloc[-1], 2),
-                    "unit": "percent"
-                }
-            
-            # 2년물 국채
-            dgs2 = fred.get_series('DGS2', observation_start=start_date)
-            if len(dgs2) > 0:
-                treasury_2y = {
-                    "value": round(dgs2.iloc[-1], 2),
-                    "unit": "percent"
-                }
-    except Exception as e:
-        print(f"Treasury rates 에러: {e}")
+    dgs10 = macro_store.latest_change("DGS10")
+    if dgs10:
+        treasury_10y = {"value": dgs10["value"], "unit": "percent"}
+    
+    dgs2 = macro_store.latest_change("DGS2")
+    if dgs2:
+        treasury_2y = {"value": dgs2["value"], "unit": "percent"}
     
     return {
         "fed_funds_rate": {
@@ -538,48 +492,28 @@ async def get_interest_rates():
 
 @router.get("/exchange-rates")
 async def get_exchange_rates():
-    """환율 정보 (실시간 yfinance 데이터)"""
-    usd_krw = {"value": 1308.50, "change": 0}
-    dxy = {"value": 104.25, "change": 0}
-    
-    try:
-        # USD/KRW
-        krw_ticker = yf.Ticker("KRW=X")
-        krw_hist = krw_ticker.history(period="5d")
-        if not krw_hist.empty:
-            current_krw = round(krw_hist['Close'].iloc[-1], 2)
-            prev_krw = round(krw_hist['Close'].iloc[-2], 2) if len(krw_hist) > 1 else current_krw
-            usd_krw = {
-                "value": current_krw,
-                "change": round(current_krw - prev_krw, 2)
-            }
-        
-        # DXY (Dollar Index)
-        dxy_ticker = yf.Ticker("DX-Y.NYB")
-        dxy_hist = dxy_ticker.history(period="5d")
-        if not dxy_hist.empty:
-            current_dxy = round(dxy_hist['Close'].iloc[-1], 2)
-            prev_dxy = round(dxy_hist['Close'].iloc[-2], 2) if len(dxy_hist) > 1 else current_dxy
-            dxy = {
-                "value": current_dxy,
-                "change": round(current_dxy - prev_dxy, 2)
-            }
-    except Exception as e:
-        print(f"환율 에러: {e}")
-    
+    """환율 정보 (매크로 스토어에 저장된 yfinance 최근 관측값)"""
     return {
-        "usd_krw": usd_krw,
-        "dxy": dxy
+        "usd_krw": get_usd_krw(),
+        "dxy": get_dxy()
     }
 
-@router.get("/history/fear-greed")
-async def get_fear_greed_history(days: int = 30):
-    """
-    CNN Fear & Greed Index 히스토리
-    
-    최근 N일간의 Fear & Greed Index 추이
-    CNN 공식 데이터를 스크래핑하여 제공
-    """
+# Fear & Greed 히스토리 캐시 시간 (일별 값 - 매크로 스토어와 무관한 외부 API라 버전 대신 TTL)
+FEAR_GREED_HISTORY_TTL = 3600
+
+def cached_fear_greed_history(days: int) -> dict:
+    """Fear & Greed 히스토리 원본 - days 단위 TTL 캐시 (빈 응답은 캐시하지 않음)"""
+    cache_key = f"macro:fear-greed-history:{days}"
+    cached = get_cache(cache_key)
+    if cached is not None:
+        return cached
+    result = build_fear_greed_history(days)
+    if result.get("history"):
+        set_cache(cache_key, result, ttl_seconds=FEAR_GREED_HISTORY_TTL)
+    return result
+
+def build_fear_greed_history(days: int) -> dict:
+    """CNN Fear & Greed Index 히스토리 응답 (다운샘플 전 원본)"""
     try:
         # CNN Fear & Greed Index 히스토리 가져오기
         import fear_and_greed
@@ -635,227 +569,263 @@ async def get_fear_greed_history(days: int = 30):
         "note": "데이터를 가져올 수 없습니다. fear-and-greed 패키지 설치 필요: pip install fear-and-greed"
     }
 
-@router.get("/history/interest-rates")
-async def get_interest_rates_history(months: int = 12):
+@router.get("/history/fear-greed")
+async def get_fear_greed_history(
+    days: int = 30,
+    max_points: Optional[int] = Query(None, ge=MIN_POINTS, le=MAX_POINTS),
+    method: str = Query("lttb", pattern="^(lttb|minmax)$"),
+):
     """
-    금리 히스토리 (FRED API)
+    CNN Fear & Greed Index 히스토리
+    
+    최근 N일간의 Fear & Greed Index 추이
+    CNN 공식 데이터를 스크래핑하여 제공
     
-    최근 N개월간의 연준 기준금리, 10년물, 2년물 국채 수익률
+    max_points를 주면 모양을 보존하도록 다운샘플 (method: lttb / minmax)
+    업스트림 HTTP 호출이 있으므로 이벤트 루프를 막지 않도록 스레드 풀에서 실행
     """
+    return await run_blocking(
+        cached_history,
+        f"macro:history:fear-greed:{days}",
+        max_points,
+        method,
+        lambda: cached_fear_greed_history(days),
+        ttl_seconds=FEAR_GREED_HISTORY_TTL,
+    )
+
+# 스토어가 아직 비어있을 때 히스토리 응답 (업스트림을 호출하지 않음)
+HISTORY_NOT_READY_NOTE = "히스토리 수집 중입니다. 매크로 지표 갱신(/overview) 후 다시 조회하세요."
+
+FRED_KEY_MISSING = {
+    "note": "FRED API 키가 필요합니다. 환경 변수 FRED_API_KEY를 설정하세요.",
+    "error": "FRED_API_KEY_MISSING"
+}
+
+def build_interest_rates_history(months: int) -> dict:
+    """금리 히스토리 응답 (다운샘플 전 원본)"""
     try:
-        if not fred:
-            return {
-                "history": [], 
-                "months": 0, 
-                "note": "FRED API 키가 필요합니다. 환경 변수 FRED_API_KEY를 설정하세요.",
-                "error": "FRED_API_KEY_MISSING"
-            }
-        
         start_date = (datetime.now() - timedelta(days=months * 30)).strftime('%Y-%m-%d')
+        frame = macro_query.frame(("FEDFUNDS", "DGS10", "DGS2", "T10Y2Y"), freq="M", start=start_date)
         
-        # 연준 기준금리
-        fed_funds = fred.get_series('FEDFUNDS', observation_start=start_date)
-        # 10년물 국채
-        treasury_10y = fred.get_series('DGS10', observation_start=start_date)
-        # 2년물 국채
-        treasury_2y = fred.get_series('DGS2', observation_start=start_date)
-        
-        # 월별로 마지막 값 추출
-        history = []
-        for i in range(months):
-            month_date = datetime.now() - timedelta(days=(months - i - 1) * 30)
-            month_str = month_date.strftime('%Y-%m')
-            
-            # 해당 월의 데이터 필터링
-            month_fed = fed_funds[fed_funds.index.strftime('%Y-%m') == month_str]
-            month_10y = treasury_10y[treasury_10y.index.strftime('%Y-%m') == month_str]
-            month_2y = treasury_2y[treasury_2y.index.strftime('%Y-%m') == month_str]
-            
-            if len(month_fed) > 0 or len(month_10y) > 0 or len(month_2y) > 0:
-                history.append({
-                    "date": month_date.strftime('%Y-%m'),
-                    "fed_funds_rate": round(float(month_fed.iloc[-1]), 2) if len(month_fed) > 0 and not pd.isna(month_fed.iloc[-1]) else None,
-                    "treasury_10y": round(float(month_10y.iloc[-1]), 2) if len(month_10y) > 0 and not pd.isna(month_10y.iloc[-1]) else None,
-                    "treasury_2y": round(float(month_2y.iloc[-1]), 2) if len(month_2y) > 0 and not pd.isna(month_2y.iloc[-1]) else None
-                })
+        if frame.empty:
+            if not fred:
+                return {"history": [], "months": 0, **FRED_KEY_MISSING}
+            return {"history": [], "months": 0, "note": HISTORY_NOT_READY_NOTE}
         
+        frame = frame.rename(columns={
+            "FEDFUNDS": "fed_funds_rate",
+            "DGS10": "treasury_10y",
+            "DGS2": "treasury_2y",
+            "T10Y2Y": "spread_10y_2y",
+        })
+        history = macro_query.records(frame, date_format='%Y-%m')
         return {"history": history, "months": len(history)}
     except Exception as e:
         print(f"금리 히스토리 에러: {e}")
         return {"history": [], "months": 0, "note": f"데이터를 가져올 수 없습니다: {e}"}
 
-@router.get("/history/vix")
-async def get_vix_history(days: int = 30):
+@router.get("/history/interest-rates")
+async def get_interest_rates_history(
+    months: int = 12,
+    max_points: Optional[int] = Query(None, ge=MIN_POINTS, le=MAX_POINTS),
+    method: str = Query("lttb", pattern="^(lttb|minmax)$"),
+):
     """
-    VIX 히스토리 (yfinance)
+    금리 히스토리 (매크로 스토어에 저장된 FRED 관측값, 월말 기준 정렬)
     
-    최근 N일간의 VIX 지수 추이
-    """
-    try:
-        vix = yf.Ticker("^VIX")
-        hist = vix.history(period=f"{days}d")
-        
-        if not hist.empty:
-            history = []
-            for date, row in hist.iterrows():
-                history.append({
-                    "date": date.strftime("%Y-%m-%d"),
-                    "value": round(row['Close'], 2)
-                })
-            return {"history": history, "days": len(history)}
-    except Exception as e:
-        error_msg = str(e)
-        print(f"VIX 히스토리 에러: {e}")
-        # 네트워크 에러 감지
-        if any(keyword in error_msg.lower() for keyword in ['network', 'connection', 'timeout', 'unreachable', 'dns']):
-            return {
-                "history": [], 
-                "days": 0, 
-                "note": "네트워크 연결 실패: yfinance API에 접근할 수 없습니다.",
-                "error": "NETWORK_ERROR"
-            }
+    최근 N개월간의 연준 기준금리, 10년물, 2년물 국채 수익률과 10년-2년 스프레드
     
-    return {
-        "history": [], 
-        "days": 0, 
-        "note": "데이터를 가져올 수 없습니다",
-        "error": "UNKNOWN_ERROR"
-    }
+    max_points를 주면 모양을 보존하도록 다운샘플 (method: lttb / minmax)
+    """
+    return downsampled_history("interest-rates", months, max_points, method, lambda: build_interest_rates_history(months))
 
-@router.get("/history/m2")
-async def get_m2_history(months: int = 12):
+def build_vix_history(days: int) -> dict:
+    """VIX 히스토리 응답 (다운샘플 전 원본)"""
+    vix = stored_series("^VIX", days)
+    if vix.empty:
+        return {"history": [], "days": 0, "note": HISTORY_NOT_READY_NOTE}
+    
+    history = [
+        {"date": date.strftime("%Y-%m-%d"), "value": round(value, 2)}
+        for date, value in vix.items()
+    ]
+    return {"history": history, "days": len(history)}
+
+@router.get("/history/vix")
+async def get_vix_history(
+    days: int = 30,
+    max_points: Optional[int] = Query(None, ge=MIN_POINTS, le=MAX_POINTS),
+    method: str = Query("lttb", pattern="^(lttb|minmax)$"),
+):
     """
-    M2 통화량 히스토리 (FRED API)
+    VIX 히스토리 (매크로 스토어에 저장된 yfinance 일봉 종가)
     
-    최근 N개월간의 M2 통화량 추이
+    최근 N일간의 VIX 지수 추이
+    
+    max_points를 주면 모양을 보존하도록 다운샘플 (method: lttb / minmax)
     """
+    return downsampled_history("vix", days, max_points, method, lambda: build_vix_history(days))
+
+def build_m2_history(months: int) -> dict:
+    """M2 통화량 히스토리 응답 (다운샘플 전 원본)"""
     try:
-        if not fred:
-            return {
-                "history": [], 
-                "months": 0, 
-                "note": "FRED API 키가 필요합니다. 환경 변수 FRED_API_KEY를 설정하세요.",
-                "error": "FRED_API_KEY_MISSING"
-            }
-        
-        from datetime import timedelta
         start_date = (datetime.now() - timedelta(days=months * 30)).strftime('%Y-%m-%d')
+        frame = macro_query.frame(("M2SL", "M2_YOY"), freq="M", start=start_date)
+        frame = frame[frame["M2SL"].notna()]
         
-        # M2 데이터 가져오기
-        m2_data = fred.get_series('M2SL', observation_start=start_date)
-        
-        if len(m2_data) == 0:
-            return {"history": [], "months": 0, "note": "데이터를 가져올 수 없습니다"}
-        
-        # 월별로 마지막 값 추출
-        history = []
-        for i in range(months):
-            month_date = datetime.now() - timedelta(days=(months - i - 1) * 30)
-            month_str = month_date.strftime('%Y-%m')
-            
-            # 해당 월의 데이터 필터링
-            month_data = m2_data[m2_data.index.strftime('%Y-%m') == month_str]
-            
-            if len(month_data) > 0:
-                value = round(float(month_data.iloc[-1]) / 1000, 2)  # Billions to Trillions
-                history.append({
-                    "date": month_date.strftime('%Y-%m'),
-                    "value": value
-                })
+        if frame.empty:
+            if not fred:
+                return {"history": [], "months": 0, **FRED_KEY_MISSING}
+            return {"history": [], "months": 0, "note": HISTORY_NOT_READY_NOTE}
         
+        frame = pd.DataFrame({
+            "value": frame["M2SL"] / 1000,  # Billions to Trillions
+            "yoy": frame["M2_YOY"],
+        })
+        history = macro_query.records(frame, date_format='%Y-%m')
         return {"history": history, "months": len(history)}
     except Exception as e:
         print(f"M2 히스토리 에러: {e}")
         return {"history": [], "months": 0, "note": f"에러: {str(e)}"}
 
+@router.get("/history/m2")
+async def get_m2_history(
+    months: int = 12,
+    max_points: Optional[int] = Query(None, ge=MIN_POINTS, le=MAX_POINTS),
+    method: str = Query("lttb", pattern="^(lttb|minmax)$"),
+):
+    """
+    M2 통화량 히스토리 (매크로 스토어에 저장된 FRED 관측값, 월말 기준 정렬)
+    
+    최근 N개월간의 M2 통화량 추이와 전년 대비 증가율
+    
+    max_points를 주면 모양을 보존하도록 다운샘플 (method: lttb / minmax)
+    """
+    return downsampled_history("m2", months, max_points, method, lambda: build_m2_history(months))
+
+def build_exchange_rates_history(days: int) -> dict:
+    """환율 히스토리 응답 (다운샘플 전 원본)"""
+    krw = stored_series("KRW=X", days)
+    dxy = stored_series("DX-Y.NYB", days)
+    if krw.empty and dxy.empty:
+        return {"history": [], "days": 0, "note": HISTORY_NOT_READY_NOTE}
+    
+    # 날짜 기준으로 두 시리즈 결합 (한쪽만 있는 날은 None)
+    combined = pd.concat({"usd_krw": krw, "dxy": dxy}, axis=1).round(2)
+    history = [
+        {
+            "date": date.strftime("%Y-%m-%d"),
+            "usd_krw": None if pd.isna(row.usd_krw) else float(row.usd_krw),
+            "dxy": None if pd.isna(row.dxy) else float(row.dxy),
+        }
+        for date, row in zip(combined.index, combined.itertuples(index=False))
+    ]
+    return {"history": history, "days": len(history)}
+
 @router.get("/history/exchange-rates")
-async def get_exchange_rates_history(days: int = 30):
+async def get_exchange_rates_history(
+    days: int = 30,
+    max_points: Optional[int] = Query(None, ge=MIN_POINTS, le=MAX_POINTS),
+    method: str = Query("lttb", pattern="^(lttb|minmax)$"),
+):
     """
-    환율 히스토리 (yfinance)
+    환율 히스토리 (매크로 스토어에 저장된 yfinance 일봉 종가)
     
     최근 N일간의 USD/KRW, DXY 추이
+    
+    max_points를 주면 모양을 보존하도록 다운샘플 (method: lttb / minmax)
     """
-    try:
-        # USD/KRW
-        krw_ticker = yf.Ticker("KRW=X")
-        krw_hist = krw_ticker.history(period=f"{days}d")
-        
-        # DXY
-        dxy_ticker = yf.Ticker("DX-Y.NYB")
-        dxy_hist = dxy_ticker.history(period=f"{days}d")
-        
-        history = []
-        
-        # 날짜별로 데이터 결합
-        dates = set(krw_hist.index.strftime("%Y-%m-%d")).union(set(dxy_hist.index.strftime("%Y-%m-%d")))
-        
-        for date_str in sorted(dates):
-            krw_value = None
-            dxy_value = None
-            
-            # KRW 데이터
-            krw_date_data = krw_hist[krw_hist.index.strftime("%Y-%m-%d") == date_str]
-            if len(krw_date_data) > 0:
-                krw_value = round(krw_date_data['Close'].iloc[0], 2)
-            
-            # DXY 데이터
-            dxy_date_data = dxy_hist[dxy_hist.index.strftime("%Y-%m-%d") == date_str]
-            if len(dxy_date_data) > 0:
-                dxy_value = round(dxy_date_data['Close'].iloc[0], 2)
-            
-            if krw_value or dxy_value:
-                history.append({
-                    "date": date_str,
-                    "usd_krw": krw_value,
-                    "dxy": dxy_value
-                })
-        
-        return {"history": history, "days": len(history)}
-    except Exception as e:
-        print(f"환율 히스토리 에러: {e}")
+    return downsampled_history("exchange-rates", days, max_points, method, lambda: build_exchange_rates_history(days))
+
+@router.get("/series")
+async def get_macro_series(
+    names: str = Query(..., description="쉼표로 구분한 시리즈 (예: DGS10,DGS2,T10Y2Y)"),
+    freq: str = Query("D", description="D(영업일), W(주), M(월)"),
+    start: Optional[str] = Query(None, description="시작일 YYYY-MM-DD (기본 1년 전)"),
+    end: Optional[str] = Query(None, description="종료일 YYYY-MM-DD (기본 오늘)"),
+    max_points: Optional[int] = Query(None, ge=MIN_POINTS, le=MAX_POINTS, description="최대 점 수 (다운샘플)"),
+    method: str = Query("lttb", pattern="^(lttb|minmax)$"),
+):
+    """
+    여러 매크로 시계열을 하나의 달력에 정렬해 반환 (오버레이 차트용)
     
-    return {"history": [], "days": 0, "note": "데이터를 가져올 수 없습니다"}
+    일별/월별 시리즈를 같은 주기로 맞추고 각 날짜 기준 마지막 관측값으로 채웁니다.
+    파생 시리즈(T10Y2Y, M2_YOY, CPI_YOY, REAL_FEDFUNDS, REAL_10Y)는 요청 시 계산하며,
+    같은 조합/주기/기간 요청은 새 관측값이 저장될 때까지 캐시된 결과를 사용합니다.
+    업스트림은 호출하지 않습니다 (목록: GET /api/macro/series/catalog).
+    max_points를 주면 시리즈별 모양을 보존하도록 다운샘플합니다.
+    """
+    series_names = [name.strip() for name in names.split(",") if name.strip()]
+    if not series_names:
+        raise HTTPException(status_code=400, detail="시리즈 이름이 필요합니다")
+    try:
+        frame = macro_query.frame(series_names, freq=freq.upper(), start=start, end=end)
+    except UnknownSeries as e:
+        raise HTTPException(status_code=404, detail=f"알 수 없는 시리즈: {e.args[0]}")
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    result = {
+        "series": series_names,
+        "freq": freq.upper(),
+        "data": macro_query.records(frame),
+        "count": len(frame),
+    }
+    return downsample_history(result, max_points, method, key="data")
+
+@router.get("/series/catalog")
+async def get_macro_series_catalog():
+    """조회 가능한 매크로 시계열 (저장 / 파생) 목록과 쿼리 캐시 상태"""
+    return {
+        "series": available_series(),
+        "cache": macro_query.status(),
+    }
 
 @router.post("/refresh")
 async def refresh_macro_cache():
     """
     매크로 지표 캐시 강제 새로고침
     
-    캐시를 초기화하고 모든 매크로 지표를 다시 수집합니다.
+    모든 매크로 지표를 동시에 다시 수집하고 새 스냅샷을 게시합니다.
+    이미 갱신 중이면 새로 시작하지 않고 그 결과를 기다립니다.
     """
-    # 캐시를 먼저 초기화
-    clear_macro_cache()
-    
-    # 동기적으로 업데이트 (즉시 반영)
-    update_macro_cache()
-    
-    # 업데이트된 데이터 반환
-    updated_data = _macro_cache.get("data", {})
+    snapshot = await run_blocking(macro_refresh.refresh)
+    updated_data = snapshot.data if snapshot else {}
     fear_greed_value = updated_data.get("fear_greed", {}).get("value", "N/A")
     
     return {
-        "message": "매크로 지표 캐시 초기화 및 업데이트 완료",
+        "message": "매크로 지표 캐시 업데이트 완료",
         "status": "updated",
-        "note": "캐시가 초기화되고 최신 데이터로 업데이트되었습니다",
+        "note": "모든 지표를 다시 수집해 새 스냅샷으로 교체했습니다",
         "fear_greed_value": fear_greed_value,
-        "last_update": _macro_cache.get("last_update")
+        "freshness": updated_data.get("freshness", {}),
+        "last_update": snapshot.built_at if snapshot else None
     }
 
+@router.get("/refresh/status")
+async def get_macro_refresh_status():
+    """매크로 스냅샷 갱신 상태 (진행 단계, 마지막 갱신 시각 / 소요 시간)"""
+    return macro_refresh.status()
+
 @router.post("/clear-cache")
 async def clear_macro_cache_endpoint():
     """
-    매크로 지표 캐시 강제 초기화
+    매크로 지표 캐시 강제 만료
     
-    캐시만 초기화하고 데이터는 다시 수집하지 않습니다.
+    데이터는 바로 다시 수집하지 않고, 다음 조회에서 백그라운드 갱신을 시작합니다.
     """
-    clear_macro_cache()
+    macro_refresh.invalidate()
     
     # 인메모리 캐시도 초기화
     from app.utils.cache import clear_cache
     clear_cache("market:overview")  # 시장 지수 캐시도 초기화
     
     return {
-        "message": "매크로 지표 캐시 초기화 완료 (인메모리 캐시 포함)",
+        "message": "매크로 지표 캐시 만료 처리 완료 (인메모리 캐시 포함)",
         "status": "cleared"
     }
 
+@router.get("/store/status")
+async def get_macro_store_status():
+    """매크로 시계열 스토어 상태 (시리즈별 관측값 수, 마지막 관측일, 마지막 동기화)"""
+    return macro_store.status()
@@ -1,10 +1,12 @@
 from fastapi import APIRouter, HTTPException
-from typing import List, Optional
+from typing import Dict, Optional
 from pydantic import BaseModel
-from datetime import datetime
+from datetime import timedelta
 import yfinance as yf
-import time
+import asyncio
+from app.services.market_calendar import KRX, NYSE, combined_ttl_seconds
 from app.utils.cache import get_cache, set_cache
+from app.utils.upstream import UpstreamUnavailable, backoff_delay, is_rate_limit_error, yfinance_upstream
 
 router = APIRouter()
 
@@ -36,89 +38,150 @@ MARKET_INDICES = {
     "BTC-USD": {"name": "Bitcoin", "symbol": "BTC"},
 }
 
-def get_index_data(symbol: str, info: dict, retry_count: int = 3) -> Optional[dict]:
-    """지수 데이터 가져오기 (재시도 로직 포함)"""
+# 개요 조회 시 전체 응답 마감 시간 (초) - 넘기면 받은 것까지만 반환
+OVERVIEW_DEADLINE_SECONDS = 8.0
+
+# 개요 캐시 TTL: 장중 5분 (NYSE/KRX 캘린더 기준, 장외에는 다음 개장까지)
+# 금/비트코인/해외 지수는 다른 시간에도 움직이므로 최대 1시간
+OVERVIEW_OPEN_INTERVAL = timedelta(minutes=5)
+OVERVIEW_MAX_TTL = timedelta(hours=1)
+# 일부 실패 시 30초 뒤 다시 채움
+OVERVIEW_PARTIAL_TTL_SECONDS = 30
+
+class IndexDataError(Exception):
+    """지수 데이터 조회 실패 (status: no_data, rate_limited, error)"""
+    def __init__(self, status: str, message: str = ""):
+        super().__init__(message or status)
+        self.status = status
+
+def fetch_index_once(symbol: str, info: dict) -> dict:
+    """지수 데이터 1회 조회 (블로킹, 실패 시 예외)"""
+    ticker = yf.Ticker(symbol)
+    
+    # 더 긴 기간으로 시도 (5일)
+    hist = ticker.history(period="5d")
+    
+    if hist.empty:
+        # info에서 가져오기 시도
+        ticker_info = ticker.info
+        current_price = ticker_info.get('regularMarketPrice') or ticker_info.get('previousClose', 0)
+        prev_close = ticker_info.get('previousClose', current_price)
+        if not current_price or current_price <= 0:
+            raise IndexDataError("no_data", f"{symbol}: 데이터 없음")
+        change = current_price - prev_close
+        change_percent = (change / prev_close) * 100 if prev_close > 0 else 0
+        return {
+            "name": info["name"],
+            "symbol": info["symbol"],
+            "price": round(current_price, 2),
+            "change": round(change, 2),
+            "change_percent": round(change_percent, 2)
+        }
+    
+    current_price = float(hist['Close'].iloc[-1])
+    
+    # 이전 종가 찾기 (거래일 기준)
+    prev_price = current_price
+    if len(hist) > 1:
+        # 마지막에서 두 번째 거래일 찾기
+        for i in range(len(hist) - 2, -1, -1):
+            if hist['Volume'].iloc[i] > 0:  # 거래량이 있는 날
+                prev_price = float(hist['Close'].iloc[i])
+                break
+    
+    change = current_price - prev_price
+    change_percent = (change / prev_price) * 100 if prev_price > 0 else 0
+    
+    return {
+        "name": info["name"],
+        "symbol": info["symbol"],
+        "price": round(current_price, 2),
+        "change": round(change, 2),
+        "change_percent": round(change_percent, 2)
+    }
+
+# 심볼별 마지막 정상 조회 결과 (업스트림 실패/차단 시 대체값)
+_last_known: Dict[str, dict] = {}
+
+async def get_index_data(symbol: str, info: dict, retry_count: int = 3) -> dict:
+    """
+    지수 데이터 가져오기 (재시도 로직 포함)
+    
+    블로킹 yfinance 호출은 스레드 풀에서 실행하고,
+    재시도 대기는 asyncio.sleep으로 처리해 이벤트 루프를 막지 않습니다.
+    """
+    last_error = IndexDataError("error")
     for attempt in range(retry_count):
+        if attempt > 0:
+            delay = backoff_delay(attempt)  # 지수 백오프: 2초, 4초, 최대 10초
+            print(f"⏳ {symbol} 재시도 {attempt + 1}/{retry_count} - {delay}초 대기...")
+            await asyncio.sleep(delay)
+        
+        # 모든 라우터가 공유하는 yfinance 속도 제한 / 서킷 브레이커
         try:
-            # API 제한 방지를 위한 딜레이
-            if attempt > 0:
-                delay = min(2 ** attempt, 10)  # 지수 백오프: 2초, 4초, 최대 10초
-                print(f"⏳ {symbol} 재시도 {attempt + 1}/{retry_count} - {delay}초 대기...")
-                time.sleep(delay)
-            
-            ticker = yf.Ticker(symbol)
-            
-            # 더 긴 기간으로 시도 (5일)
-            hist = ticker.history(period="5d")
-            
-            if hist.empty:
-                # info에서 가져오기 시도
-                try:
-                    time.sleep(0.5)  # API 제한 방지
-                    ticker_info = ticker.info
-                    current_price = ticker_info.get('regularMarketPrice') or ticker_info.get('previousClose', 0)
-                    prev_close = ticker_info.get('previousClose', current_price)
-                    change = current_price - prev_close
-                    change_percent = (change / prev_close) * 100 if prev_close > 0 else 0
-                    
-                    if current_price > 0:
-                        return {
-                            "name": info["name"],
-                            "symbol": info["symbol"],
-                            "price": round(current_price, 2),
-                            "change": round(change, 2),
-                            "change_percent": round(change_percent, 2)
-                        }
-                except Exception as info_error:
-                    if "429" in str(info_error) or "Too Many Requests" in str(info_error):
-                        if attempt < retry_count - 1:
-                            continue  # 재시도
-                    pass
-            
-            if hist.empty:
-                print(f"⚠️ {symbol}: 데이터 없음 (시도 {attempt + 1}/{retry_count})")
-                if attempt < retry_count - 1:
-                    continue
-                return None
-            
-            current_price = float(hist['Close'].iloc[-1])
-            
-            # 이전 종가 찾기 (거래일 기준)
-            prev_price = current_price
-            if len(hist) > 1:
-                # 마지막에서 두 번째 거래일 찾기
-                for i in range(len(hist) - 2, -1, -1):
-                    if hist['Volume'].iloc[i] > 0:  # 거래량이 있는 날
-                        prev_price = float(hist['Close'].iloc[i])
-                        break
-            
-            change = current_price - prev_price
-            change_percent = (change / prev_price) * 100 if prev_price > 0 else 0
-            
-            return {
-                "name": info["name"],
-                "symbol": info["symbol"],
-                "price": round(current_price, 2),
-                "change": round(change, 2),
-                "change_percent": round(change_percent, 2)
-            }
+            data = await yfinance_upstream.call_async(fetch_index_once, symbol, info)
+            _last_known[symbol] = data
+            return data
+        except UpstreamUnavailable as e:
+            # 서킷이 열려 있으면 재시도하지 않음
+            print(f"🚫 {symbol}: 업스트림 차단 ({e.reason})")
+            raise IndexDataError("circuit_open", str(e))
+        except IndexDataError as e:
+            print(f"⚠️ {symbol}: 데이터 없음 (시도 {attempt + 1}/{retry_count})")
+            last_error = e
         except Exception as e:
-            error_str = str(e)
-            if "429" in error_str or "Too Many Requests" in error_str:
-                if attempt < retry_count - 1:
-                    print(f"⚠️ {symbol}: API 제한 (시도 {attempt + 1}/{retry_count})")
-                    continue
-                else:
-                    print(f"❌ {symbol}: API 제한으로 인한 최종 실패")
+            if is_rate_limit_error(e):
+                print(f"⚠️ {symbol}: API 제한 (시도 {attempt + 1}/{retry_count})")
+                last_error = IndexDataError("rate_limited", str(e))
             else:
                 print(f"❌ Error fetching {symbol}: {e}")
-                if attempt < retry_count - 1:
-                    continue
-                import traceback
-                traceback.print_exc()
-            return None
+                last_error = IndexDataError("error", str(e))
+    
+    raise last_error
+
+async def fetch_market_overview(deadline: float = OVERVIEW_DEADLINE_SECONDS) -> dict:
+    """
+    전체 지수를 동시에 조회 (마감 시간 내 받은 결과만 반환)
+    
+    Returns:
+    - indices: 성공한 지수 (MARKET_INDICES 순서)
+      실패한 지수는 마지막 정상 조회 값이 있으면 stale=True로 포함
+    - status: 심볼별 상태 (ok, no_data, rate_limited, circuit_open, error, timeout)
+    """
+    tasks = {
+        symbol: asyncio.create_task(get_index_data(symbol, info))
+        for symbol, info in MARKET_INDICES.items()
+    }
+    await asyncio.wait(tasks.values(), timeout=deadline)
+    
+    indices = []
+    status = {}
+    for symbol, task in tasks.items():
+        name = MARKET_INDICES[symbol]["symbol"]
+        if not task.done():
+            task.cancel()
+            status[name] = "timeout"
+        elif task.exception() is not None:
+            error = task.exception()
+            status[name] = error.status if isinstance(error, IndexDataError) else "error"
+        else:
+            indices.append(task.result())
+            status[name] = "ok"
+            continue
+        
+        if symbol in _last_known:
+            indices.append({**_last_known[symbol], "stale": True})
     
-    return None
+    failed = [name for name, state in status.items() if state != "ok"]
+    return {
+        "indices": indices,
+        "status": status,
+        "complete": not failed,
+        "note": f"총 {len(status) - len(failed)}개 지수 조회 성공" + (f", {len(failed)}개 실패" if failed else "")
+    }
+
+# 진행 중인 개요 조회 (동시 캐시 미스가 같은 조회를 공유)
+_overview_task: Optional[asyncio.Task] = None
 
 @router.get("/overview")
 async def get_market_overview():
@@ -126,10 +189,12 @@ async def get_market_overview():
     주요 시장 지수 및 자산 개요
     
     주요 지수, 금, 비트코인 등의 현재가와 등락률을 반환합니다.
-    캐시: 5분
+    캐시: 장중 5분, 장외에는 다음 개장까지 (최대 1시간, 일부 지수 실패 시 30초)
     
-    네트워크 차단 환경에서는 빈 배열 또는 기본값을 반환할 수 있습니다.
+    캐시 미스 시 모든 지수를 동시에 조회하며, 마감 시간(8초)을 넘긴 지수는
+    status에 timeout으로 표시하고 받은 결과만 반환합니다.
     """
+    global _overview_task
     cache_key = "market:overview"
     
     # 캐시 확인
@@ -140,40 +205,20 @@ async def get_market_overview():
     
     print(f"❌ 캐시 미스: {cache_key} - 데이터 로딩 중...")
     
-    indices = []
-    network_errors = []
+    if _overview_task is None or _overview_task.done():
+        _overview_task = asyncio.create_task(fetch_market_overview())
+    result = await asyncio.shield(_overview_task)
     
-    for idx, (symbol, info) in enumerate(MARKET_INDICES.items()):
-        # API 제한 방지를 위한 요청 간 딜레이
-        if idx > 0:
-            time.sleep(0.5)  # 각 요청 사이 0.5초 대기
-        
-        try:
-            index_data = get_index_data(symbol, info)
-            if index_data:
-                indices.append(index_data)
-            else:
-                network_errors.append(f"{info['name']}: 데이터 조회 실패")
-        except Exception as e:
-            error_msg = str(e)
-            # 네트워크 관련 에러 감지
-            if any(keyword in error_msg.lower() for keyword in ['network', 'connection', 'timeout', 'unreachable', 'dns']):
-                network_errors.append(f"{info['name']}: 네트워크 연결 실패")
-            else:
-                network_errors.append(f"{info['name']}: {error_msg}")
-    
-    result = {
-        "indices": indices,
-        "note": f"총 {len(indices)}개 지수 조회 성공" + (f", {len(network_errors)}개 실패" if network_errors else "")
-    }
-    
-    # 네트워크 에러가 있으면 로그 출력
-    if network_errors:
-        print(f"⚠️ 네트워크 에러 발생: {', '.join(network_errors)}")
+    failed = {name: state for name, state in result["status"].items() if state != "ok"}
+    if failed:
+        print(f"⚠️ 일부 지수 조회 실패: {failed}")
     
-    # 캐시에 저장 (5분으로 증가 - API 제한 방지)
-    # 네트워크 에러가 있어도 캐시 저장 (빈 배열이라도)
-    set_cache(cache_key, result, ttl_seconds=300)
+    # 캐시에 저장 (거래소 세션 기준, 일부 실패 시 짧게 - 다음 요청에서 다시 채움)
+    if result["complete"]:
+        ttl = combined_ttl_seconds((NYSE, KRX), OVERVIEW_OPEN_INTERVAL, max_ttl=OVERVIEW_MAX_TTL)
+    else:
+        ttl = OVERVIEW_PARTIAL_TTL_SECONDS
+    set_cache(cache_key, result, ttl_seconds=ttl)
     
     return result
 
@@ -195,9 +240,11 @@ async def get_index_detail(symbol: str):
     yf_symbol = ticker_map[symbol]
     info = MARKET_INDICES[yf_symbol]
     
-    index_data = get_index_data(yf_symbol, info)
-    
-    if not index_data:
+    try:
+        return await get_index_data(yf_symbol, info)
+    except IndexDataError as e:
+        if yf_symbol in _last_known:
+            return {**_last_known[yf_symbol], "stale": True}
+        if e.status == "circuit_open":
+            raise HTTPException(status_code=503, detail="업스트림 호출이 일시적으로 차단되었습니다")
         raise HTTPException(status_code=500, detail="데이터를 가져올 수 없습니다")
-    
-    return index_data
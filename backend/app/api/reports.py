@@ -8,6 +8,8 @@ from typing import List, Optional
 from datetime import datetime
 from pydantic import BaseModel
 from app.services.external_data_service import ExternalDataService
+from app.services.sidecar_index import news_index, reports_index, verify_query_plans
+from app.utils.upstream import run_blocking
 
 router = APIRouter()
 
@@ -230,6 +232,22 @@ async def get_reports_summary():
         }
 
 
+@router.get("/index/status")
+async def get_sidecar_index_status(explain: bool = Query(False)):
+    """
+    리포트/뉴스 사이드카 인덱스 상태 (파생 테이블 행 수, 워터마크, 마지막 갱신)
+
+    explain=true면 목록 쿼리의 실행 계획 검증 결과도 포함 (사이드카 갱신은 기다리지 않음)
+    """
+    result = {
+        "reports": await run_blocking(reports_index.status),
+        "news": await run_blocking(news_index.status),
+    }
+    if explain:
+        result["query_plans"] = await run_blocking(verify_query_plans, False)
+    return result
+
+
 @router.get("/{report_id}")
 async def get_report_detail(report_id: int):
     """
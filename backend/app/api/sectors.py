@@ -1,8 +1,23 @@
-from fastapi import APIRouter, Query
-from typing import List, Optional
+from fastapi import APIRouter, HTTPException, Query
+from typing import List, Optional, Tuple
 from pydantic import BaseModel
-from datetime import datetime
-import yfinance as yf
+from datetime import datetime, timedelta
+from app.services.market_calendar import NYSE
+from app.services.sector_engine import (
+    SECTOR_ETFS,
+    YFINANCE_SECTOR_ETFS,
+    SectorSnapshot,
+    build_sector_snapshot,
+    fetch_sector_matrix,
+    sector_history,
+)
+from app.services.sector_rotation import CORRELATION_WINDOWS, MAX_TAIL, sector_rotation
+from app.services.week52_collector import get_cached_snapshot, get_last_update
+from app.utils.cache import get_cache, set_cache
+from app.utils.downsample import MAX_POINTS, MIN_POINTS, cached_history
+from app.utils.refresh import RefreshCoordinator, Snapshot
+from app.utils.shared_snapshot import SharedSnapshotStore
+from app.utils.upstream import run_blocking
 
 router = APIRouter()
 
@@ -15,136 +30,301 @@ class SectorPerformance(BaseModel):
     ytd: float
     description: str
 
-# 섹터 ETF 매핑
-SECTOR_ETFS = {
-    "XLK": {"name": "기술", "description": "소프트웨어, 하드웨어, 반도체", "size": 28},
-    "XLF": {"name": "금융", "description": "은행, 보험, 자산관리", "size": 13},
-    "XLV": {"name": "헬스케어", "description": "제약, 생명공학, 의료기기", "size": 14},
-    "XLY": {"name": "소비재", "description": "자동차, 소매, 레저", "size": 12},
-    "XLC": {"name": "통신", "description": "미디어, 엔터테인먼트, 통신", "size": 9},
-    "XLI": {"name": "산업재", "description": "항공우주, 건설, 제조", "size": 10},
-    "XLE": {"name": "에너지", "description": "석유, 가스, 에너지", "size": 4},
-    "XLU": {"name": "유틸리티", "description": "전력, 수도, 가스 공급", "size": 3},
-    "XLRE": {"name": "부동산", "description": "부동산 투자 신탁", "size": 3},
-    "XLB": {"name": "소재", "description": "화학, 건설자재, 금속", "size": 3},
-    "XLP": {"name": "필수소비재", "description": "식품, 음료, 생활용품", "size": 6},
-}
-
-def calculate_return(hist, days_ago: int) -> Optional[float]:
-    """주어진 일수 전 대비 수익률 계산"""
-    try:
-        if len(hist) <= days_ago:
-            return None
-        current_price = hist['Close'].iloc[-1]
-        past_price = hist['Close'].iloc[-days_ago-1]
-        return round(((current_price - past_price) / past_price) * 100, 2)
-    except:
-        return None
+# 장중 갱신 주기 (장외에는 NYSE 캘린더 기준 마감 후 1회, 다음 개장까지 유지)
+PERFORMANCE_OPEN_INTERVAL = timedelta(minutes=15)
+
+# 일부 ETF가 빠진 스냅샷의 재수집 대기 (연속 실패마다 두 배, 장중 갱신 주기까지)
+INCOMPLETE_RETRY_INITIAL = timedelta(minutes=1)
+INCOMPLETE_RETRY_MAX = PERFORMANCE_OPEN_INTERVAL
+
+# 현재 스냅샷이 불완전할 때의 재수집 대기 (완전한 스냅샷이면 None)
+_incomplete_retry: Optional[timedelta] = None
+
+def load_sector_snapshot() -> SectorSnapshot:
+    """스냅샷 loader: 섹터 ETF 전체를 한 번에 수집해 수익률까지 계산"""
+    previous = sector_refresh.snapshot
+    sector_refresh.report_progress("섹터 ETF 일괄 수집", 0, len(SECTOR_ETFS))
+    matrix = fetch_sector_matrix()
+    if not len(matrix):
+        # 빈 결과로 기존 스냅샷을 덮어쓰지 않도록 실패 처리
+        raise RuntimeError("섹터 ETF 가격을 가져오지 못했습니다")
+    sector_refresh.report_progress("수익률 계산", len(matrix), len(SECTOR_ETFS))
+    return build_sector_snapshot(matrix, previous.data if previous else None)
+
+def sector_max_age(built_at: datetime) -> timedelta:
+    """스냅샷 유효 기간 (불완전한 스냅샷은 재수집 대기까지만)"""
+    interval = NYSE.refresh_interval(built_at, open_interval=PERFORMANCE_OPEN_INTERVAL)
+    if _incomplete_retry is not None:
+        return min(interval, _incomplete_retry)
+    return interval
+
+# 섹터 스냅샷 갱신 코디네이터 (stale-while-revalidate)
+# 장중 15분마다, 마감 후 1회, 이후 다음 개장까지 갱신하지 않음
+# 멀티 워커에서는 한 워커만 수집하고 나머지는 공유 스냅샷 파일을 읽음
+sector_refresh = RefreshCoordinator(
+    "sectors",
+    load_sector_snapshot,
+    max_age=sector_max_age,
+    # 가격 행렬에 기준 지수(SPY)가 추가되어 이전 파일을 읽지 않도록 이름 변경
+    shared=SharedSnapshotStore("sectors-v2"),
+)
+
+def _retry_incomplete(previous, snapshot):
+    """
+    일부 ETF를 받지 못한 스냅샷은 짧게 만료 (1분 뒤 재수집, 계속 빠지면 두 배씩 늘림)
+
+    매 게시마다 바로 만료시키면 ETF 하나가 계속 빠질 때 요청마다 전체를 다시 받게 됩니다.
+    """
+    global _incomplete_retry
+    if isinstance(snapshot.data, SectorSnapshot) and not snapshot.data.complete:
+        if _incomplete_retry is None:
+            _incomplete_retry = INCOMPLETE_RETRY_INITIAL
+        else:
+            _incomplete_retry = min(_incomplete_retry * 2, INCOMPLETE_RETRY_MAX)
+        print(f"⚠️ 섹터 ETF 누락 ({', '.join(snapshot.data.missing)}) - {int(_incomplete_retry.total_seconds())}초 뒤 재수집")
+    else:
+        _incomplete_retry = None
+
+sector_refresh.subscribe(_retry_incomplete)
+
+# 새 스냅샷이 게시될 때마다 로테이션 지표를 이어지는 봉만 반영해 갱신
+sector_refresh.subscribe(
+    lambda previous, snapshot: sector_rotation.update(snapshot.data, snapshot.version)
+)
+
+async def get_sector_snapshot() -> Optional[Snapshot]:
+    """
+    현재 섹터 스냅샷 (읽기 전용)
+    
+    만료됐으면 백그라운드 갱신만 트리거하고 기존 스냅샷을 반환합니다.
+    스냅샷이 아직 없으면 수집 하나를 (이벤트 루프를 막지 않고) 기다립니다.
+    """
+    snapshot = sector_refresh.get()
+    if snapshot is None:
+        snapshot = await run_blocking(sector_refresh.refresh)
+    return snapshot
 
 @router.get("/performance")
 async def get_sector_performance():
-    """섹터별 수익률 (실시간 yfinance 데이터)"""
-    sectors = []
+    """
+    섹터별 수익률 (yfinance 섹터 ETF 일괄 수집)
     
-    for symbol, info in SECTOR_ETFS.items():
-        try:
-            # yfinance로 데이터 가져오기
-            ticker = yf.Ticker(symbol)
-            hist = ticker.history(period="1y")
-            
-            if hist.empty:
-                continue
-            
-            # 수익률 계산
-            daily = calculate_return(hist, 1) or 0
-            weekly = calculate_return(hist, 5) or 0
-            monthly = calculate_return(hist, 21) or 0
-            ytd = calculate_return(hist, 252) or 0
-            
-            sectors.append({
-                "name": info["name"],
-                "symbol": symbol,
-                "daily": daily,
-                "weekly": weekly,
-                "monthly": monthly,
-                "ytd": ytd,
-                "description": info["description"],
-                "size": info["size"]
-            })
-            
-        except Exception as e:
-            print(f"Error fetching {symbol}: {e}")
-            # 에러 시 기본값
-            sectors.append({
-                "name": info["name"],
-                "symbol": symbol,
-                "daily": 0,
-                "weekly": 0,
-                "monthly": 0,
-                "ytd": 0,
-                "description": info["description"],
-                "size": info["size"]
-            })
+    갱신: 장중 15분마다, 장외에는 다음 개장까지 (만료 시 기존 값을 반환하고 백그라운드 갱신)
+    """
+    snapshot = await get_sector_snapshot()
+    if snapshot is None:
+        return {"sectors": [], "note": "섹터 데이터를 가져올 수 없습니다. 잠시 후 다시 시도하세요."}
+    return snapshot.data.performance_response()
+
+@router.get("/refresh/status")
+async def get_sector_refresh_status():
+    """섹터 스냅샷 갱신 상태 (진행 단계, 마지막 갱신, 만료 시각)"""
+    status = sector_refresh.status()
+    snapshot = sector_refresh.snapshot
+    status["missing"] = list(snapshot.data.missing) if snapshot else []
+    return status
+
+def build_sectors_history(snapshot: Snapshot, days: int) -> dict:
+    """섹터별 히스토리 응답 (다운샘플 전 원본, 스냅샷 버전 + days 단위 캐시)"""
+    cache_key = f"sectors:history:{days}:v{snapshot.version}"
+    cached = get_cache(cache_key)
+    if cached is not None:
+        return cached
     
-    return {"sectors": sectors}
+    history = sector_history(snapshot.data, days)
+    result = {
+        "history": history,
+        "days": len(history),
+        "sectors": list(SECTOR_ETFS.values())
+    }
+    if snapshot.data.complete:
+        set_cache(cache_key, result, ttl_seconds=NYSE.ttl_seconds(PERFORMANCE_OPEN_INTERVAL))
+    return result
 
 @router.get("/history")
 async def get_sectors_history(
-    days: int = Query(30, ge=1, le=365)
+    days: int = Query(30, ge=1, le=365),
+    max_points: Optional[int] = Query(None, ge=MIN_POINTS, le=MAX_POINTS),
+    method: str = Query("lttb", pattern="^(lttb|minmax)$"),
 ):
     """
-    섹터별 히스토리 데이터 (yfinance)
+    섹터별 히스토리 데이터 (yfinance 섹터 ETF 가격 행렬)
     
-    최근 N일간의 모든 섹터 수익률 추이를 반환합니다.
-    """
-    try:
-        history = []
-        
-        # 각 섹터 ETF의 히스토리 데이터 수집
-        for symbol, info in SECTOR_ETFS.items():
-            try:
-                ticker = yf.Ticker(symbol)
-                hist = ticker.history(period=f"{days}d")
-                
-                if not hist.empty:
-                    # 날짜별 수익률 계산
-                    for i, (date, row) in enumerate(hist.iterrows()):
-                        if i == 0:
-                            continue  # 첫날은 변화율 계산 불가
-                        
-                        prev_close = hist['Close'].iloc[i-1]
-                        current_close = row['Close']
-                        change_percent = ((current_close - prev_close) / prev_close * 100) if prev_close > 0 else 0
-                        
-                        # 해당 날짜의 데이터 찾기 또는 생성
-                        date_str = date.strftime("%Y-%m-%d")
-                        existing_entry = next((item for item in history if item['date'] == date_str), None)
-                        
-                        if existing_entry:
-                            existing_entry[info['name']] = round(change_percent, 2)
-                        else:
-                            history.append({
-                                'date': date_str,
-                                info['name']: round(change_percent, 2)
-                            })
-            except Exception as e:
-                print(f"Error fetching history for {symbol}: {e}")
-                continue
-        
-        # 날짜순 정렬
-        history.sort(key=lambda x: x['date'])
-        
-        return {
-            "history": history[-days:],  # 최근 N일
-            "days": len(history),
-            "sectors": list(SECTOR_ETFS.values())
-        }
-    except Exception as e:
-        print(f"Error in get_sectors_history: {e}")
+    최근 N일간의 모든 섹터 일간 등락률 추이를 반환합니다.
+    max_points를 주면 섹터별 모양을 보존하도록 다운샘플 (method: lttb / minmax)
+    갱신: /performance와 같은 섹터 스냅샷 사용 (업스트림 추가 호출 없음)
+    """
+    snapshot = await get_sector_snapshot()
+    if snapshot is None:
         return {
             "history": [],
             "days": 0,
             "sectors": [],
-            "error": str(e)
+            "error": "섹터 데이터를 가져올 수 없습니다"
         }
+    return cached_history(
+        f"sectors:history:{days}:v{snapshot.version}",
+        max_points,
+        method,
+        lambda: build_sectors_history(snapshot, days),
+        ttl_seconds=NYSE.ttl_seconds(PERFORMANCE_OPEN_INTERVAL),
+        cacheable=lambda _: snapshot.data.complete,
+    )
+
+# ===== 섹터 로테이션 / 상대강도 =====
 
+ROTATION_NOT_READY_NOTE = "로테이션 지표를 계산할 가격 데이터가 없습니다. 잠시 후 다시 시도하세요."
+
+async def get_rotation_view() -> Tuple[Optional[Snapshot], dict]:
+    """현재 섹터 스냅샷과 미리 계산된 로테이션 지표"""
+    snapshot = await get_sector_snapshot()
+    if snapshot is None:
+        return None, {}
+    if sector_rotation.version != snapshot.version:
+        # 게시 알림보다 먼저 요청이 온 경우 (다른 워커의 공유 스냅샷 등)
+        await run_blocking(sector_rotation.update, snapshot.data, snapshot.version)
+    return snapshot, sector_rotation.view()
+
+@router.get("/rotation")
+async def get_sector_rotation():
+    """
+    섹터 로테이션 요약
+    
+    RRG 사분면별 섹터와 모멘텀 평균 순위 상/하위 섹터 (기준: SPY)
+    """
+    _, view = await get_rotation_view()
+    if not view:
+        return {"quadrants": {}, "strong_sectors": [], "weak_sectors": [], "note": ROTATION_NOT_READY_NOTE}
+    ranked = [row for row in view["momentum"] if row["composite_rank"] is not None]
+    return {
+        "as_of": view["as_of"],
+        "benchmark": view["benchmark"],
+        "quadrants": view["quadrants"],
+        "strong_sectors": [row["name"] for row in ranked[:3]],
+        "weak_sectors": [row["name"] for row in ranked[-3:]],
+    }
+
+@router.get("/relative-strength")
+async def get_sector_relative_strength(
+    days: int = Query(90, ge=1, le=365),
+    max_points: Optional[int] = Query(None, ge=MIN_POINTS, le=MAX_POINTS),
+    method: str = Query("lttb", pattern="^(lttb|minmax)$"),
+):
+    """
+    섹터별 SPY 대비 상대강도
+    
+    - sectors: 최신 비율(rs), 1개월 비율 변화(%), RS-Ratio
+    - history: 최근 N일간 날짜별 RS-Ratio (비율선 ÷ 50일 이동평균 × 100, 100 초과 = SPY 대비 강세)
+    """
+    snapshot, view = await get_rotation_view()
+    if not view:
+        return {"sectors": [], "history": [], "note": ROTATION_NOT_READY_NOTE}
+    
+    def build() -> dict:
+        cutoff = (datetime.now() - timedelta(days=days)).strftime("%Y-%m-%d")
+        history = [row for row in view["rs_history"] if row["date"] >= cutoff]
+        return {
+            "as_of": view["as_of"],
+            "benchmark": view["benchmark"],
+            "sectors": view["relative_strength"],
+            "history": history,
+            "days": len(history),
+        }
+    
+    return cached_history(
+        f"sectors:relative-strength:{days}:v{snapshot.version}",
+        max_points,
+        method,
+        build,
+        ttl_seconds=NYSE.ttl_seconds(PERFORMANCE_OPEN_INTERVAL),
+    )
+
+@router.get("/momentum")
+async def get_sector_momentum():
+    """
+    섹터 모멘텀 순위
+    
+    1/3/6/12개월 수익률과 기간별 순위, 평균 순위 (평균 순위 오름차순 정렬)
+    """
+    _, view = await get_rotation_view()
+    if not view:
+        return {"sectors": [], "note": ROTATION_NOT_READY_NOTE}
+    return {"as_of": view["as_of"], "sectors": view["momentum"]}
+
+@router.get("/correlation")
+async def get_sector_correlation(
+    window: int = Query(63, description=f"상관계수 기간 (거래일): {', '.join(map(str, CORRELATION_WINDOWS))}")
+):
+    """
+    섹터 간 일간 수익률 상관계수 행렬 (최근 window 거래일)
+    """
+    if window not in CORRELATION_WINDOWS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"지원하지 않는 기간: {window} ({', '.join(map(str, CORRELATION_WINDOWS))})"
+        )
+    _, view = await get_rotation_view()
+    correlation = view.get("correlations", {}).get(window)
+    if correlation is None:
+        return {"window": window, "symbols": [], "names": [], "matrix": [], "note": ROTATION_NOT_READY_NOTE}
+    return {"as_of": view["as_of"], **correlation}
+
+@router.get("/rrg")
+async def get_sector_rrg(
+    tail: int = Query(8, ge=1, le=MAX_TAIL, description="주 단위 꼬리 점 개수")
+):
+    """
+    RRG (Relative Rotation Graph) 좌표
+    
+    섹터별 RS-Ratio(x) / RS-Momentum(y)과 사분면 (Leading, Weakening, Lagging, Improving),
+    최근 tail주 궤적 (과거 -> 현재)
+    """
+    _, view = await get_rotation_view()
+    if not view:
+        return {"sectors": [], "note": ROTATION_NOT_READY_NOTE}
+    return {
+        "as_of": view["as_of"],
+        "benchmark": view["benchmark"],
+        "sectors": [{**point, "tail": point["tail"][-tail:]} for point in view["rrg"]],
+    }
+
+@router.get("/rotation/status")
+async def get_sector_rotation_status():
+    """로테이션 엔진 상태 (반영한 스냅샷 버전, 증분 갱신 / 전체 재계산 횟수)"""
+    return sector_rotation.status()
+
+# ===== 섹터 브레드스 (52주 유니버스 구성 종목 기준) =====
+
+BREADTH_SORT_KEYS = ("highs_count", "lows_count", "ratio", "percent_advancing", "cap_weighted_change", "total_stocks")
+
+@router.get("/breadth")
+async def get_sector_breadth(
+    sort_by: str = Query("highs_count", pattern=f"^({'|'.join(BREADTH_SORT_KEYS)})$"),
+    include_unknown: bool = False,
+):
+    """
+    섹터별 구성 종목 브레드스 (52주 유니버스 스냅샷)
+    
+    섹터마다 52주 신고가/신저가 근접 종목 수, 상승 종목 비율(%), 시총 가중 등락률(%)
+    집계는 52주 스냅샷이 게시될 때 한 번 계산되므로 요청 시에는 정렬만 합니다.
+    """
+    rows = []
+    for row in get_cached_snapshot().aggregates.get("by_sector", ()):
+        if row["sector"] == "Unknown" and not include_unknown:
+            continue
+        etf = YFINANCE_SECTOR_ETFS.get(row["sector"])
+        rows.append({
+            **row,
+            "etf": etf,
+            "name": SECTOR_ETFS[etf]["name"] if etf else row["sector"],
+        })
+    leaders = sorted(rows, key=lambda row: row["highs_count"], reverse=True)
+    rows.sort(key=lambda row: row[sort_by], reverse=True)
+    
+    return {
+        "sectors": rows,
+        "sort_by": sort_by,
+        # 신고가 근접 종목이 가장 많은 섹터 (최대 3개)
+        "new_high_leaders": [row["name"] for row in leaders[:3] if row["highs_count"] > 0],
+        "last_update": get_last_update(),
+    }
@@ -9,6 +9,15 @@ from datetime import datetime
 from pydantic import BaseModel
 from app.services.external_data_service import ExternalDataService
 from app.database import get_reports_db
+from app.services.report_summary import report_summary
+from app.services.sidecar_index import (
+    RECOMMENDATION_SUMMARY_QUERY,
+    STOCK_REPORTS_QUERY,
+    TARGET_PRICE_HISTORY_QUERY,
+    reports_index,
+)
+from app.utils.downsample import MAX_POINTS, MIN_POINTS, cached_history
+from app.utils.upstream import run_blocking
 from sqlalchemy import text
 
 router = APIRouter()
@@ -50,6 +59,14 @@ class StockListResponse(BaseModel):
     total: int
 
 
+async def ensure_report_summary():
+    """종목 요약 테이블 준비 - 첫 집계만 기다리고, 이후 증분 갱신은 백그라운드에서"""
+    if await run_blocking(report_summary.is_built):
+        report_summary.refresh_in_background()
+    else:
+        await run_blocking(report_summary.refresh)
+
+
 @router.get("/", response_model=StockListResponse)
 async def get_stocks(
     page: int = Query(1, ge=1),
@@ -58,83 +75,28 @@ async def get_stocks(
 ):
     """
     리포트가 있는 종목 목록 조회
+    
+    사이드카 DB의 종목별 요약 테이블(report_summary)에서 한 페이지만 읽습니다.
+    요약은 원본 리포트 DB에 새로 추가된 분석 행만 반영해 1분 주기로 (백그라운드에서) 갱신됩니다.
     """
     try:
-        offset = (page - 1) * page_size
-        
-        with get_reports_db() as session:
-            # 검색 조건
-            search_condition = ""
-            params = {"limit": page_size, "offset": offset}
-            
-            if search:
-                search_condition = "WHERE ra.stock_code LIKE :search OR ra.stock_name LIKE :search"
-                params["search"] = f"%{search}%"
-            
-            # 종목별 리포트 통계
-            query = f"""
-                SELECT 
-                    ra.stock_code,
-                    ra.stock_name,
-                    COUNT(DISTINCT ra.report_id) as total_reports,
-                    MAX(sr.date) as latest_report_date,
-                    (SELECT target_price FROM report_analysis ra2 
-                     JOIN sent_reports sr2 ON ra2.report_id = sr2.id 
-                     WHERE ra2.stock_code = ra.stock_code 
-                     ORDER BY sr2.date DESC LIMIT 1) as latest_target_price,
-                    (SELECT recommendation FROM report_analysis ra2 
-                     JOIN sent_reports sr2 ON ra2.report_id = sr2.id 
-                     WHERE ra2.stock_code = ra.stock_code 
-                     ORDER BY sr2.date DESC LIMIT 1) as latest_recommendation,
-                    AVG(ra.target_price) as avg_target_price,
-                    AVG(CASE 
-                        WHEN ra.current_price > 0 AND ra.target_price > 0 
-                        THEN ((ra.target_price - ra.current_price) / ra.current_price * 100)
-                        ELSE NULL 
-                    END) as avg_upside
-                FROM report_analysis ra
-                JOIN sent_reports sr ON ra.report_id = sr.id
-                {search_condition}
-                GROUP BY ra.stock_code, ra.stock_name
-                ORDER BY total_reports DESC, latest_report_date DESC
-                LIMIT :limit OFFSET :offset
-            """
-            
-            result = session.execute(text(query), params)
-            rows = result.fetchall()
-            
-            stocks = []
-            for row in rows:
-                stocks.append({
-                    "stock_code": row[0],
-                    "stock_name": row[1],
-                    "total_reports": row[2],
-                    "latest_report_date": row[3],
-                    "latest_target_price": row[4],
-                    "latest_recommendation": row[5],
-                    "avg_target_price": row[6],
-                    "avg_upside": round(row[7], 2) if row[7] else None
-                })
-            
-            # 전체 종목 수
-            count_query = f"""
-                SELECT COUNT(DISTINCT ra.stock_code)
-                FROM report_analysis ra
-                {search_condition}
-            """
-            count_params = {"search": params.get("search")} if search else {}
-            count_result = session.execute(text(count_query), count_params)
-            total = count_result.fetchone()[0]
-            
-            return {
-                "stocks": stocks,
-                "total": total
-            }
+        await ensure_report_summary()
+        stocks, total = await run_blocking(report_summary.list_stocks, page, page_size, search)
+        return {
+            "stocks": stocks,
+            "total": total
+        }
             
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"종목 목록 조회 실패: {str(e)}")
 
 
+@router.get("/summary/status")
+async def get_stock_summary_status():
+    """종목 요약 테이블 상태 (반영한 원본 행 수, 마지막 갱신, 전체 재집계 횟수)"""
+    return await run_blocking(report_summary.status)
+
+
 @router.get("/{stock_code}", response_model=StockDetailResponse)
 async def get_stock_detail(
     stock_code: str,
@@ -147,83 +109,18 @@ async def get_stock_detail(
     try:
         offset = (page - 1) * page_size
         
+        # 종목 기본 정보 (종목별 요약 테이블)
+        await ensure_report_summary()
+        
         with get_reports_db() as session:
-            # 종목 기본 정보
-            stock_query = """
-                SELECT 
-                    ra.stock_code,
-                    ra.stock_name,
-                    COUNT(DISTINCT ra.report_id) as total_reports,
-                    MAX(sr.date) as latest_report_date,
-                    (SELECT target_price FROM report_analysis ra2 
-                     JOIN sent_reports sr2 ON ra2.report_id = sr2.id 
-                     WHERE ra2.stock_code = :stock_code 
-                     ORDER BY sr2.date DESC LIMIT 1) as latest_target_price,
-                    (SELECT recommendation FROM report_analysis ra2 
-                     JOIN sent_reports sr2 ON ra2.report_id = sr2.id 
-                     WHERE ra2.stock_code = :stock_code 
-                     ORDER BY sr2.date DESC LIMIT 1) as latest_recommendation,
-                    AVG(ra.target_price) as avg_target_price,
-                    AVG(CASE 
-                        WHEN ra.current_price > 0 AND ra.target_price > 0 
-                        THEN ((ra.target_price - ra.current_price) / ra.current_price * 100)
-                        ELSE NULL 
-                    END) as avg_upside
-                FROM report_analysis ra
-                JOIN sent_reports sr ON ra.report_id = sr.id
-                WHERE ra.stock_code = :stock_code
-                GROUP BY ra.stock_code, ra.stock_name
-            """
+            stock_info = report_summary.get(stock_code)
             
-            stock_result = session.execute(text(stock_query), {"stock_code": stock_code})
-            stock_row = stock_result.fetchone()
-            
-            if not stock_row:
+            if not stock_info:
                 raise HTTPException(status_code=404, detail="종목을 찾을 수 없습니다")
             
-            stock_info = {
-                "stock_code": stock_row[0],
-                "stock_name": stock_row[1],
-                "total_reports": stock_row[2],
-                "latest_report_date": stock_row[3],
-                "latest_target_price": stock_row[4],
-                "latest_recommendation": stock_row[5],
-                "avg_target_price": stock_row[6],
-                "avg_upside": round(stock_row[7], 2) if stock_row[7] else None
-            }
-            
-            # 리포트 히스토리
-            reports_query = """
-                SELECT 
-                    ra.id,
-                    ra.report_id,
-                    sr.date as report_date,
-                    sr.title as report_title,
-                    sr.category as report_category,
-                    h.name as house_name,
-                    a.name as analyst_name,
-                    ra.current_price,
-                    ra.target_price,
-                    ra.recommendation,
-                    ra.adjustment_type,
-                    ra.profit_impact,
-                    CASE 
-                        WHEN ra.current_price > 0 AND ra.target_price > 0 
-                        THEN ROUND(((ra.target_price - ra.current_price) / ra.current_price * 100), 2)
-                        ELSE NULL 
-                    END as upside_percent,
-                    sr.pdf_url
-                FROM report_analysis ra
-                JOIN sent_reports sr ON ra.report_id = sr.id
-                LEFT JOIN houses h ON ra.house_id = h.id
-                LEFT JOIN analysts a ON ra.analyst_id = a.id
-                WHERE ra.stock_code = :stock_code
-                ORDER BY sr.date DESC, ra.id DESC
-                LIMIT :limit OFFSET :offset
-            """
-            
+            # 리포트 히스토리 (사이드카 종목/리포트일 인덱스 범위 스캔)
             reports_result = session.execute(
-                text(reports_query), 
+                text(reports_index.render(STOCK_REPORTS_QUERY)), 
                 {"stock_code": stock_code, "limit": page_size, "offset": offset}
             )
             reports_rows = reports_result.fetchall()
@@ -259,29 +156,14 @@ async def get_stock_detail(
         raise HTTPException(status_code=500, detail=f"종목 상세 조회 실패: {str(e)}")
 
 
-@router.get("/{stock_code}/target-price-history")
-async def get_target_price_history(stock_code: str):
-    """
-    종목의 목표가 변화 추이 (차트용)
-    """
+# 다운샘플한 목표가 히스토리 캐시 시간 (리포트 DB는 하루 몇 번 갱신)
+TARGET_PRICE_HISTORY_TTL = 300
+
+def build_target_price_history(stock_code: str) -> dict:
+    """목표가 히스토리 응답 (다운샘플 전 원본)"""
     try:
         with get_reports_db() as session:
-            query = """
-                SELECT 
-                    sr.date,
-                    ra.target_price,
-                    ra.current_price,
-                    h.name as house_name,
-                    ra.recommendation
-                FROM report_analysis ra
-                JOIN sent_reports sr ON ra.report_id = sr.id
-                LEFT JOIN houses h ON ra.house_id = h.id
-                WHERE ra.stock_code = :stock_code
-                AND ra.target_price IS NOT NULL
-                ORDER BY sr.date ASC
-            """
-            
-            result = session.execute(text(query), {"stock_code": stock_code})
+            result = session.execute(text(reports_index.render(TARGET_PRICE_HISTORY_QUERY)), {"stock_code": stock_code})
             rows = result.fetchall()
             
             history = []
@@ -304,6 +186,28 @@ async def get_target_price_history(stock_code: str):
         raise HTTPException(status_code=500, detail=f"목표가 히스토리 조회 실패: {str(e)}")
 
 
+@router.get("/{stock_code}/target-price-history")
+async def get_target_price_history(
+    stock_code: str,
+    max_points: Optional[int] = Query(None, ge=MIN_POINTS, le=MAX_POINTS),
+    method: str = Query("lttb", pattern="^(lttb|minmax)$"),
+):
+    """
+    종목의 목표가 변화 추이 (차트용)
+    
+    max_points를 주면 목표가/현재가 모양을 보존하도록 다운샘플 (method: lttb / minmax)
+    """
+    return await run_blocking(
+        cached_history,
+        f"stocks:target-price-history:{stock_code}",
+        max_points,
+        method,
+        lambda: build_target_price_history(stock_code),
+        ttl_seconds=TARGET_PRICE_HISTORY_TTL,
+        value_keys=("target_price", "current_price"),
+    )
+
+
 @router.get("/{stock_code}/recommendation-summary")
 async def get_recommendation_summary(stock_code: str):
     """
@@ -311,21 +215,7 @@ async def get_recommendation_summary(stock_code: str):
     """
     try:
         with get_reports_db() as session:
-            query = """
-                SELECT 
-                    ra.recommendation,
-                    COUNT(*) as count,
-                    AVG(ra.target_price) as avg_target,
-                    MAX(sr.date) as latest_date
-                FROM report_analysis ra
-                JOIN sent_reports sr ON ra.report_id = sr.id
-                WHERE ra.stock_code = :stock_code
-                AND ra.recommendation IS NOT NULL
-                GROUP BY ra.recommendation
-                ORDER BY count DESC
-            """
-            
-            result = session.execute(text(query), {"stock_code": stock_code})
+            result = session.execute(text(reports_index.render(RECOMMENDATION_SUMMARY_QUERY)), {"stock_code": stock_code})
             rows = result.fetchall()
             
             summary = []
@@ -1,109 +1,30 @@
-from fastapi import APIRouter, Query
-from typing import List, Optional, Dict
+from fastapi import APIRouter, Header, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
+from typing import List, Optional
 from pydantic import BaseModel
-import yfinance as yf
-from datetime import datetime, timedelta
-import pandas as pd
-from concurrent.futures import ThreadPoolExecutor, as_completed
-import time
+from datetime import datetime
+import asyncio
 import pytz
+from app.services.market_calendar import NYSE
+from app.services.refresh_scheduler import refresh_scheduler
+from app.services.universe import universe_registry
+from app.services.week52_collector import get_cached_data, get_cached_snapshot, get_last_update, week52_refresh
+from app.services.week52_stream import format_event, snapshot_event, week52_stream
+from app.services.breadth_history import breadth_history
 
 router = APIRouter()
 
-# 미국 공휴일 (2024-2025)
-US_MARKET_HOLIDAYS = [
-    "2024-01-01",  # New Year's Day
-    "2024-01-15",  # Martin Luther King Jr. Day
-    "2024-02-19",  # Presidents Day
-    "2024-03-29",  # Good Friday
-    "2024-05-27",  # Memorial Day
-    "2024-06-19",  # Juneteenth
-    "2024-07-04",  # Independence Day
-    "2024-09-02",  # Labor Day
-    "2024-11-28",  # Thanksgiving
-    "2024-12-25",  # Christmas
-    "2025-01-01",  # New Year's Day
-    "2025-01-20",  # Martin Luther King Jr. Day
-    "2025-02-17",  # Presidents Day
-    "2025-04-18",  # Good Friday
-    "2025-05-26",  # Memorial Day
-    "2025-06-19",  # Juneteenth
-    "2025-07-04",  # Independence Day
-    "2025-09-01",  # Labor Day
-    "2025-11-27",  # Thanksgiving
-    "2025-12-25",  # Christmas
-]
-
 def get_california_time():
     """캘리포니아 시간대 현재 시간"""
     pacific = pytz.timezone('America/Los_Angeles')
     return datetime.now(pacific)
 
-def is_market_open():
-    """미국 주식 시장이 현재 열려있는지 확인"""
-    now = get_california_time()
-    
-    # 주말 체크 (토요일=5, 일요일=6)
-    if now.weekday() >= 5:
-        return False
-    
-    # 공휴일 체크
-    if now.strftime("%Y-%m-%d") in US_MARKET_HOLIDAYS:
-        return False
-    
-    # 시장 시간 체크 (캘리포니아 시간 기준: 06:30 - 13:00)
-    market_open_time = now.replace(hour=6, minute=30, second=0, microsecond=0)
-    market_close_time = now.replace(hour=13, minute=0, second=0, microsecond=0)
-    
-    return market_open_time <= now <= market_close_time
-
-def get_last_trading_day():
-    """직전 거래일 찾기"""
-    now = get_california_time()
-    current_date = now.date()
-    
-    # 최대 10일 전까지 확인
-    for i in range(1, 11):
-        check_date = current_date - timedelta(days=i)
-        
-        # 주말이 아니고
-        if check_date.weekday() < 5:
-            # 공휴일이 아니면
-            if check_date.strftime("%Y-%m-%d") not in US_MARKET_HOLIDAYS:
-                return check_date
-    
-    # 못 찾으면 그냥 전날
-    return current_date - timedelta(days=1)
-
 def get_market_status():
-    """시장 상태 정보 반환"""
-    is_open = is_market_open()
-    now = get_california_time()
-    
-    if is_open:
-        return {
-            "is_open": True,
-            "date": now.strftime("%Y-%m-%d"),
-            "message": "시장 개장 중",
-            "california_time": now.strftime("%Y-%m-%d %H:%M:%S %Z")
-        }
-    else:
-        last_trading = get_last_trading_day()
-        
-        # 주말인지 공휴일인지 확인
-        if now.weekday() >= 5:
-            reason = "주말"
-        elif now.strftime("%Y-%m-%d") in US_MARKET_HOLIDAYS:
-            reason = "공휴일"
-        else:
-            reason = "시장 마감"
-        
-        return {
-            "is_open": False,
-            "date": last_trading.strftime("%Y-%m-%d"),
-            "message": f"{reason} - 직전 거래일 ({last_trading.strftime('%Y-%m-%d')}) 데이터 표시",
-            "california_time": now.strftime("%Y-%m-%d %H:%M:%S %Z")
-        }
+    """시장 상태 정보 반환 (NYSE 캘린더 기준)"""
+    return {
+        **NYSE.status(),
+        "california_time": get_california_time().strftime("%Y-%m-%d %H:%M:%S %Z")
+    }
 
 class Stock52Week(BaseModel):
     symbol: str
@@ -127,247 +48,6 @@ class MarketCapStats(BaseModel):
     ratio: float
     total_stocks: int
 
-# 캐시 저장소
-_cache: Dict[str, any] = {
-    "data": [],
-    "last_update": None,
-    "updating": False
-}
-
-def get_sp500_tickers() -> List[str]:
-    """S&P 500 종목 리스트 가져오기"""
-    try:
-        import requests
-        headers = {'User-Agent': 'Mozilla/5.0'}
-        url = 'https://en.wikipedia.org/wiki/List_of_S%26P_500_companies'
-        response = requests.get(url, headers=headers, timeout=10)
-        table = pd.read_html(response.content)
-        df = table[0]
-        
-        # 가능한 컬럼 이름 확인
-        possible_columns = ['Symbol', 'Ticker', 'Ticker symbol']
-        symbol_col = None
-        for col in possible_columns:
-            if col in df.columns:
-                symbol_col = col
-                break
-        
-        if symbol_col is None:
-            print(f"S&P 500 Symbol 컬럼 없음. 사용 가능한 컬럼: {df.columns.tolist()}")
-            raise ValueError("Symbol 컬럼을 찾을 수 없습니다")
-        
-        return df[symbol_col].str.replace('.', '-').tolist()
-    except Exception as e:
-        print(f"S&P 500 티커 로드 실패: {e}")
-        # Fallback: 주요 종목 하드코딩
-        return [
-            "AAPL", "MSFT", "GOOGL", "GOOG", "AMZN", "NVDA", "META", "TSLA", "BRK-B", "UNH",
-            "XOM", "V", "JPM", "JNJ", "WMT", "MA", "PG", "AVGO", "HD", "CVX",
-            "LLY", "ABBV", "MRK", "KO", "PEP", "COST", "ADBE", "BAC", "TMO", "MCD",
-        ]
-
-def get_nasdaq100_tickers() -> List[str]:
-    """NASDAQ 100 종목 리스트 가져오기"""
-    try:
-        import requests
-        headers = {'User-Agent': 'Mozilla/5.0'}
-        url = 'https://en.wikipedia.org/wiki/NASDAQ-100'
-        response = requests.get(url, headers=headers, timeout=10)
-        tables = pd.read_html(response.content)
-        
-        # 여러 테이블에서 Ticker 컬럼 찾기
-        possible_columns = ['Ticker', 'Symbol', 'Ticker symbol']
-        for table in tables:
-            for col in possible_columns:
-                if col in table.columns:
-                    return table[col].str.replace('.', '-').tolist()
-        
-        print(f"NASDAQ 100 Ticker 컬럼을 찾을 수 없음")
-        raise ValueError("Ticker 컬럼을 찾을 수 없습니다")
-    except Exception as e:
-        print(f"NASDAQ 100 티커 로드 실패: {e}")
-        # Fallback: 주요 종목 하드코딩
-        return [
-            "AAPL", "MSFT", "GOOGL", "GOOG", "AMZN", "NVDA", "META", "TSLA", "AVGO", "NFLX",
-            "AMD", "INTC", "CSCO", "ADBE", "PEP", "COST", "CMCSA", "QCOM", "TXN", "AMGN",
-        ]
-
-def get_all_tickers() -> List[str]:
-    """S&P 500 + NASDAQ 100 종목 (중복 제거)"""
-    try:
-        sp500 = get_sp500_tickers()
-        nasdaq100 = get_nasdaq100_tickers()
-        
-        # 추가 주요 종목 (Russell 2000, Dow Jones 등에서 선별)
-        additional = [
-            "CRM", "ORCL", "ACN", "NOW", "IBM", "INTU", "AMAT", "MU", "ADI", "KLAC",
-            "NFLX", "DIS", "CMCSA", "VZ", "T", "TMUS", "CHTR",
-            "WFC", "C", "GS", "MS", "SCHW", "AXP", "BLK", "SPGI",
-            "NKE", "SBUX", "MCD", "TJX", "LOW", "HD", "TGT", "BKNG",
-            "UNP", "UPS", "FDX", "LMT", "RTX", "BA", "CAT", "DE",
-            "ABT", "PFE", "BMY", "GILD", "MRNA", "REGN", "VRTX", "ISRG",
-            "NEE", "DUK", "SO", "AEP", "EXC", "SRE", "D", "PEG",
-            "PLD", "AMT", "CCI", "EQIX", "PSA", "SPG", "O", "WELL"
-        ]
-        
-        all_tickers = list(set(sp500 + nasdaq100 + additional))
-        print(f"✅ 총 {len(all_tickers)}개 종목 로드 (S&P 500: {len(sp500)}, NASDAQ 100: {len(nasdaq100)}, 추가: {len(additional)})")
-        return all_tickers
-    except Exception as e:
-        print(f"티커 로드 실패: {e}")
-        return []
-
-def categorize_market_cap(market_cap_billions: float) -> str:
-    """시총 기준 분류 (단위: 십억 달러)"""
-    market_cap = market_cap_billions * 1000  # 조 -> 십억 달러
-    if market_cap >= 200:
-        return "대형주 (Mega Cap)"
-    elif market_cap >= 10:
-        return "대형주 (Large Cap)"
-    elif market_cap >= 2:
-        return "중형주 (Mid Cap)"
-    else:
-        return "소형주 (Small Cap)"
-
-def get_stock_data(symbol: str) -> Optional[dict]:
-    """개별 주식 데이터 가져오기"""
-    try:
-        ticker = yf.Ticker(symbol)
-        info = ticker.info
-        hist = ticker.history(period="1y")
-        
-        if hist.empty:
-            return None
-        
-        # 현재 가격 가져오기
-        current_price = info.get("currentPrice") or info.get("regularMarketPrice")
-        if not current_price or current_price <= 0:
-            current_price = hist["Close"].iloc[-1] if not hist.empty else None
-        
-        if not current_price:
-            return None
-        
-        high_52week = info.get("fiftyTwoWeekHigh", hist["High"].max())
-        low_52week = info.get("fiftyTwoWeekLow", hist["Low"].min())
-        
-        # 52주 신고가/신저가 근접도 계산 (3% 이내)
-        near_high = (current_price >= high_52week * 0.97)
-        near_low = (current_price <= low_52week * 1.03)
-        
-        # 실제 변동률 사용 (yfinance에서 직접 제공)
-        change = info.get("regularMarketChange")
-        change_percent = info.get("regularMarketChangePercent")
-        
-        # fallback: 계산된 변동률
-        if change is None or change_percent is None or pd.isna(change) or pd.isna(change_percent):
-            # previousClose 사용 (더 신뢰성 있음)
-            prev_close = info.get("previousClose") or info.get("regularMarketPreviousClose")
-            
-            if prev_close and prev_close > 0:
-                change = current_price - prev_close
-                change_percent = (change / prev_close * 100)
-            elif len(hist) > 1:
-                # 히스토리에서 전일 종가 가져오기
-                prev_close = hist["Close"].iloc[-2]
-                if not pd.isna(prev_close) and prev_close > 0:
-                    change = current_price - prev_close
-                    change_percent = (change / prev_close * 100)
-                else:
-                    change = 0
-                    change_percent = 0
-            else:
-                change = 0
-                change_percent = 0
-        
-        # NaN 체크 및 기본값 설정
-        if pd.isna(change):
-            change = 0
-        if pd.isna(change_percent):
-            change_percent = 0
-        
-        market_cap_billions = round(info.get("marketCap", 0) / 1e12, 2)  # 조 달러
-        market_cap_category = categorize_market_cap(market_cap_billions)
-        
-        return {
-            "symbol": symbol,
-            "name": info.get("longName", symbol),
-            "price": round(current_price, 2),
-            "high_52week": round(high_52week, 2),
-            "low_52week": round(low_52week, 2),
-            "change": round(change, 2),
-            "change_percent": round(change_percent, 2),
-            "days_at_high": 1 if near_high else None,
-            "days_at_low": 1 if near_low else None,
-            "sector": info.get("sector", "Unknown"),
-            "market_cap": market_cap_billions,
-            "volume": round(info.get("volume", 0) / 1e6, 1),  # 백만
-            "market_cap_category": market_cap_category,
-            "is_near_high": near_high,
-            "is_near_low": near_low
-        }
-    except Exception as e:
-        print(f"Error fetching {symbol}: {e}")
-        return None
-
-def fetch_all_stocks_data() -> List[dict]:
-    """모든 종목 데이터를 병렬로 가져오기"""
-    tickers = get_all_tickers()
-    all_data = []
-    
-    print(f"📊 {len(tickers)}개 종목 데이터 수집 시작...")
-    start_time = time.time()
-    
-    # 병렬 처리로 속도 향상
-    with ThreadPoolExecutor(max_workers=10) as executor:
-        future_to_symbol = {executor.submit(get_stock_data, symbol): symbol for symbol in tickers}
-        
-        for future in as_completed(future_to_symbol):
-            try:
-                data = future.result()
-                if data:
-                    all_data.append(data)
-            except Exception as e:
-                symbol = future_to_symbol[future]
-                print(f"❌ {symbol} 처리 실패: {e}")
-    
-    elapsed = time.time() - start_time
-    print(f"✅ {len(all_data)}개 종목 데이터 수집 완료 ({elapsed:.1f}초)")
-    
-    return all_data
-
-def update_cache():
-    """캐시 업데이트 (백그라운드에서 실행)"""
-    global _cache
-    
-    if _cache["updating"]:
-        print("⏳ 이미 업데이트 중입니다.")
-        return
-    
-    _cache["updating"] = True
-    try:
-        data = fetch_all_stocks_data()
-        _cache["data"] = data
-        _cache["last_update"] = datetime.now()
-        print(f"✅ 캐시 업데이트 완료: {len(data)}개 종목")
-    except Exception as e:
-        print(f"❌ 캐시 업데이트 실패: {e}")
-    finally:
-        _cache["updating"] = False
-
-def get_cached_data() -> List[dict]:
-    """캐시된 데이터 가져오기 (15분마다 자동 갱신)"""
-    global _cache
-    
-    # 캐시가 비어있거나 15분이 지났으면 업데이트
-    if not _cache["data"] or not _cache["last_update"] or \
-       (datetime.now() - _cache["last_update"]) > timedelta(minutes=15):
-        if not _cache["updating"]:
-            print("🔄 캐시 만료, 백그라운드에서 업데이트 시작...")
-            from threading import Thread
-            Thread(target=update_cache, daemon=True).start()
-    
-    return _cache["data"]
-
 @router.get("/highs")
 async def get_52week_highs(
     limit: int = Query(20, ge=1, le=100),
@@ -377,34 +57,25 @@ async def get_52week_highs(
     52주 신고가 종목 조회
     
     데이터 소스:
-    - S&P 500: 미국 대형주 500개 (Wikipedia API)
-    - NASDAQ 100: 나스닥 상장 대형 기술주 100개 (Wikipedia API)
+    - S&P 500: 미국 대형주 500개 (유니버스 레지스트리, 하루 1회 Wikipedia 대조)
+    - NASDAQ 100: 나스닥 상장 대형 기술주 100개 (유니버스 레지스트리)
     - 추가 주요 종목: Russell, Dow Jones 등에서 선별한 60개
     - 총 분석 대상: 약 600개 종목 (중복 제거 후 실제 수집: ~200개)
     
     업데이트 주기:
-    - 자동 갱신: 15분마다
+    - 자동 갱신: 5분마다 (장중 기준 초대형주·신고가/신저가 근처 5분, 대형주 15분, 나머지 1시간 주기로 가격 갱신)
     - 수동 갱신: POST /api/52week/refresh
     
     Parameters:
     - limit: 반환할 종목 수 (기본 20, 최대 100)
     - market_cap: 시총 필터 (Mega, Large, Mid, Small)
     """
-    all_data = get_cached_data()
-    
-    # 신고가 종목 필터링
-    highs = [stock for stock in all_data if stock.get("is_near_high")]
-    
-    # 시총 필터링
-    if market_cap:
-        highs = [stock for stock in highs if market_cap in stock.get("market_cap_category", "")]
-    
-    # 시총 순으로 정렬
-    highs.sort(key=lambda x: x.get("market_cap", 0), reverse=True)
+    # 스냅샷 게시 때 시총순으로 정렬해 둔 인덱스에서 limit개만 잘라냄
+    stocks, total = get_cached_snapshot().select("highs", market_cap, limit)
     
     return {
-        "stocks": highs[:limit],
-        "total": len(highs)
+        "stocks": stocks,
+        "total": total
     }
 
 @router.get("/lows")
@@ -423,90 +94,33 @@ async def get_52week_lows(
     - limit: 반환할 종목 수
     - market_cap: 시총 필터
     """
-    all_data = get_cached_data()
-    
-    # 신저가 종목 필터링
-    lows = [stock for stock in all_data if stock.get("is_near_low")]
-    
-    # 시총 필터링
-    if market_cap:
-        lows = [stock for stock in lows if market_cap in stock.get("market_cap_category", "")]
-    
-    # 시총 순으로 정렬
-    lows.sort(key=lambda x: x.get("market_cap", 0), reverse=True)
+    # 스냅샷 게시 때 시총순으로 정렬해 둔 인덱스에서 limit개만 잘라냄
+    stocks, total = get_cached_snapshot().select("lows", market_cap, limit)
     
     return {
-        "stocks": lows[:limit],
-        "total": len(lows)
+        "stocks": stocks,
+        "total": total
     }
 
 @router.get("/stats")
 async def get_52week_stats():
-    """52주 신고가/신저가 전체 통계"""
-    all_data = get_cached_data()
-    market_status = get_market_status()
-    
-    highs = [s for s in all_data if s.get("is_near_high")]
-    lows = [s for s in all_data if s.get("is_near_low")]
-    
-    highs_count = len(highs)
-    lows_count = len(lows)
-    ratio = round(highs_count / lows_count, 2) if lows_count > 0 else 0
-    
-    # 시장 강도 판단
-    if ratio > 2.5:
-        market_breadth = "strong"
-    elif ratio > 1.5:
-        market_breadth = "positive"
-    elif ratio > 0.7:
-        market_breadth = "neutral"
-    else:
-        market_breadth = "weak"
+    """52주 신고가/신저가 전체 통계 (스냅샷 게시 때 계산된 집계 사용)"""
+    aggregates = get_cached_snapshot().aggregates
     
     return {
-        "highs_count": highs_count,
-        "lows_count": lows_count,
-        "ratio": ratio,
-        "market_breadth": market_breadth,
-        "total_stocks": len(all_data),
-        "last_update": _cache["last_update"].isoformat() if _cache["last_update"] else None,
-        "market_status": market_status
+        "highs_count": aggregates["highs_count"],
+        "lows_count": aggregates["lows_count"],
+        "ratio": aggregates["ratio"],
+        "market_breadth": aggregates["market_breadth"],
+        "total_stocks": aggregates["total_stocks"],
+        "last_update": get_last_update(),
+        "market_status": get_market_status()
     }
 
 @router.get("/stats/by-market-cap", response_model=List[MarketCapStats])
 async def get_52week_stats_by_market_cap():
-    """시총별 52주 신고가/신저가 통계"""
-    all_data = get_cached_data()
-    
-    categories = {}
-    
-    for stock in all_data:
-        cat = stock.get("market_cap_category", "Unknown")
-        if cat not in categories:
-            categories[cat] = {"total": 0, "highs": 0, "lows": 0}
-        
-        categories[cat]["total"] += 1
-        if stock.get("is_near_high"):
-            categories[cat]["highs"] += 1
-        if stock.get("is_near_low"):
-            categories[cat]["lows"] += 1
-    
-    result = []
-    for cat, data in categories.items():
-        ratio = round(data["highs"] / data["lows"], 2) if data["lows"] > 0 else 0
-        result.append({
-            "category": cat,
-            "highs_count": data["highs"],
-            "lows_count": data["lows"],
-            "ratio": ratio,
-            "total_stocks": data["total"]
-        })
-    
-    # 시총 순서로 정렬
-    order = ["대형주 (Mega Cap)", "대형주 (Large Cap)", "중형주 (Mid Cap)", "소형주 (Small Cap)"]
-    result.sort(key=lambda x: order.index(x["category"]) if x["category"] in order else 999)
-    
-    return result
+    """시총별 52주 신고가/신저가 통계 (시총 순서, 스냅샷 게시 때 계산)"""
+    return list(get_cached_snapshot().aggregates["by_market_cap"])
 
 @router.get("/history")
 async def get_52week_history(days: int = Query(30, ge=1, le=365)):
@@ -514,7 +128,7 @@ async def get_52week_history(days: int = Query(30, ge=1, le=365)):
     52주 신고가/신저가 추이 (히스토리)
     
     최근 N일간의 신고가/신저가 종목 수 추이를 반환합니다.
-    실제로는 yfinance에서 과거 데이터를 가져와 계산합니다.
+    가격 스토어의 일봉으로 계산해 market_breadth 테이블에 적재된 값을 사용합니다.
     
     Parameters:
     - days: 조회할 일수 (기본 30일, 최대 365일)
@@ -525,53 +139,22 @@ async def get_52week_history(days: int = Query(30, ge=1, le=365)):
     - lows_count: 해당일 신저가 종목 수
     - ratio: 신고가/신저가 비율
     - market_breadth: 시장 강도
+    - advancing / declining / unchanged: 해당일 등락 종목 수
     """
-    # 간단한 시뮬레이션: 최근 30일간 데이터
-    # 실제로는 매일 캐시를 저장하거나 yfinance로 과거 데이터 계산
-    from datetime import timedelta
-    
-    history = []
-    current_data = get_cached_data()
-    
-    # 현재 데이터로부터 추정 (실제로는 DB에 저장된 과거 데이터 사용)
-    base_date = datetime.now()
+    history = breadth_history.get_history(days)
     
-    for i in range(min(days, 30)):
-        date = base_date - timedelta(days=i)
-        
-        # 간단한 추정: 실제로는 과거 데이터를 계산해야 함
-        # 현재는 현재 데이터에 약간의 변동을 주어 시뮬레이션
-        import random
-        variation = random.uniform(0.8, 1.2)
-        
-        highs = int(len([s for s in current_data if s.get("is_near_high")]) * variation)
-        lows = int(len([s for s in current_data if s.get("is_near_low")]) * variation)
-        ratio = round(highs / lows, 2) if lows > 0 else 0
-        
-        if ratio > 2.5:
-            breadth = "strong"
-        elif ratio > 1.5:
-            breadth = "positive"
-        elif ratio > 0.7:
-            breadth = "neutral"
-        else:
-            breadth = "weak"
-        
-        history.append({
-            "date": date.strftime("%Y-%m-%d"),
-            "highs_count": highs,
-            "lows_count": lows,
-            "ratio": ratio,
-            "market_breadth": breadth
-        })
-    
-    # 날짜 오름차순 정렬
-    history.reverse()
+    if not history:
+        # 첫 캐시 갱신 전이면 백그라운드 수집만 트리거
+        get_cached_data()
+        return {
+            "history": [],
+            "days": 0,
+            "note": "히스토리 수집 중입니다. 첫 데이터 갱신 후 다시 조회하세요."
+        }
     
     return {
         "history": history,
-        "days": len(history),
-        "note": "현재는 추정 데이터입니다. 실제 히스토리 추적을 위해서는 매일 데이터를 DB에 저장해야 합니다."
+        "days": len(history)
     }
 
 @router.get("/advance-decline")
@@ -588,40 +171,129 @@ async def get_advance_decline():
     이는 52주 신고가/신저가와는 다른 개념으로,
     당일 가격 변동을 기준으로 합니다.
     """
-    all_data = get_cached_data()
-    market_status = get_market_status()
-    
-    advancing = len([s for s in all_data if s.get("change_percent", 0) > 0])
-    declining = len([s for s in all_data if s.get("change_percent", 0) < 0])
-    unchanged = len([s for s in all_data if s.get("change_percent", 0) == 0])
-    
-    # A/D Ratio
-    ad_ratio = round(advancing / declining, 2) if declining > 0 else 0
-    
-    # 시장 상태 판단
-    if ad_ratio > 2:
-        market_sentiment = "매우 강세"
-    elif ad_ratio > 1.5:
-        market_sentiment = "강세"
-    elif ad_ratio > 1:
-        market_sentiment = "약한 강세"
-    elif ad_ratio > 0.67:
-        market_sentiment = "약한 약세"
-    elif ad_ratio > 0.5:
-        market_sentiment = "약세"
-    else:
-        market_sentiment = "매우 약세"
+    aggregates = get_cached_snapshot().aggregates
+    advancing = aggregates["advancing"]
+    declining = aggregates["declining"]
+    total = aggregates["total_stocks"]
     
     return {
         "advancing": advancing,
         "declining": declining,
-        "unchanged": unchanged,
-        "total_stocks": len(all_data),
-        "ad_ratio": ad_ratio,
-        "market_sentiment": market_sentiment,
+        "unchanged": aggregates["unchanged"],
+        "total_stocks": total,
+        "ad_ratio": aggregates["ad_ratio"],
+        "market_sentiment": aggregates["market_sentiment"],
         "timestamp": get_california_time().isoformat(),
-        "note": f"총 {len(all_data)}개 종목 중 상승 {advancing}개, 하락 {declining}개",
-        "market_status": market_status
+        "note": f"총 {total}개 종목 중 상승 {advancing}개, 하락 {declining}개",
+        "market_status": get_market_status()
+    }
+
+# 스트림 연결 유지용 주석 전송 간격 (초) - 이 주기로 스냅샷 만료 여부도 확인
+STREAM_HEARTBEAT_SECONDS = 15
+
+async def week52_event_stream(request: Request, client, min_interval: float):
+    """SSE 이벤트 생성기: 접속 시 전체 요약 또는 밀린 변경분, 이후 게시마다 변경분"""
+    def send(event: str, data: dict, event_id: int) -> str:
+        message = format_event(event, data, event_id)
+        week52_stream.record_sent(message)
+        return message
+    
+    try:
+        yield "retry: 5000\n\n"
+        
+        # 접속 직후: 재접속이면 보관된 변경분으로 따라잡고, 아니면 전체 요약
+        snapshot = week52_refresh.get()
+        if snapshot is not None and client.version != snapshot.version:
+            diff = week52_stream.catch_up(client.version, snapshot.version) \
+                if client.version is not None else None
+            if diff is not None:
+                client.sent_snapshot(diff.version)
+                yield send("diff", diff.to_event(), diff.version)
+            else:
+                client.sent_snapshot(snapshot.version)
+                yield send("snapshot", snapshot_event(snapshot.data, snapshot.version), snapshot.version)
+        
+        while True:
+            ready = await client.wait(STREAM_HEARTBEAT_SECONDS)
+            if await request.is_disconnected():
+                break
+            if not ready:
+                # 폴링 요청이 없어도 만료 시 백그라운드 갱신 / 다른 워커의 공유 스냅샷 반영
+                week52_refresh.get()
+                yield ": keepalive\n\n"
+                continue
+            
+            # 짧은 간격으로 연달아 게시된 변경분은 하나로 합쳐 보냄
+            if min_interval > 0:
+                await asyncio.sleep(min_interval)
+            reset, diff = client.take()
+            if reset:
+                snapshot = week52_refresh.snapshot
+                if snapshot is not None:
+                    client.sent_snapshot(snapshot.version)
+                    yield send("snapshot", snapshot_event(snapshot.data, snapshot.version), snapshot.version)
+            elif diff is not None and not diff.is_empty():
+                yield send("diff", diff.to_event(), diff.version)
+    finally:
+        week52_stream.disconnect(client)
+
+@router.get("/stream")
+async def stream_52week(
+    request: Request,
+    min_interval: float = Query(1.0, ge=0, le=60, description="변경분 최소 전송 간격 (초)"),
+    last_event_id: Optional[int] = Header(None, alias="Last-Event-ID"),
+):
+    """
+    52주 스냅샷 변경분 스트림 (Server-Sent Events)
+    
+    /highs, /lows, /stats, /advance-decline 를 주기적으로 폴링하는 대신
+    새 스냅샷이 게시될 때만 변경분을 받습니다.
+    
+    이벤트:
+    - snapshot: 접속 직후 전체 요약 (신고가/신저가 종목, 집계값)
+    - diff: 직전 버전 대비 변경분
+        - highs / lows: entered (새로 들어온 종목 데이터), left (빠진 종목 심볼)
+        - counts: 값이 바뀐 집계 항목만
+    
+    이벤트 id는 스냅샷 버전입니다. 재접속 시 브라우저가 보내는 Last-Event-ID로
+    보관 중인 최근 변경분을 합쳐 보내고, 너무 오래됐으면 snapshot 이벤트를 다시 보냅니다.
+    느린 클라이언트에게 밀린 변경분은 하나로 합쳐집니다.
+    """
+    client = week52_stream.connect(asyncio.get_running_loop(), last_event_id)
+    if client is None:
+        raise HTTPException(status_code=503, detail="스트림 연결 수 한도를 초과했습니다")
+    return StreamingResponse(
+        week52_event_stream(request, client, min_interval),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+@router.get("/stream/status")
+async def get_stream_status():
+    """변경분 스트림 구독 상태 (연결 수, 보관 중인 변경분, 전송량)"""
+    return {
+        **week52_stream.status(),
+        "version": week52_refresh.snapshot.version if week52_refresh.snapshot else None,
+    }
+
+@router.get("/universe")
+async def get_universe(changes: int = Query(10, ge=0, le=100)):
+    """
+    스캔 대상 유니버스 정보
+    
+    - version, effective_date: 현재 구성종목 버전과 적용일
+    - indexes: 지수별 구성종목 수
+    - changes: 최근 구성종목 변경 이력 (추가/제외 종목)
+    """
+    universe = universe_registry.current()
+    return {
+        "version": universe.version,
+        "effective_date": universe.effective_date,
+        "source": universe.source,
+        "checked_at": universe.checked_at,
+        "total_stocks": len(universe.tickers),
+        "indexes": {name: len(members) for name, members in universe.indexes.items()},
+        "changes": universe_registry.changes(changes)
     }
 
 @router.get("/market-status")
@@ -629,16 +301,17 @@ async def get_market_status_endpoint():
     """
     미국 주식 시장 개장 여부 확인
     
-    캘리포니아 시간대 기준으로:
+    NYSE 캘린더 기준으로:
     - 주말 여부 체크
-    - 공휴일 여부 체크
-    - 시장 시간(06:30-13:00 PST) 체크
+    - 공휴일 여부 체크 (연도별 규칙으로 계산)
+    - 정규장 시간(09:30-16:00 ET, 조기 마감일 13:00) 체크
     - 직전 거래일 계산
     
     Returns:
     - is_open: 시장 개장 여부
     - date: 현재 날짜 (또는 직전 거래일)
     - message: 상태 메시지
+    - next_open / next_close: 다음 개장 또는 마감 시각
     - california_time: 캘리포니아 현재 시간
     """
     return get_market_status()
@@ -649,14 +322,28 @@ async def refresh_cache():
     캐시 강제 새로고침
     
     백그라운드에서 S&P 500 + NASDAQ 100 + 추가 종목 데이터를 다시 수집합니다.
-    수집 시간: 약 30초 ~ 1분 (네트워크 상태에 따라 다름)
+    이미 갱신 중이면 새로 시작하지 않습니다 (진행 상황: GET /api/52week/refresh/status).
     """
-    from threading import Thread
-    Thread(target=update_cache, daemon=True).start()
+    started = week52_refresh.refresh_async(force=True)
     return {
-        "message": "캐시 업데이트 시작",
+        "message": "캐시 업데이트 시작" if started else "이미 업데이트 중입니다",
         "status": "updating",
-        "estimated_time": "30-60초",
-        "target_stocks": "S&P 500 + NASDAQ 100 + 추가 주요 종목"
+        "started": started,
+        "target_stocks": "S&P 500 + NASDAQ 100 + 추가 주요 종목",
+        "refresh": week52_refresh.status()
     }
 
+@router.get("/refresh/status")
+async def get_refresh_status():
+    """
+    캐시 갱신 상태
+    
+    - state: idle / refreshing
+    - stage, progress: 진행 중인 단계와 진행률
+    - last_update, last_duration_seconds: 마지막 스냅샷 생성 시각과 소요 시간
+    - schedule: 갱신 계층별 종목 수와 현재 갱신 대상 수
+    """
+    return {
+        **week52_refresh.status(),
+        "schedule": refresh_scheduler.status(universe_registry.tickers())
+    }
@@ -3,9 +3,10 @@
 여러 DB 엔진을 관리합니다.
 """
 
-from sqlalchemy import create_engine, text
-from sqlalchemy.orm import sessionmaker, Session
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.orm import sessionmaker
 from contextlib import contextmanager
+from typing import Optional
 import os
 from pathlib import Path
 
@@ -18,6 +19,18 @@ VIBE_DIR = Path(__file__).parent.parent.parent.parent
 REPORTS_DB_PATH = VIBE_DIR / "report" / "reports.db"
 NEWS_DB_PATH = VIBE_DIR / "QuickNews" / "news.db"
 
+# SimplyStock 로컬 데이터 디렉토리 (가격 스토어 등 파일 기반 저장소)
+DATA_DIR = Path(os.getenv("SIMPLYSTOCK_DATA_DIR", str(Path(__file__).parent.parent / "data")))
+
+# 리포트 DB 사이드카 (외부 리포트 DB에서 파생한 요약 테이블 - SimplyStock 소유)
+REPORTS_SIDECAR_PATH = DATA_DIR / "reports_sidecar.db"
+
+# 뉴스 DB 사이드카 (외부 뉴스 DB의 정렬/필터 인덱스 - SimplyStock 소유)
+NEWS_SIDECAR_PATH = DATA_DIR / "news_sidecar.db"
+
+# 사이드카를 원본 DB 연결에 붙일 스키마 이름 (쿼리에서 sidecar.테이블로 참조)
+SIDECAR_SCHEMA = "sidecar"
+
 # PostgreSQL (SimplyStock 자체 DB - 선택적)
 SIMPLYSTOCK_DATABASE_URL = os.getenv(
     "DATABASE_URL", 
@@ -37,6 +50,38 @@ engine_news = create_engine(
     echo=False
 )
 
+engine_reports_sidecar = create_engine(
+    f"sqlite:///{REPORTS_SIDECAR_PATH}",
+    connect_args={"check_same_thread": False},
+    echo=False
+)
+
+
+def attach_sidecar(engine, path: Path):
+    """
+    원본 DB 연결마다 사이드카 DB를 SIDECAR_SCHEMA로 ATTACH
+
+    외부 DB에는 인덱스를 만들 수 없으므로 인덱스/파생 컬럼은 사이드카에 두고,
+    같은 연결에서 사이드카 인덱스로 범위를 좁힌 뒤 원본 행을 기본키로 조인합니다.
+    ATTACH에 실패해도 원본 연결은 그대로 씁니다 (사이드카 갱신이 실패해 원본 쿼리로 대체됨).
+    """
+    @event.listens_for(engine, "connect")
+    def _attach(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            cursor.execute(f"ATTACH DATABASE ? AS {SIDECAR_SCHEMA}", (str(path),))
+            # 사이드카 갱신(쓰기)과 조회가 겹치면 잠금을 잠시 기다림
+            cursor.execute("PRAGMA busy_timeout = 5000")
+        except Exception as e:
+            print(f"⚠️ 사이드카 ATTACH 실패 ({path}): {e}")
+        finally:
+            cursor.close()
+
+
+attach_sidecar(engine_reports, REPORTS_SIDECAR_PATH)
+attach_sidecar(engine_news, NEWS_SIDECAR_PATH)
+
 engine_main = create_engine(
     SIMPLYSTOCK_DATABASE_URL,
     connect_args={"check_same_thread": False} if "sqlite" in SIMPLYSTOCK_DATABASE_URL else {},
@@ -46,9 +91,21 @@ engine_main = create_engine(
 # 세션 팩토리
 SessionReports = sessionmaker(autocommit=False, autoflush=False, bind=engine_reports)
 SessionNews = sessionmaker(autocommit=False, autoflush=False, bind=engine_news)
+SessionReportsSidecar = sessionmaker(autocommit=False, autoflush=False, bind=engine_reports_sidecar)
 SessionMain = sessionmaker(autocommit=False, autoflush=False, bind=engine_main)
 
 
+def sqlite_mtime(path: Path) -> Optional[int]:
+    """SQLite 파일과 WAL 파일 중 가장 최근 수정 시각 (ns, 외부 DB 변경 감지용 - 없으면 None)"""
+    mtimes = []
+    for candidate in (Path(path), Path(f"{path}-wal")):
+        try:
+            mtimes.append(os.stat(candidate).st_mtime_ns)
+        except FileNotFoundError:
+            continue
+    return max(mtimes) if mtimes else None
+
+
 # Context Managers
 @contextmanager
 def get_reports_db():
@@ -70,6 +127,17 @@ def get_news_db():
         session.close()
 
 
+@contextmanager
+def get_reports_sidecar_db():
+    """리포트 사이드카 DB 세션"""
+    REPORTS_SIDECAR_PATH.parent.mkdir(parents=True, exist_ok=True)
+    session = SessionReportsSidecar()
+    try:
+        yield session
+    finally:
+        session.close()
+
+
 @contextmanager
 def get_main_db():
     """SimplyStock 메인 DB 세션"""
@@ -80,6 +148,13 @@ def get_main_db():
         session.close()
 
 
+def init_main_db(*models):
+    """메인 DB에 모델 테이블 생성 (이미 있으면 건너뜀)"""
+    from app.models import Base
+    tables = [model.__table__ for model in models] or None
+    Base.metadata.create_all(engine_main, tables=tables)
+
+
 # Dependency Injection (FastAPI용)
 def get_reports_db_dependency():
     """FastAPI Dependency: 리포트 DB"""
@@ -8,6 +8,7 @@ load_dotenv()
 
 # Import routers
 from app.api import market, sectors, week52, macro, news, portfolio, reports, stocks
+from app.utils.upstream import upstream_status
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
@@ -57,3 +58,7 @@ async def root():
 async def health_check():
     return {"status": "healthy"}
 
+@app.get("/health/upstream")
+async def upstream_health():
+    """업스트림(yfinance, FRED) 서킷 브레이커 상태 및 호출 카운터"""
+    return upstream_status()
@@ -7,6 +7,7 @@ from app.models.news import News, NewsTag
 from app.models.stock import Stock, StockPrice
 from app.models.sector import Sector, SectorPerformance
 from app.models.macro import MacroIndicator
+from app.models.breadth import MarketBreadth
 from app.models.tag import Tag
 from app.models.user import User, UserPortfolio, PortfolioHolding
 
@@ -19,6 +20,7 @@ __all__ = [
     "Sector",
     "SectorPerformance",
     "MacroIndicator",
+    "MarketBreadth",
     "Tag",
     "User",
     "UserPortfolio",
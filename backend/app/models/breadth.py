@@ -0,0 +1,29 @@
+"""
+시장 브레드스 히스토리 모델
+"""
+
+from sqlalchemy import Column, String, Float, Integer
+from app.models.base import BaseModel
+
+
+class MarketBreadth(BaseModel):
+    """일별 52주 신고가/신저가 및 등락 종목 수"""
+    
+    __tablename__ = "market_breadth"
+    
+    date = Column(String(20), unique=True, nullable=False, index=True)  # YYYY-MM-DD
+    
+    # 52주 신고가/신저가
+    highs_count = Column(Integer, nullable=False)
+    lows_count = Column(Integer, nullable=False)
+    ratio = Column(Float, nullable=False)
+    market_breadth = Column(String(20), nullable=False)  # strong, positive, neutral, weak
+    
+    # 등락 종목 수
+    advancing = Column(Integer, nullable=False)
+    declining = Column(Integer, nullable=False)
+    unchanged = Column(Integer, nullable=False)
+    total_stocks = Column(Integer, nullable=False)
+    
+    def __repr__(self):
+        return f"<MarketBreadth {self.date}: highs={self.highs_count}, lows={self.lows_count}>"
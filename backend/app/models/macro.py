@@ -40,7 +40,7 @@ class MacroIndicator(BaseModel):
     
     # 메타 정보
     source = Column(String(100))  # FRED, Yahoo Finance 등
-    metadata = Column(String(500))  # JSON 형태의 추가 정보
+    meta = Column("metadata", String(500))  # JSON 형태의 추가 정보 (metadata는 SQLAlchemy 예약어)
     
     # 복합 인덱스
     __table_args__ = (
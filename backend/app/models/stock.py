@@ -2,7 +2,7 @@
 주식 모델
 """
 
-from sqlalchemy import Column, String, Float, ForeignKey, Index, Boolean
+from sqlalchemy import Column, String, Float, Integer, ForeignKey, Index, Boolean
 from sqlalchemy.orm import relationship
 from app.models.base import BaseModel
 
@@ -2,7 +2,7 @@
 태그 모델
 """
 
-from sqlalchemy import Column, String, Index, Enum as SQLEnum
+from sqlalchemy import Column, String, Integer, Index, Enum as SQLEnum
 from sqlalchemy.orm import relationship
 from app.models.base import BaseModel
 import enum
@@ -0,0 +1,191 @@
+"""
+52주 브레드스 히스토리
+저장된 가격 행렬 전체에 대해 일별 신고가/신저가/등락 종목 수를
+한 번에 계산하고, 거래일마다 한 행씩 market_breadth 테이블에 쌓습니다.
+"""
+
+from bisect import bisect_left
+from datetime import datetime, timedelta
+from typing import List, Optional
+import threading
+
+import numpy as np
+
+from app.database import engine_main, get_main_db, init_main_db
+from app.services.price_source import PriceMatrix
+from app.services.week52_engine import WEEK52_WINDOW, Week52Result, forward_fill
+
+# 히스토리 최대 조회 기간 (일)
+BREADTH_HISTORY_MAX_DAYS = 365
+
+BREADTH_COLUMNS = (
+    "highs_count", "lows_count", "ratio", "market_breadth",
+    "advancing", "declining", "unchanged", "total_stocks",
+)
+
+
+def classify_breadth(ratio: float) -> str:
+    """신고가/신저가 비율로 시장 강도 판단"""
+    if ratio > 2.5:
+        return "strong"
+    elif ratio > 1.5:
+        return "positive"
+    elif ratio > 0.7:
+        return "neutral"
+    else:
+        return "weak"
+
+
+def compute_daily_breadth(
+    matrix: PriceMatrix,
+    result: Week52Result,
+    window: int = WEEK52_WINDOW,
+) -> List[dict]:
+    """
+    거래일별 브레드스를 한 번에 계산
+
+    52주 윈도우가 다 찬 거래일(window번째 거래일 이후)만 반환합니다.
+    마지막 거래일(장중 행)은 티어별 갱신으로 오늘 봉이 아직 없는 종목이 있으므로
+    종목별 마지막 봉 기준 지표(result)로 전체 유니버스에 대해 집계합니다.
+    """
+    if matrix.close.size == 0:
+        return []
+
+    traded = ~np.isnan(matrix.close)
+    close = forward_fill(matrix.close)
+    diff = np.diff(close, axis=1, prepend=np.nan)
+
+    highs = (result.near_high_daily & traded).sum(axis=0)
+    lows = (result.near_low_daily & traded).sum(axis=0)
+    advancing = ((diff > 0) & traded).sum(axis=0)
+    declining = ((diff < 0) & traded).sum(axis=0)
+    unchanged = ((diff == 0) & traded).sum(axis=0)
+    totals = traded.sum(axis=0)
+
+    # 마지막 거래일: 오늘 봉을 받은 종목만이 아니라 전체 종목의 마지막 봉으로 집계
+    listed = ~np.isnan(result.price)
+    highs[-1] = (result.near_high & listed).sum()
+    lows[-1] = (result.near_low & listed).sum()
+    advancing[-1] = ((result.change > 0) & listed).sum()
+    declining[-1] = ((result.change < 0) & listed).sum()
+    unchanged[-1] = ((result.change == 0) & listed).sum()
+    totals[-1] = listed.sum()
+
+    dates = matrix.dates.strftime("%Y-%m-%d")
+    rows = []
+    for i in range(min(window - 1, len(dates) - 1), len(dates)):
+        if totals[i] == 0:
+            continue
+        ratio = round(highs[i] / lows[i], 2) if lows[i] > 0 else 0
+        rows.append({
+            "date": dates[i],
+            "highs_count": int(highs[i]),
+            "lows_count": int(lows[i]),
+            "ratio": float(ratio),
+            "market_breadth": classify_breadth(ratio),
+            "advancing": int(advancing[i]),
+            "declining": int(declining[i]),
+            "unchanged": int(unchanged[i]),
+            "total_stocks": int(totals[i]),
+        })
+    return rows
+
+
+class BreadthHistory:
+    """market_breadth 테이블 + 날짜순 인메모리 사본"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._rows: List[dict] = []
+        self._dates: List[str] = []
+        self._loaded = False
+
+    def _load(self):
+        from sqlalchemy import select
+        from app.models.breadth import MarketBreadth
+
+        init_main_db(MarketBreadth)
+        with get_main_db() as session:
+            records = session.execute(
+                select(MarketBreadth).order_by(MarketBreadth.date)
+            ).scalars().all()
+            self._rows = [
+                {"date": r.date, **{column: getattr(r, column) for column in BREADTH_COLUMNS}}
+                for r in records
+            ]
+        self._dates = [row["date"] for row in self._rows]
+        self._loaded = True
+
+    def _ensure_loaded(self):
+        if not self._loaded:
+            try:
+                self._load()
+            except Exception as e:
+                print(f"⚠️ 브레드스 히스토리 로드 실패: {e}")
+                self._loaded = True
+
+    def invalidate(self):
+        """다음 조회 때 테이블에서 다시 읽기 (다른 워커가 저장한 행 반영)"""
+        with self._lock:
+            self._loaded = False
+
+    def last_date(self) -> Optional[str]:
+        with self._lock:
+            self._ensure_loaded()
+            return self._dates[-1] if self._dates else None
+
+    def record(self, rows: List[dict]) -> int:
+        """
+        계산된 일별 브레드스 저장
+
+        마지막 저장일과 그 이후 거래일만 upsert 합니다
+        (테이블이 비어있으면 전체 백필, 마지막 저장일은 장중 값 덮어쓰기).
+        """
+        from app.models.breadth import MarketBreadth
+
+        if engine_main.dialect.name == "postgresql":
+            from sqlalchemy.dialects.postgresql import insert
+        else:
+            from sqlalchemy.dialects.sqlite import insert
+
+        with self._lock:
+            self._ensure_loaded()
+            last = self._dates[-1] if self._dates else None
+            pending = [row for row in rows if last is None or row["date"] >= last]
+            if not pending:
+                return 0
+
+            try:
+                with get_main_db() as session:
+                    stmt = insert(MarketBreadth)
+                    stmt = stmt.on_conflict_do_update(
+                        index_elements=["date"],
+                        set_={
+                            column: getattr(stmt.excluded, column)
+                            for column in BREADTH_COLUMNS + ("updated_at",)
+                        }
+                    )
+                    session.execute(stmt, pending)
+                    session.commit()
+            except Exception as e:
+                print(f"⚠️ 브레드스 히스토리 저장 실패: {e}")
+
+            # 인메모리 사본 갱신 (날짜 오름차순 유지)
+            if last is not None and pending[0]["date"] == last:
+                self._rows.pop()
+                self._dates.pop()
+            self._rows.extend(pending)
+            self._dates.extend(row["date"] for row in pending)
+            return len(pending)
+
+    def get_history(self, days: int = 30) -> List[dict]:
+        """최근 N일 히스토리 (날짜 오름차순)"""
+        days = min(days, BREADTH_HISTORY_MAX_DAYS)
+        cutoff = (datetime.now() - timedelta(days=days)).strftime("%Y-%m-%d")
+        with self._lock:
+            self._ensure_loaded()
+            return self._rows[bisect_left(self._dates, cutoff):]
+
+
+# 프로세스 공용 히스토리
+breadth_history = BreadthHistory()
@@ -5,6 +5,16 @@
 from typing import List, Dict, Optional
 from sqlalchemy import text
 from app.database import get_news_db, get_reports_db
+from app.services.sidecar_index import (
+    NEWS_COUNT_BY_SOURCE_QUERY,
+    REPORT_STOCKS_QUERY,
+    TOP_RECOMMENDATIONS_QUERY,
+    news_index,
+    news_list_query,
+    report_analysis_query,
+    report_list_query,
+    reports_index,
+)
 from pathlib import Path
 import os
 
@@ -64,12 +74,10 @@ class ExternalDataService:
         with get_news_db() as session:
             if source:
                 # 특정 소스만 가져오기
-                query = "SELECT id, title, link, source, sent_at FROM news WHERE source = :source ORDER BY sent_at DESC LIMIT :limit OFFSET :offset"
-                result = session.execute(text(query), {"source": source, "limit": limit, "offset": offset})
+                result = session.execute(text(news_index.render(news_list_query(True))), {"source": source, "limit": limit, "offset": offset})
             else:
                 # 모든 소스의 뉴스를 시간순으로 가져오기
-                query = "SELECT id, title, link, source, sent_at FROM news ORDER BY sent_at DESC LIMIT :limit OFFSET :offset"
-                result = session.execute(text(query), {"limit": limit, "offset": offset})
+                result = session.execute(text(news_index.render(news_list_query(False))), {"limit": limit, "offset": offset})
             
             news = []
             for row in result:
@@ -92,8 +100,7 @@ class ExternalDataService:
         """QuickNews DB의 총 뉴스 개수"""
         with get_news_db() as session:
             if source:
-                query = text("SELECT COUNT(*) as count FROM news WHERE source = :source")
-                result = session.execute(query, {"source": source})
+                result = session.execute(text(news_index.render(NEWS_COUNT_BY_SOURCE_QUERY)), {"source": source})
             else:
                 query = text("SELECT COUNT(*) as count FROM news")
                 result = session.execute(query)
@@ -104,31 +111,21 @@ class ExternalDataService:
     @staticmethod
     def get_reports(limit: int = 25, offset: int = 0, category: Optional[str] = None) -> List[Dict]:
         """Reports DB에서 리포트 조회 (페이지네이션 지원)"""
+        # 목록과 종목 조회가 같은 테이블(사이드카/원본)을 보도록 한 번만 결정
+        indexed = reports_index.ready()
         with get_reports_db() as session:
             # 리포트 기본 정보 조회 (file_path도 포함)
-            query = "SELECT id, date, category, title, file_path, pdf_url, sent FROM sent_reports"
-            
             if category:
-                query += " WHERE category = :category"
-                query += " ORDER BY date DESC LIMIT :limit OFFSET :offset"
-                result = session.execute(text(query), {"category": category, "limit": limit, "offset": offset})
+                result = session.execute(text(reports_index.render(report_list_query(True), indexed)), {"category": category, "limit": limit, "offset": offset})
             else:
-                query += " ORDER BY date DESC LIMIT :limit OFFSET :offset"
-                result = session.execute(text(query), {"limit": limit, "offset": offset})
+                result = session.execute(text(reports_index.render(report_list_query(False), indexed)), {"limit": limit, "offset": offset})
             
             reports = []
             for row in result:
                 report_id = row[0]
                 
                 # 해당 리포트의 종목 분석 정보 조회 (최대 3개)
-                analysis_query = """
-                SELECT stock_name, recommendation, target_price, current_price, 
-                       adjustment_type, profit_impact
-                FROM report_analysis
-                WHERE report_id = :report_id AND stock_name IS NOT NULL
-                LIMIT 3
-                """
-                analysis_result = session.execute(text(analysis_query), {"report_id": report_id})
+                analysis_result = session.execute(text(reports_index.render(REPORT_STOCKS_QUERY, indexed)), {"report_id": report_id})
                 
                 stocks = []
                 for analysis_row in analysis_result:
@@ -178,31 +175,16 @@ class ExternalDataService:
                            limit: int = 50) -> List[Dict]:
         """리포트 분석 데이터 조회 (종목, 목표가 등)"""
         with get_reports_db() as session:
-            query = """
-                SELECT 
-                    ra.id, ra.report_id, ra.stock_code, ra.stock_name,
-                    ra.current_price, ra.target_price, ra.price_change,
-                    ra.recommendation, ra.adjustment_type, ra.profit_impact,
-                    ra.analysis_date,
-                    sr.title, sr.category, sr.pdf_url
-                FROM report_analysis ra
-                LEFT JOIN sent_reports sr ON ra.report_id = sr.id
-                WHERE 1=1
-            """
-            params = {}
+            params = {"limit": limit}
             
             if report_id:
-                query += " AND ra.report_id = :report_id"
                 params["report_id"] = report_id
             
             if stock_code:
-                query += " AND ra.stock_code = :stock_code"
                 params["stock_code"] = stock_code
             
-            query += " ORDER BY ra.analysis_date DESC LIMIT :limit"
-            params["limit"] = limit
-            
-            result = session.execute(text(query), params)
+            query = report_analysis_query(by_report=bool(report_id), by_stock=bool(stock_code))
+            result = session.execute(text(reports_index.render(query)), params)
             
             analyses = []
             for row in result:
@@ -227,26 +209,9 @@ class ExternalDataService:
     
     @staticmethod
     def get_top_recommendations(limit: int = 10) -> List[Dict]:
-        """상위 추천 종목 (목표가 상승 여력 기준)"""
+        """상위 추천 종목 (목표가 상승 여력 기준 - 사이드카의 미리 계산한 상승여력 인덱스)"""
         with get_reports_db() as session:
-            query = """
-                SELECT 
-                    ra.stock_code, ra.stock_name,
-                    ra.current_price, ra.target_price,
-                    ((ra.target_price - ra.current_price) * 100.0 / ra.current_price) AS upside_percent,
-                    ra.recommendation, ra.analysis_date,
-                    sr.title AS report_title, sr.pdf_url
-                FROM report_analysis ra
-                JOIN sent_reports sr ON ra.report_id = sr.id
-                WHERE ra.recommendation = 'BUY' 
-                  AND ra.target_price IS NOT NULL 
-                  AND ra.current_price IS NOT NULL
-                  AND ra.current_price > 0
-                ORDER BY upside_percent DESC
-                LIMIT :limit
-            """
-            
-            result = session.execute(text(query), {"limit": limit})
+            result = session.execute(text(reports_index.render(TOP_RECOMMENDATIONS_QUERY)), {"limit": limit})
             
             recommendations = []
             for row in result:
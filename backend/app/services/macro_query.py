@@ -0,0 +1,235 @@
+"""
+매크로 시계열 정렬 / 파생 시계열 조회 엔진
+매크로 스토어에 저장된 시리즈(일별/월별 혼재)를 하나의 달력(일/주/월)에 맞춰
+forward-fill 로 정렬하고, 스프레드·실질금리·전년 대비 증가율 같은 파생 시계열을
+요청 시 계산합니다. 업스트림은 호출하지 않습니다.
+
+결과는 (시리즈 조합, 주기, 기간, 스토어 버전) 키로 캐시되므로
+같은 오버레이를 다시 요청하면 계산 없이 반환하고, 새 관측값이 저장되면 자동으로 무효화됩니다.
+"""
+
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Callable, Dict, Optional, Sequence, Tuple
+import threading
+
+import pandas as pd
+
+from app.services.macro_store import MACRO_SERIES, MacroStore, macro_store
+
+# 월말 주기 별칭: pandas 2.2부터 "M"은 deprecated이고 "ME"를 씀 (이전 버전은 "ME"를 모름)
+PANDAS_VERSION = tuple(int(part) for part in pd.__version__.split(".")[:2])
+MONTH_END = "ME" if PANDAS_VERSION >= (2, 2) else "M"
+
+# 정렬 주기 -> pandas 달력 주기 (일: 영업일, 주: 금요일, 월: 월말)
+ALIGN_FREQUENCIES = {
+    "D": "B",
+    "W": "W-FRI",
+    "M": MONTH_END,
+}
+
+# 조회 결과 캐시 최대 항목 수
+MACRO_QUERY_CACHE_SIZE = 64
+
+
+def year_over_year(series: pd.Series) -> pd.Series:
+    """전년 같은 날짜 대비 증가율 (%) - 월별 시리즈는 12개월 전 관측값 기준"""
+    previous = series.shift(freq=pd.DateOffset(years=1)).reindex(series.index)
+    return ((series / previous - 1) * 100).dropna()
+
+
+@dataclass(frozen=True)
+class DerivedSeries:
+    """
+    파생 시계열 정의
+
+    native=True면 입력 시리즈의 원래 관측 주기에서 계산 (전년 대비 등),
+    아니면 달력에 정렬된 입력 열로 계산 (스프레드 등)
+    """
+    name: str
+    description: str
+    unit: str
+    inputs: Tuple[str, ...]
+    compute: Callable[..., pd.Series]
+    native: bool = False
+
+
+DERIVED_SERIES: Dict[str, DerivedSeries] = {
+    derived.name: derived for derived in (
+        DerivedSeries(
+            "M2_YOY", "M2 통화량 전년 대비 증가율", "Percent",
+            ("M2SL",), year_over_year, native=True,
+        ),
+        DerivedSeries(
+            "CPI_YOY", "소비자물가 전년 대비 상승률", "Percent",
+            ("CPIAUCSL",), year_over_year, native=True,
+        ),
+        DerivedSeries(
+            "T10Y2Y", "10년-2년 국채 금리 스프레드", "Percent",
+            ("DGS10", "DGS2"), lambda dgs10, dgs2: dgs10 - dgs2,
+        ),
+        DerivedSeries(
+            "REAL_FEDFUNDS", "실질 기준금리 (기준금리 - CPI 상승률)", "Percent",
+            ("FEDFUNDS", "CPI_YOY"), lambda rate, cpi: rate - cpi,
+        ),
+        DerivedSeries(
+            "REAL_10Y", "실질 10년물 금리 (10년물 - CPI 상승률)", "Percent",
+            ("DGS10", "CPI_YOY"), lambda rate, cpi: rate - cpi,
+        ),
+    )
+}
+
+
+class UnknownSeries(KeyError):
+    """저장 시리즈도 파생 시리즈도 아닌 이름"""
+
+
+def available_series() -> Dict[str, dict]:
+    """조회 가능한 시리즈 목록 (저장 + 파생)"""
+    catalog = {
+        name: {"kind": "stored", "source": series.source, "unit": series.unit}
+        for name, series in MACRO_SERIES.items()
+    }
+    for name, derived in DERIVED_SERIES.items():
+        catalog[name] = {
+            "kind": "derived",
+            "description": derived.description,
+            "unit": derived.unit,
+            "inputs": list(derived.inputs),
+        }
+    return catalog
+
+
+class MacroQueryEngine:
+    """저장된 매크로 시계열의 정렬 / 파생 계산 + 결과 캐시"""
+
+    def __init__(self, store: MacroStore = macro_store, cache_size: int = MACRO_QUERY_CACHE_SIZE):
+        self.store = store
+        self.cache_size = cache_size
+        self._lock = threading.Lock()
+        self._cache: "OrderedDict[tuple, pd.DataFrame]" = OrderedDict()
+        self._native: Dict[Tuple[str, int], pd.Series] = {}
+        self._hits = 0
+        self._misses = 0
+
+    # ===== 원래 관측 주기 시리즈 =====
+
+    def _native_series(self, name: str, version: int) -> pd.Series:
+        """저장 시리즈 또는 native 파생 시리즈 (원래 관측 주기, 스토어 버전별 캐시)"""
+        key = (name, version)
+        with self._lock:
+            cached = self._native.get(key)
+        if cached is not None:
+            return cached
+
+        if name in self.store.series_defs:
+            series = self.store.series(name)
+        elif name in DERIVED_SERIES and DERIVED_SERIES[name].native:
+            derived = DERIVED_SERIES[name]
+            series = derived.compute(*(self._native_series(i, version) for i in derived.inputs))
+        else:
+            raise UnknownSeries(name)
+        series = series.rename(name)
+
+        with self._lock:
+            # 이전 버전 항목은 버림
+            self._native = {k: v for k, v in self._native.items() if k[1] == version}
+            self._native[key] = series
+        return series
+
+    # ===== 정렬 =====
+
+    @staticmethod
+    def calendar(freq: str, start: pd.Timestamp, end: pd.Timestamp) -> pd.DatetimeIndex:
+        """정렬 달력 (주/월 주기는 end가 속한 구간의 끝까지 포함)"""
+        offset = pd.tseries.frequencies.to_offset(ALIGN_FREQUENCIES[freq])
+        return pd.date_range(start, offset.rollforward(end), freq=offset)
+
+    def _aligned(self, name: str, calendar: pd.DatetimeIndex, version: int, columns: Dict[str, pd.Series]) -> pd.Series:
+        """달력에 맞춘 시리즈 (각 날짜 기준 마지막 관측값 forward-fill)"""
+        if name in columns:
+            return columns[name]
+        derived = DERIVED_SERIES.get(name)
+        if derived is not None and not derived.native:
+            inputs = [self._aligned(i, calendar, version, columns) for i in derived.inputs]
+            aligned = derived.compute(*inputs).rename(name)
+        else:
+            native = self._native_series(name, version)
+            if native.empty:
+                aligned = pd.Series(float("nan"), index=calendar, name=name)
+            else:
+                aligned = native.reindex(calendar, method="ffill")
+        columns[name] = aligned
+        return aligned
+
+    def frame(
+        self,
+        names: Sequence[str],
+        freq: str = "D",
+        start: Optional[str] = None,
+        end: Optional[str] = None,
+    ) -> pd.DataFrame:
+        """
+        여러 시리즈를 하나의 달력에 정렬한 DataFrame (열 = names 순서)
+
+        Args:
+            names: 저장 시리즈(M2SL, DGS10 ...) 또는 파생 시리즈(T10Y2Y, M2_YOY ...)
+            freq: D(영업일) / W(주) / M(월)
+            start, end: YYYY-MM-DD (기본: 1년 전 ~ 오늘)
+        """
+        if freq not in ALIGN_FREQUENCIES:
+            raise ValueError(f"지원하지 않는 주기: {freq} (D, W, M)")
+        for name in names:
+            if name not in self.store.series_defs and name not in DERIVED_SERIES:
+                raise UnknownSeries(name)
+
+        end_ts = pd.Timestamp(end).normalize() if end else pd.Timestamp.today().normalize()
+        start_ts = pd.Timestamp(start).normalize() if start else end_ts - pd.DateOffset(years=1)
+        version = self.store.data_version()
+        key = (tuple(names), freq, start_ts, end_ts, version)
+
+        with self._lock:
+            cached = self._cache.get(key)
+            if cached is not None:
+                self._cache.move_to_end(key)
+                self._hits += 1
+                return cached
+            self._misses += 1
+
+        calendar = self.calendar(freq, start_ts, end_ts)
+        columns: Dict[str, pd.Series] = {}
+        frame = pd.DataFrame({name: self._aligned(name, calendar, version, columns) for name in names})
+        if freq == "D":
+            # 주말에 끝나면 다음 영업일이 달력에 들어가므로 제외
+            frame = frame[frame.index <= end_ts]
+        # 어느 시리즈에도 값이 없는 날짜는 제외
+        frame = frame.dropna(how="all")
+
+        with self._lock:
+            self._cache[key] = frame
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return frame
+
+    def records(self, frame: pd.DataFrame, date_format: str = "%Y-%m-%d", decimals: int = 2) -> list:
+        """DataFrame -> [{"date": ..., 시리즈: 값 또는 None}]"""
+        rounded = frame.round(decimals).astype(object).where(frame.notna(), None)
+        dates = frame.index.strftime(date_format)
+        return [
+            {"date": date, **dict(zip(rounded.columns, row))}
+            for date, row in zip(dates, rounded.itertuples(index=False, name=None))
+        ]
+
+    def status(self) -> dict:
+        with self._lock:
+            return {
+                "cached_queries": len(self._cache),
+                "cache_size": self.cache_size,
+                "hits": self._hits,
+                "misses": self._misses,
+            }
+
+
+# 프로세스 공용 엔진
+macro_query = MacroQueryEngine()
@@ -0,0 +1,325 @@
+"""
+매크로 시계열 스토어
+FRED(M2, 기준금리, 국채 수익률)와 yfinance(VIX, 환율, DXY) 일별/월별 관측값을
+macro_indicators 테이블에 (name, date) 키로 쌓고, 시리즈별 인메모리 사본으로 읽습니다.
+
+- 동기화는 시리즈별 마지막 저장 관측일부터만 받습니다 (처음이면 백필)
+- /overview 와 /history/* 는 인메모리 사본만 읽고 업스트림을 호출하지 않습니다
+- 시리즈별 동기화는 동시에 실행하고, 소스별 제한 시간을 넘기면 기다리지 않습니다
+- 다른 워커가 동기화한 행은 주기적으로 테이블을 다시 읽어 반영합니다
+"""
+
+from bisect import bisect_left
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from concurrent.futures import TimeoutError as FutureTimeout
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+import os
+import threading
+import time
+
+import pandas as pd
+import yfinance as yf
+from fredapi import Fred
+
+from app.database import engine_main, get_main_db, init_main_db
+from app.models.macro import IndicatorTypeEnum
+from app.utils.upstream import UPSTREAM_EXECUTOR, fred_upstream, yfinance_upstream
+
+# FRED API 초기화
+FRED_API_KEY = os.getenv("FRED_API_KEY")
+fred = Fred(api_key=FRED_API_KEY) if FRED_API_KEY else None
+
+# 인메모리 사본을 테이블에서 다시 읽는 주기 (다른 워커의 동기화 반영)
+MACRO_STORE_RELOAD_INTERVAL = timedelta(minutes=10)
+
+# 동기화 시 소스별 제한 시간 (초) - 넘기면 그 시리즈는 이번 주기에 기다리지 않음
+MACRO_SYNC_TIMEOUTS = {
+    "FRED": 15.0,
+    "Yahoo Finance": 10.0,
+}
+
+
+@dataclass(frozen=True)
+class MacroSeries:
+    """저장 대상 시계열 정의"""
+    name: str  # FRED 시리즈 ID 또는 yfinance 심볼 (테이블 name 컬럼)
+    type: IndicatorTypeEnum
+    source: str  # FRED, Yahoo Finance
+    unit: str
+    backfill_days: int  # 처음 동기화할 때 받을 기간
+
+
+MACRO_SERIES: Dict[str, MacroSeries] = {
+    series.name: series for series in (
+        MacroSeries("M2SL", IndicatorTypeEnum.M2, "FRED", "Billion USD", 365 * 10),
+        MacroSeries("FEDFUNDS", IndicatorTypeEnum.INTEREST_RATE, "FRED", "Percent", 365 * 10),
+        MacroSeries("DGS10", IndicatorTypeEnum.TREASURY_YIELD, "FRED", "Percent", 365 * 10),
+        MacroSeries("DGS2", IndicatorTypeEnum.TREASURY_YIELD, "FRED", "Percent", 365 * 10),
+        MacroSeries("^VIX", IndicatorTypeEnum.VIX, "Yahoo Finance", "Index", 365 * 5),
+        MacroSeries("KRW=X", IndicatorTypeEnum.EXCHANGE_RATE, "Yahoo Finance", "KRW", 365 * 5),
+        MacroSeries("DX-Y.NYB", IndicatorTypeEnum.DXY, "Yahoo Finance", "Index", 365 * 5),
+        # 실질금리 / 물가 상승률 계산용
+        MacroSeries("CPIAUCSL", IndicatorTypeEnum.OTHER, "FRED", "Index 1982-1984=100", 365 * 10),
+    )
+}
+
+
+def fred_series(series_id: str, **kwargs) -> pd.Series:
+    """FRED 시리즈 조회 (공용 속도 제한 / 서킷 브레이커 경유)"""
+    return fred_upstream.call(fred.get_series, series_id, **kwargs)
+
+
+def fetch_observations(series: MacroSeries, start: str) -> List[Tuple[str, float]]:
+    """start(YYYY-MM-DD) 이후 관측값 [(date, value)] (결측 제외, 날짜 오름차순)"""
+    if series.source == "FRED":
+        if fred is None:
+            return []
+        data = fred_series(series.name, observation_start=start)
+    else:
+        hist = yfinance_upstream.call(lambda: yf.Ticker(series.name).history(start=start))
+        data = hist["Close"] if not hist.empty else pd.Series(dtype=float)
+
+    observations = []
+    for date, value in data.items():
+        if value is None or pd.isna(value):
+            continue
+        observations.append((date.strftime("%Y-%m-%d"), float(value)))
+    return sorted(observations)
+
+
+class MacroStore:
+    """macro_indicators 테이블 + 시리즈별 날짜순 인메모리 사본"""
+
+    def __init__(self, series: Dict[str, MacroSeries] = MACRO_SERIES):
+        self.series_defs = series
+        self._lock = threading.Lock()
+        self._dates: Dict[str, List[str]] = {}
+        self._values: Dict[str, List[float]] = {}
+        self._loaded_at: Optional[datetime] = None
+        self._last_sync: Optional[datetime] = None
+        self._sync_results: Dict[str, dict] = {}
+        self._synced_at: Dict[str, datetime] = {}
+        self._in_flight: Set[str] = set()
+        # 저장된 관측값이 바뀔 때마다 증가 (파생 시계열 캐시 키)
+        self.version = 0
+
+    def _load(self):
+        from sqlalchemy import select
+        from app.models.macro import MacroIndicator
+
+        init_main_db(MacroIndicator)
+        with get_main_db() as session:
+            rows = session.execute(
+                select(MacroIndicator.name, MacroIndicator.date, MacroIndicator.value)
+                .where(MacroIndicator.name.in_(list(self.series_defs)))
+                .order_by(MacroIndicator.name, MacroIndicator.date)
+            ).all()
+
+        dates: Dict[str, List[str]] = {name: [] for name in self.series_defs}
+        values: Dict[str, List[float]] = {name: [] for name in self.series_defs}
+        for name, date, value in rows:
+            dates[name].append(date)
+            values[name].append(value)
+        self._dates = dates
+        self._values = values
+        self.version += 1
+
+    def _ensure_loaded(self):
+        """락을 잡은 상태에서 호출: 처음이거나 재적재 주기가 지났으면 테이블에서 읽기"""
+        now = datetime.now()
+        if self._loaded_at is not None and now - self._loaded_at < MACRO_STORE_RELOAD_INTERVAL:
+            return
+        try:
+            self._load()
+        except Exception as e:
+            print(f"⚠️ 매크로 시계열 로드 실패: {e}")
+            self._dates = self._dates or {name: [] for name in self.series_defs}
+            self._values = self._values or {name: [] for name in self.series_defs}
+        self._loaded_at = now
+
+    def last_date(self, name: str) -> Optional[str]:
+        with self._lock:
+            self._ensure_loaded()
+            dates = self._dates.get(name)
+            return dates[-1] if dates else None
+
+    # ===== 동기화 =====
+
+    def sync_series(self, name: str) -> int:
+        """
+        시리즈 하나 증분 동기화, 새로 추가된 관측일 수 반환
+
+        마지막 저장 관측일도 다시 받아 장중 값 / 수정된 값을 덮어씁니다.
+        """
+        from app.models.macro import MacroIndicator
+
+        if engine_main.dialect.name == "postgresql":
+            from sqlalchemy.dialects.postgresql import insert
+        else:
+            from sqlalchemy.dialects.sqlite import insert
+
+        series = self.series_defs[name]
+        last = self.last_date(name)
+        start = last or (datetime.now() - timedelta(days=series.backfill_days)).strftime("%Y-%m-%d")
+        observations = [obs for obs in fetch_observations(series, start) if obs[0] >= start]
+        if not observations:
+            return 0
+
+        with self._lock:
+            dates = list(self._dates.get(name, []))
+            values = list(self._values.get(name, []))
+
+        # 저장된 마지막 관측값 기준으로 변동 계산 (다시 받은 마지막 관측일은 그 직전 값 기준)
+        keep = bisect_left(dates, observations[0][0])
+        prev = values[keep - 1] if keep > 0 else None
+        rows = []
+        for date, value in observations:
+            change = value - prev if prev is not None else None
+            rows.append({
+                "name": name,
+                "type": series.type,
+                "value": value,
+                "unit": series.unit,
+                "date": date,
+                "change": change,
+                "change_percent": change / prev * 100 if change is not None and prev else None,
+                "source": series.source,
+            })
+            prev = value
+
+        with get_main_db() as session:
+            stmt = insert(MacroIndicator)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=["name", "date"],
+                set_={
+                    column: getattr(stmt.excluded, column)
+                    for column in ("value", "change", "change_percent", "updated_at")
+                }
+            )
+            session.execute(stmt, rows)
+            session.commit()
+
+        # 인메모리 사본 교체 (읽는 쪽은 이전 리스트를 계속 볼 수 있음)
+        new_dates = dates[:keep] + [date for date, _ in observations]
+        new_values = values[:keep] + [value for _, value in observations]
+        with self._lock:
+            self._dates[name] = new_dates
+            self.version += 1
+            self._values[name] = new_values
+        return len(new_dates) - len(dates)
+
+    def _sync_one(self, name: str) -> int:
+        try:
+            return self.sync_series(name)
+        finally:
+            with self._lock:
+                self._in_flight.discard(name)
+
+    def sync(self, names: Optional[Iterable[str]] = None) -> Dict[str, dict]:
+        """
+        전체(또는 지정) 시리즈 증분 동기화 (시리즈별 동시 실행)
+
+        소스별 제한 시간(MACRO_SYNC_TIMEOUTS)이 지나면 기다리지 않고 timeout으로 기록합니다.
+        이전 주기의 호출이 아직 진행 중인 시리즈는 다시 호출하지 않습니다 (in_flight).
+        시리즈 하나가 실패해도 나머지는 계속 진행합니다.
+
+        Returns: 시리즈 -> {"status": ok/timeout/error/in_flight, "added": 새 관측일 수}
+        """
+        names = list(names) if names is not None else list(self.series_defs)
+        start_time = time.monotonic()
+
+        futures = {}
+        results: Dict[str, dict] = {}
+        with self._lock:
+            for name in names:
+                if name in self._in_flight:
+                    results[name] = {"status": "in_flight", "added": 0}
+                    continue
+                self._in_flight.add(name)
+                futures[name] = UPSTREAM_EXECUTOR.submit(self._sync_one, name)
+
+        for name, future in futures.items():
+            timeout = MACRO_SYNC_TIMEOUTS[self.series_defs[name].source]
+            remaining = max(0.0, timeout - (time.monotonic() - start_time))
+            try:
+                results[name] = {"status": "ok", "added": future.result(timeout=remaining)}
+            except FutureTimeout:
+                print(f"⏱️ 매크로 시계열 동기화 시간 초과 ({name}, {timeout:.0f}초)")
+                results[name] = {"status": "timeout", "added": 0}
+            except Exception as e:
+                print(f"⚠️ 매크로 시계열 동기화 실패 ({name}): {e}")
+                results[name] = {"status": "error", "added": 0}
+
+        now = datetime.now()
+        with self._lock:
+            self._last_sync = now
+            for name, result in results.items():
+                self._sync_results[name] = result
+                if result["status"] == "ok":
+                    self._synced_at[name] = now
+        new_rows = sum(result["added"] for result in results.values())
+        elapsed = time.monotonic() - start_time
+        print(f"✅ 매크로 시계열 동기화: {len(names)}개 시리즈, 신규 {new_rows}건 ({elapsed:.1f}초)")
+        return results
+
+    def synced_at(self, name: str) -> Optional[datetime]:
+        """시리즈를 마지막으로 정상 동기화한 시각 (이 프로세스 기준)"""
+        with self._lock:
+            return self._synced_at.get(name)
+
+    # ===== 읽기 (업스트림 호출 없음) =====
+
+    def data_version(self) -> int:
+        """저장된 관측값 버전 (재적재 주기도 함께 확인)"""
+        with self._lock:
+            self._ensure_loaded()
+            return self.version
+
+    def series(self, name: str, start: Optional[str] = None) -> pd.Series:
+        """저장된 관측값 (DatetimeIndex, 날짜 오름차순, start 이후)"""
+        with self._lock:
+            self._ensure_loaded()
+            dates = self._dates.get(name, [])
+            values = self._values.get(name, [])
+            i = bisect_left(dates, start) if start else 0
+            dates, values = dates[i:], values[i:]
+        return pd.Series(values, index=pd.DatetimeIndex(dates), dtype=float, name=name)
+
+    def latest(self, name: str, count: int = 2) -> List[Tuple[str, float]]:
+        """최근 count개 관측값 [(date, value)] (날짜 오름차순)"""
+        with self._lock:
+            self._ensure_loaded()
+            dates = self._dates.get(name, [])
+            values = self._values.get(name, [])
+            return list(zip(dates[-count:], values[-count:]))
+
+    def latest_change(self, name: str, scale: float = 1.0) -> Optional[dict]:
+        """마지막 관측값과 직전 관측값 대비 변동 (저장된 값이 없으면 None)"""
+        observations = self.latest(name)
+        if not observations:
+            return None
+        current = round(observations[-1][1] / scale, 2)
+        prev = round(observations[-2][1] / scale, 2) if len(observations) > 1 else current
+        return {"value": current, "change": round(current - prev, 2), "date": observations[-1][0]}
+
+    def status(self) -> dict:
+        with self._lock:
+            self._ensure_loaded()
+            return {
+                "last_sync": self._last_sync.isoformat() if self._last_sync else None,
+                "series": {
+                    name: {
+                        "observations": len(self._dates.get(name, [])),
+                        "first_date": self._dates[name][0] if self._dates.get(name) else None,
+                        "last_date": self._dates[name][-1] if self._dates.get(name) else None,
+                        "last_sync": self._sync_results.get(name),
+                        "synced_at": self._synced_at[name].isoformat() if name in self._synced_at else None,
+                    }
+                    for name in self.series_defs
+                },
+            }
+
+
+# 프로세스 공용 스토어
+macro_store = MacroStore()
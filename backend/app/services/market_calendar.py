@@ -0,0 +1,385 @@
+"""
+거래소 캘린더 (NYSE, KRX)
+- 휴장일을 연도별 규칙으로 계산 (하드코딩 목록 없음)
+- 거래일별 세션(개장/마감 시각) 캐시
+- "다음으로 갱신할 가치가 있는 시각" 계산 → 모든 캐시 TTL의 기준
+
+갱신 시각 규칙:
+- 장중: 지금 + 장중 주기 (단, 마감 후 종가 확정 시각을 넘지 않음)
+- 마감 직후: 종가 확정 시각(마감 + SETTLE_DELAY)에 한 번
+- 그 외(야간/주말/휴장일): 다음 개장 + OPEN_DELAY 까지 업스트림 호출 불필요
+
+KRX의 음력 명절(설날, 부처님오신날, 추석)은 천문 계산 대신
+KR_LUNAR_HOLIDAYS 표(양력 날짜)를 사용합니다. 표에 없는 연도는 음력 명절이 빠집니다.
+"""
+
+from datetime import date, datetime, time, timedelta
+from typing import Callable, Dict, Iterable, Optional, Set, Tuple
+import threading
+
+import pytz
+
+# 마감 후 종가가 확정돼 업스트림에 반영될 때까지
+SETTLE_DELAY = timedelta(minutes=15)
+# 개장 직후 첫 체결이 반영될 때까지
+OPEN_DELAY = timedelta(minutes=1)
+
+
+# ===== 날짜 규칙 =====
+
+def easter_sunday(year: int) -> date:
+    """부활절 (그레고리력, Anonymous Gregorian algorithm)"""
+    a = year % 19
+    b, c = divmod(year, 100)
+    d, e = divmod(b, 4)
+    f = (b + 8) // 25
+    g = (b - f + 1) // 3
+    h = (19 * a + b - d - g + 15) % 30
+    i, k = divmod(c, 4)
+    l = (32 + 2 * e + 2 * i - h - k) % 7
+    m = (a + 11 * h + 22 * l) // 451
+    month, day = divmod(h + l - 7 * m + 114, 31)
+    return date(year, month, day + 1)
+
+
+def nth_weekday(year: int, month: int, weekday: int, n: int) -> date:
+    """해당 월의 n번째 요일 (n=-1이면 마지막), weekday: 월=0 ... 일=6"""
+    if n > 0:
+        first = date(year, month, 1)
+        return first + timedelta(days=(weekday - first.weekday()) % 7 + 7 * (n - 1))
+    last = date(year + (month == 12), month % 12 + 1, 1) - timedelta(days=1)
+    return last - timedelta(days=(last.weekday() - weekday) % 7)
+
+
+def us_observed(day: date) -> date:
+    """미국 공휴일 대체일: 토요일 -> 금요일, 일요일 -> 월요일"""
+    if day.weekday() == 5:
+        return day - timedelta(days=1)
+    if day.weekday() == 6:
+        return day + timedelta(days=1)
+    return day
+
+
+def nyse_holidays(year: int) -> Dict[date, str]:
+    """NYSE 휴장일"""
+    holidays = {}
+
+    # 신정이 토요일이면 전년도 12/31을 쉬지 않음 (NYSE 규칙)
+    new_year = date(year, 1, 1)
+    if new_year.weekday() != 5:
+        holidays[us_observed(new_year)] = "New Year's Day"
+
+    holidays[nth_weekday(year, 1, 0, 3)] = "Martin Luther King Jr. Day"
+    holidays[nth_weekday(year, 2, 0, 3)] = "Presidents Day"
+    holidays[easter_sunday(year) - timedelta(days=2)] = "Good Friday"
+    holidays[nth_weekday(year, 5, 0, -1)] = "Memorial Day"
+    if year >= 2022:
+        holidays[us_observed(date(year, 6, 19))] = "Juneteenth"
+    holidays[us_observed(date(year, 7, 4))] = "Independence Day"
+    holidays[nth_weekday(year, 9, 0, 1)] = "Labor Day"
+    holidays[nth_weekday(year, 11, 3, 4)] = "Thanksgiving"
+    holidays[us_observed(date(year, 12, 25))] = "Christmas"
+    return holidays
+
+
+def nyse_early_closes(year: int) -> Set[date]:
+    """NYSE 조기 마감일 (13:00): 독립기념일 전날, 추수감사절 다음날, 크리스마스 이브"""
+    holidays = nyse_holidays(year)
+    candidates = (
+        date(year, 7, 3),
+        nth_weekday(year, 11, 3, 4) + timedelta(days=1),
+        date(year, 12, 24),
+    )
+    return {day for day in candidates if day.weekday() < 5 and day not in holidays}
+
+
+# 음력 명절 양력 날짜: (설날, 부처님오신날, 추석)
+KR_LUNAR_HOLIDAYS = {
+    2020: (date(2020, 1, 25), date(2020, 4, 30), date(2020, 10, 1)),
+    2021: (date(2021, 2, 12), date(2021, 5, 19), date(2021, 9, 21)),
+    2022: (date(2022, 2, 1), date(2022, 5, 8), date(2022, 9, 10)),
+    2023: (date(2023, 1, 22), date(2023, 5, 27), date(2023, 9, 29)),
+    2024: (date(2024, 2, 10), date(2024, 5, 15), date(2024, 9, 17)),
+    2025: (date(2025, 1, 29), date(2025, 5, 5), date(2025, 10, 6)),
+    2026: (date(2026, 2, 17), date(2026, 5, 24), date(2026, 9, 25)),
+    2027: (date(2027, 2, 7), date(2027, 5, 13), date(2027, 9, 15)),
+    2028: (date(2028, 1, 27), date(2028, 5, 2), date(2028, 10, 3)),
+    2029: (date(2029, 2, 13), date(2029, 5, 20), date(2029, 9, 22)),
+    2030: (date(2030, 2, 3), date(2030, 5, 9), date(2030, 9, 12)),
+    2031: (date(2031, 1, 23), date(2031, 5, 28), date(2031, 10, 1)),
+    2032: (date(2032, 2, 11), date(2032, 5, 16), date(2032, 9, 19)),
+    2033: (date(2033, 1, 31), date(2033, 5, 6), date(2033, 9, 8)),
+    2034: (date(2034, 2, 19), date(2034, 5, 25), date(2034, 9, 27)),
+    2035: (date(2035, 2, 8), date(2035, 5, 15), date(2035, 9, 16)),
+}
+
+# 양력 공휴일: (월, 일, 이름, 토/일 대체공휴일 적용 시작 연도)
+KR_FIXED_HOLIDAYS = (
+    (1, 1, "신정", None),
+    (3, 1, "삼일절", 2021),
+    (5, 1, "근로자의 날", None),
+    (5, 5, "어린이날", 2014),
+    (6, 6, "현충일", None),
+    (8, 15, "광복절", 2021),
+    (10, 3, "개천절", 2021),
+    (10, 9, "한글날", 2021),
+    (12, 25, "성탄절", 2023),
+)
+
+
+def krx_holidays(year: int) -> Dict[date, str]:
+    """KRX 휴장일 (공휴일 + 대체공휴일 + 근로자의 날 + 연말 휴장일)"""
+    holidays: Dict[date, str] = {}
+    # (휴일 날짜들, 이름, 대체 조건이 되는 요일)
+    substitutable = []
+
+    for month, day, name, substitute_since in KR_FIXED_HOLIDAYS:
+        d = date(year, month, day)
+        holidays.setdefault(d, name)
+        if substitute_since is not None and year >= substitute_since:
+            substitutable.append(((d,), name, (5, 6)))
+
+    lunar = KR_LUNAR_HOLIDAYS.get(year)
+    if lunar:
+        seollal, buddha, chuseok = lunar
+        for name, center in (("설날", seollal), ("추석", chuseok)):
+            days = tuple(center + timedelta(days=offset) for offset in (-1, 0, 1))
+            for d in days:
+                holidays.setdefault(d, name)
+            # 설날/추석은 일요일이나 다른 공휴일과 겹칠 때만 대체
+            substitutable.append((days, name, (6,)))
+        holidays.setdefault(buddha, "부처님오신날")
+        if year >= 2023:
+            substitutable.append(((buddha,), "부처님오신날", (5, 6)))
+
+    # 대체공휴일: 조건에 걸리면 연휴 다음의 첫 평일 비휴일
+    base = dict(holidays)
+    for days, name, trigger_weekdays in substitutable:
+        overlapped = any(d.weekday() in trigger_weekdays or base.get(d) != name for d in days)
+        if not overlapped:
+            continue
+        candidate = max(days) + timedelta(days=1)
+        while candidate.weekday() >= 5 or candidate in holidays:
+            candidate += timedelta(days=1)
+        holidays[candidate] = f"대체공휴일 ({name})"
+
+    # 연말 휴장일: 그 해 마지막 평일
+    year_end = date(year, 12, 31)
+    while year_end.weekday() >= 5 or year_end in holidays:
+        year_end -= timedelta(days=1)
+    holidays[year_end] = "연말 휴장일"
+    return holidays
+
+
+# ===== 캘린더 =====
+
+class ExchangeCalendar:
+    """
+    거래소 하나의 휴장일 / 세션 캘린더
+
+    Args:
+        name: 거래소 이름 (NYSE, KRX)
+        timezone: 거래소 시간대
+        open_time / close_time: 정규장 시각 (현지)
+        holiday_rule: 연도 -> {날짜: 휴장 사유}
+        early_close_rule / early_close_time: 조기 마감일과 마감 시각
+    """
+
+    def __init__(
+        self,
+        name: str,
+        timezone: str,
+        open_time: time,
+        close_time: time,
+        holiday_rule: Callable[[int], Dict[date, str]],
+        early_close_rule: Optional[Callable[[int], Set[date]]] = None,
+        early_close_time: Optional[time] = None,
+    ):
+        self.name = name
+        self.tz = pytz.timezone(timezone)
+        self.open_time = open_time
+        self.close_time = close_time
+        self.holiday_rule = holiday_rule
+        self.early_close_rule = early_close_rule
+        self.early_close_time = early_close_time
+
+        self._lock = threading.Lock()
+        self._holidays: Dict[int, Dict[date, str]] = {}
+        self._early_closes: Dict[int, Set[date]] = {}
+        self._sessions: Dict[date, Optional[Tuple[datetime, datetime]]] = {}
+
+    # ===== 휴장일 =====
+
+    def holidays(self, year: int) -> Dict[date, str]:
+        """연도별 휴장일 (계산 결과 캐시)"""
+        with self._lock:
+            if year not in self._holidays:
+                self._holidays[year] = self.holiday_rule(year)
+                self._early_closes[year] = self.early_close_rule(year) if self.early_close_rule else set()
+            return self._holidays[year]
+
+    def holiday_name(self, day: date) -> Optional[str]:
+        return self.holidays(day.year).get(day)
+
+    def is_trading_day(self, day: date) -> bool:
+        return day.weekday() < 5 and day not in self.holidays(day.year)
+
+    def previous_trading_day(self, day: date) -> date:
+        """day 이전의 가장 최근 거래일"""
+        day -= timedelta(days=1)
+        while not self.is_trading_day(day):
+            day -= timedelta(days=1)
+        return day
+
+    def next_trading_day(self, day: date) -> date:
+        """day 이후의 첫 거래일"""
+        day += timedelta(days=1)
+        while not self.is_trading_day(day):
+            day += timedelta(days=1)
+        return day
+
+    # ===== 세션 =====
+
+    def session(self, day: date) -> Optional[Tuple[datetime, datetime]]:
+        """거래일의 (개장, 마감) 시각 (현지 시간대, 휴장일이면 None)"""
+        with self._lock:
+            if day in self._sessions:
+                return self._sessions[day]
+        session = None
+        if self.is_trading_day(day):
+            close_time = self.close_time
+            if self.early_close_time and day in self._early_closes.get(day.year, ()):
+                close_time = self.early_close_time
+            session = (
+                self.tz.localize(datetime.combine(day, self.open_time)),
+                self.tz.localize(datetime.combine(day, close_time)),
+            )
+        with self._lock:
+            self._sessions[day] = session
+        return session
+
+    def now(self) -> datetime:
+        return datetime.now(self.tz)
+
+    def localize(self, at: Optional[datetime] = None) -> datetime:
+        """거래소 시간대로 변환 (naive datetime은 서버 로컬 시간으로 간주)"""
+        if at is None:
+            return self.now()
+        return at.astimezone(self.tz)
+
+    def is_open(self, at: Optional[datetime] = None) -> bool:
+        at = self.localize(at)
+        session = self.session(at.date())
+        return session is not None and session[0] <= at < session[1]
+
+    def last_close(self, at: Optional[datetime] = None) -> datetime:
+        """at 이전의 가장 최근 마감 시각"""
+        at = self.localize(at)
+        session = self.session(at.date())
+        if session and session[1] <= at:
+            return session[1]
+        return self.session(self.previous_trading_day(at.date()))[1]
+
+    def next_open(self, at: Optional[datetime] = None) -> datetime:
+        """at 이후의 첫 개장 시각"""
+        at = self.localize(at)
+        session = self.session(at.date())
+        if session and at < session[0]:
+            return session[0]
+        return self.session(self.next_trading_day(at.date()))[0]
+
+    def last_trading_date(self, at: Optional[datetime] = None) -> date:
+        """현재 데이터가 속한 거래일 (장중/마감 후면 오늘, 개장 전/휴장일이면 직전 거래일)"""
+        at = self.localize(at)
+        session = self.session(at.date())
+        if session and at >= session[0]:
+            return at.date()
+        return self.previous_trading_day(at.date())
+
+    # ===== 갱신 시각 / TTL =====
+
+    def next_refresh_at(self, at: Optional[datetime] = None, open_interval: timedelta = timedelta(minutes=5)) -> datetime:
+        """at 시점에 받은 데이터를 다시 받을 가치가 생기는 시각"""
+        at = self.localize(at)
+        session = self.session(at.date())
+        if session and session[0] <= at < session[1]:
+            return min(at + open_interval, session[1] + SETTLE_DELAY)
+        last_close = self.last_close(at)
+        if at < last_close + SETTLE_DELAY:
+            # 마감 직후: 종가 확정 후 한 번 더
+            return last_close + SETTLE_DELAY
+        return self.next_open(at) + OPEN_DELAY
+
+    def refresh_interval(self, at: Optional[datetime] = None, open_interval: timedelta = timedelta(minutes=5)) -> timedelta:
+        """at 시점에 받은 데이터의 유효 기간"""
+        at = self.localize(at)
+        return self.next_refresh_at(at, open_interval) - at
+
+    def ttl_seconds(
+        self,
+        open_interval: timedelta = timedelta(minutes=5),
+        at: Optional[datetime] = None,
+        max_ttl: Optional[timedelta] = None,
+    ) -> int:
+        """지금 저장하는 캐시의 TTL (초)"""
+        interval = self.refresh_interval(at, open_interval)
+        if max_ttl is not None:
+            interval = min(interval, max_ttl)
+        return max(1, int(interval.total_seconds()))
+
+    def status(self, at: Optional[datetime] = None) -> dict:
+        """시장 상태 요약"""
+        at = self.localize(at)
+        if self.is_open(at):
+            return {
+                "exchange": self.name,
+                "is_open": True,
+                "date": at.strftime("%Y-%m-%d"),
+                "message": "시장 개장 중",
+                "next_close": self.session(at.date())[1].isoformat(),
+            }
+
+        trading_date = self.last_trading_date(at)
+        if at.weekday() >= 5:
+            reason = "주말"
+        elif self.holiday_name(at.date()):
+            reason = f"공휴일 ({self.holiday_name(at.date())})"
+        else:
+            reason = "시장 마감"
+        return {
+            "exchange": self.name,
+            "is_open": False,
+            "date": trading_date.strftime("%Y-%m-%d"),
+            "message": f"{reason} - 직전 거래일 ({trading_date.strftime('%Y-%m-%d')}) 데이터 표시",
+            "next_open": self.next_open(at).isoformat(),
+        }
+
+
+NYSE = ExchangeCalendar(
+    "NYSE",
+    "America/New_York",
+    open_time=time(9, 30),
+    close_time=time(16, 0),
+    holiday_rule=nyse_holidays,
+    early_close_rule=nyse_early_closes,
+    early_close_time=time(13, 0),
+)
+
+KRX = ExchangeCalendar(
+    "KRX",
+    "Asia/Seoul",
+    open_time=time(9, 0),
+    close_time=time(15, 30),
+    holiday_rule=krx_holidays,
+)
+
+CALENDARS = {calendar.name: calendar for calendar in (NYSE, KRX)}
+
+
+def combined_ttl_seconds(
+    calendars: Iterable[ExchangeCalendar],
+    open_interval: timedelta = timedelta(minutes=5),
+    max_ttl: Optional[timedelta] = None,
+) -> int:
+    """여러 거래소 자산이 섞인 캐시의 TTL: 가장 먼저 갱신이 필요한 거래소 기준"""
+    return min(calendar.ttl_seconds(open_interval, max_ttl=max_ttl) for calendar in calendars)
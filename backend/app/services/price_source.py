@@ -0,0 +1,282 @@
+"""
+배치 가격 소스
+여러 종목의 OHLCV를 청크 단위 멀티 심볼 다운로드로 한 번에 가져와
+(종목 × 날짜) 로 정렬된 행렬로 반환합니다.
+"""
+
+from dataclasses import dataclass
+from typing import Iterable, List, Optional, Tuple
+import time
+
+import numpy as np
+import pandas as pd
+import yfinance as yf
+
+from app.utils.upstream import UpstreamUnavailable, yfinance_upstream
+
+# 한 번의 yf.download 호출에 묶을 종목 수
+DEFAULT_CHUNK_SIZE = 200
+
+# 청크 실패 시 재시도 횟수
+CHUNK_RETRY_COUNT = 2
+
+# 청크에서 이 비율 이상의 종목이 빈 결과면 업스트림 실패로 집계 (상장폐지 몇 개는 무시)
+CHUNK_FAILURE_RATIO = 0.5
+
+OHLCV_FIELDS = ("Open", "High", "Low", "Close", "Volume")
+
+
+@dataclass(frozen=True)
+class PriceMatrix:
+    """(종목 × 거래일) 로 정렬된 OHLCV 행렬"""
+
+    tickers: List[str]
+    dates: pd.DatetimeIndex
+    open: np.ndarray
+    high: np.ndarray
+    low: np.ndarray
+    close: np.ndarray
+    volume: np.ndarray
+
+    @property
+    def shape(self):
+        return self.close.shape
+
+    def __len__(self) -> int:
+        return len(self.tickers)
+
+    def index_of(self, symbol: str) -> Optional[int]:
+        """종목의 행 번호 (없으면 None)"""
+        try:
+            return self.tickers.index(symbol)
+        except ValueError:
+            return None
+
+    def select(self, tickers: Iterable[str]) -> "PriceMatrix":
+        """주어진 종목들만 남긴 행렬 (없는 종목은 제외)"""
+        positions = {symbol: i for i, symbol in enumerate(self.tickers)}
+        kept = [symbol for symbol in tickers if symbol in positions]
+        rows = [positions[symbol] for symbol in kept]
+        return PriceMatrix(
+            tickers=kept,
+            dates=self.dates,
+            open=self.open[rows],
+            high=self.high[rows],
+            low=self.low[rows],
+            close=self.close[rows],
+            volume=self.volume[rows],
+        )
+
+    def tail(self, days: int) -> "PriceMatrix":
+        """최근 N 거래일만 남긴 행렬"""
+        return PriceMatrix(
+            tickers=self.tickers,
+            dates=self.dates[-days:],
+            open=self.open[:, -days:],
+            high=self.high[:, -days:],
+            low=self.low[:, -days:],
+            close=self.close[:, -days:],
+            volume=self.volume[:, -days:],
+        )
+
+    @classmethod
+    def empty(cls) -> "PriceMatrix":
+        blank = np.empty((0, 0), dtype=float)
+        return cls([], pd.DatetimeIndex([]), blank, blank, blank, blank, blank)
+
+    @classmethod
+    def from_frame(cls, frame: pd.DataFrame) -> "PriceMatrix":
+        """(field, ticker) MultiIndex 컬럼 DataFrame -> PriceMatrix"""
+        if frame.empty:
+            return cls.empty()
+
+        tickers = sorted(frame.columns.get_level_values(1).unique())
+        arrays = {}
+        for field in OHLCV_FIELDS:
+            if field in frame.columns.get_level_values(0):
+                values = frame[field].reindex(columns=tickers)
+                arrays[field] = values.to_numpy(dtype=float).T
+            else:
+                arrays[field] = np.full((len(tickers), len(frame.index)), np.nan)
+
+        # 종가가 전부 비어있는 종목 제거 (상장폐지, 심볼 오류 등)
+        valid = ~np.isnan(arrays["Close"]).all(axis=1)
+        tickers = [symbol for symbol, ok in zip(tickers, valid) if ok]
+
+        return cls(
+            tickers=tickers,
+            dates=pd.DatetimeIndex(frame.index),
+            open=arrays["Open"][valid],
+            high=arrays["High"][valid],
+            low=arrays["Low"][valid],
+            close=arrays["Close"][valid],
+            volume=arrays["Volume"][valid],
+        )
+
+
+def chunked(items: List[str], size: int) -> List[List[str]]:
+    """리스트를 size 개씩 나누기"""
+    return [items[i:i + size] for i in range(0, len(items), size)]
+
+
+def _normalize_download(raw: pd.DataFrame, symbols: List[str]) -> pd.DataFrame:
+    """yf.download 결과를 (field, ticker) MultiIndex 컬럼으로 통일"""
+    if raw is None or raw.empty:
+        return pd.DataFrame()
+
+    if not isinstance(raw.columns, pd.MultiIndex):
+        # 단일 종목 다운로드는 평평한 컬럼으로 반환됨
+        raw = raw.copy()
+        raw.columns = pd.MultiIndex.from_product([raw.columns, symbols[:1]])
+    elif raw.columns.get_level_values(0).isin(symbols).all():
+        # group_by="ticker" 형태 (ticker, field) -> (field, ticker)
+        raw = raw.swaplevel(0, 1, axis=1)
+
+    fields = [field for field in OHLCV_FIELDS if field in raw.columns.get_level_values(0)]
+    frame = raw.loc[:, raw.columns.get_level_values(0).isin(fields)]
+
+    # 시간대 제거 후 날짜 단위로 정렬
+    index = pd.DatetimeIndex(frame.index)
+    if index.tz is not None:
+        index = index.tz_localize(None)
+    frame = frame.set_axis(index.normalize(), axis=0)
+    return frame[~frame.index.duplicated(keep="last")]
+
+
+def missing_symbols(frame: pd.DataFrame, symbols: List[str]) -> List[str]:
+    """정규화한 다운로드 결과에서 종가가 하나도 없는 요청 종목 (열이 없거나 전부 NaN)"""
+    if frame.empty or "Close" not in frame.columns.get_level_values(0):
+        return list(symbols)
+    close = frame["Close"]
+    received = set(close.columns[close.notna().any(axis=0)])
+    return [symbol for symbol in symbols if symbol not in received]
+
+
+def chunk_failure(raw: pd.DataFrame, symbols: List[str]) -> Optional[Tuple[str, bool]]:
+    """
+    yf.download 결과로 청크 실패 판정 (서킷 브레이커 집계용)
+
+    yf.download는 종목별 429/오류를 내부에서 잡고 NaN 열로 돌려주므로
+    반환된 프레임에서 요청 종목의 빈 열만 셉니다 (yfinance 내부 오류 목록은 프로세스 공용이라
+    다른 다운로드와 섞임 - 보지 않음).
+    Returns: (실패 사유, 429 여부) 또는 None(정상)
+    """
+    missing = missing_symbols(_normalize_download(raw, symbols), symbols)
+    if len(missing) >= len(symbols) * CHUNK_FAILURE_RATIO:
+        return f"빈 결과 ({len(missing)}/{len(symbols)}개 종목)", False
+    return None
+
+
+def download_chunk(
+    symbols: List[str],
+    period: Optional[str] = "1y",
+    start: Optional[str] = None,
+    retry_count: int = CHUNK_RETRY_COUNT,
+) -> pd.DataFrame:
+    """
+    한 청크의 OHLCV를 멀티 심볼 다운로드로 가져오기
+
+    속도 제한은 배치 전용 버킷에서 청크당 토큰 하나 (요청 수 카운터와 서킷 판정은 종목 수 기준)
+    빈 결과로 돌아온 종목만 모아 다시 요청하고, 재시도에서도 새로 받은 종목이 없으면
+    (상장폐지, 심볼 오류 등) 더 기다리지 않고 받은 종목만 반환합니다.
+    """
+    frames = []
+    pending = list(symbols)
+    for attempt in range(retry_count + 1):
+        if attempt > 0:
+            delay = min(2 ** attempt, 10)
+            print(f"⏳ 누락 종목 재시도 {attempt}/{retry_count} ({len(pending)}/{len(symbols)}개 종목) - {delay}초 대기...")
+            time.sleep(delay)
+
+        requested = pending
+        try:
+            raw = yfinance_upstream.call_batch(
+                yf.download,
+                len(requested),
+                lambda result: chunk_failure(result, requested),
+                tickers=requested,
+                period=None if start else period,
+                start=start,
+                interval="1d",
+                group_by="column",
+                auto_adjust=False,
+                threads=True,
+                progress=False,
+            )
+        except UpstreamUnavailable as e:
+            # 서킷이 열려 있으면 재시도하지 않음 (호출 측은 저장된 데이터 사용)
+            print(f"🚫 청크 다운로드 건너뜀 ({len(requested)}개 종목): {e}")
+            break
+        except Exception as e:
+            print(f"❌ 청크 다운로드 실패 ({len(requested)}개 종목): {e}")
+            continue
+
+        frame = _normalize_download(raw, requested)
+        pending = missing_symbols(frame, requested)
+        if len(pending) < len(requested):
+            # 받은 종목 열만 보관 (빈 열이 재시도 결과를 가리지 않도록)
+            received = set(requested) - set(pending)
+            frames.append(frame.loc[:, frame.columns.get_level_values(1).isin(received)])
+        elif attempt > 0:
+            break
+        if not pending:
+            break
+
+    if pending and frames:
+        print(f"⚠️ 청크 일부 종목 데이터 없음 ({len(pending)}/{len(symbols)}개): {', '.join(pending[:5])}"
+              + (" ..." if len(pending) > 5 else ""))
+    if not frames:
+        return pd.DataFrame()
+    merged = pd.concat(frames, axis=1).sort_index()
+    return merged.loc[:, ~merged.columns.duplicated()]
+
+
+def download_ohlcv(
+    tickers: Iterable[str],
+    period: Optional[str] = "1y",
+    start: Optional[str] = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> pd.DataFrame:
+    """
+    전체 종목의 OHLCV를 청크 단위로 다운로드해 하나의 DataFrame으로 병합
+
+    Returns:
+        index: 거래일, columns: (field, ticker) MultiIndex
+    """
+    symbols = sorted(set(tickers))
+    if not symbols:
+        return pd.DataFrame()
+
+    frames = []
+    for chunk in chunked(symbols, chunk_size):
+        frame = download_chunk(chunk, period=period, start=start)
+        if not frame.empty:
+            frames.append(frame)
+
+    if not frames:
+        return pd.DataFrame()
+
+    # 청크별 거래일이 다를 수 있으므로 날짜 합집합으로 정렬
+    merged = pd.concat(frames, axis=1).sort_index()
+    return merged.loc[:, ~merged.columns.duplicated()]
+
+
+def fetch_price_matrix(
+    tickers: Iterable[str],
+    period: Optional[str] = "1y",
+    start: Optional[str] = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> PriceMatrix:
+    """전체 종목의 OHLCV를 (종목 × 거래일) 행렬로 가져오기"""
+    symbols = list(tickers)
+    start_time = time.time()
+    chunks = (len(set(symbols)) + chunk_size - 1) // chunk_size
+
+    frame = download_ohlcv(symbols, period=period, start=start, chunk_size=chunk_size)
+    matrix = PriceMatrix.from_frame(frame)
+
+    elapsed = time.time() - start_time
+    print(f"✅ 가격 행렬 수집 완료: {len(matrix)}/{len(set(symbols))}개 종목, "
+          f"{len(matrix.dates)}거래일, {chunks}개 청크 ({elapsed:.1f}초)")
+    return matrix
+
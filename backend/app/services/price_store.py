@@ -0,0 +1,262 @@
+"""
+로컬 OHLCV 가격 스토어
+(symbol, date) 키로 일봉을 종목별 컬럼형 .npy 파일에 저장하고,
+메모리 맵으로 읽어 전체 유니버스의 1년치를 빠르게 로드합니다.
+같은 봉은 메인 DB의 StockPrice 테이블에도 일괄 upsert 됩니다.
+"""
+
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+import os
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from app.database import DATA_DIR, engine_main, init_main_db, get_main_db
+from app.services.price_source import PriceMatrix, download_ohlcv
+
+PRICE_STORE_DIR = DATA_DIR / "prices"
+
+# 일봉 레코드 (파일 하나 = 종목 하나, 날짜 오름차순)
+BAR_DTYPE = np.dtype([
+    ("date", "datetime64[D]"),
+    ("open", "f8"),
+    ("high", "f8"),
+    ("low", "f8"),
+    ("close", "f8"),
+    ("volume", "f8"),
+])
+
+# 처음 저장하는 종목의 백필 기간 (52주 브레드스 히스토리 1년치 계산에 2년 필요)
+DEFAULT_LOOKBACK = "2y"
+
+
+def matrix_row_to_bars(matrix: PriceMatrix, row: int) -> np.ndarray:
+    """가격 행렬의 한 행 -> 일봉 레코드 배열 (종가 없는 날 제외)"""
+    valid = ~np.isnan(matrix.close[row])
+    bars = np.empty(int(valid.sum()), dtype=BAR_DTYPE)
+    bars["date"] = matrix.dates[valid].values.astype("datetime64[D]")
+    bars["open"] = matrix.open[row, valid]
+    bars["high"] = matrix.high[row, valid]
+    bars["low"] = matrix.low[row, valid]
+    bars["close"] = matrix.close[row, valid]
+    bars["volume"] = matrix.volume[row, valid]
+    return bars
+
+
+def merge_bars(existing: np.ndarray, new: np.ndarray) -> np.ndarray:
+    """두 일봉 배열 병합 (같은 날짜는 new 우선)"""
+    combined = np.concatenate([existing, new])
+    order = np.argsort(combined["date"], kind="stable")
+    combined = combined[order]
+    # 같은 날짜 그룹의 마지막(= new)만 남김
+    keep = np.append(combined["date"][1:] != combined["date"][:-1], True)
+    return combined[keep]
+
+
+class PriceStore:
+    """종목별 .npy 파일 기반 일봉 스토어"""
+
+    def __init__(self, root: Path = PRICE_STORE_DIR, mirror_to_db: bool = True):
+        self.root = Path(root)
+        self.mirror_to_db = mirror_to_db
+        self._db_ready = False
+        # 종목별 메모리 맵 캐시 {symbol: (mtime_ns, bars)} - 헤더 재파싱 방지
+        self._mmaps: Dict[str, Tuple[int, np.ndarray]] = {}
+
+    def _path(self, symbol: str) -> Path:
+        return self.root / f"{symbol.replace('/', '_')}.npy"
+
+    def symbols(self) -> List[str]:
+        """저장된 종목 목록"""
+        if not self.root.exists():
+            return []
+        return sorted(path.stem for path in self.root.glob("*.npy"))
+
+    def read(self, symbol: str) -> np.ndarray:
+        """종목 일봉 읽기 (메모리 맵, 읽기 전용)"""
+        path = self._path(symbol)
+        try:
+            mtime = os.stat(path).st_mtime_ns
+        except FileNotFoundError:
+            return np.empty(0, dtype=BAR_DTYPE)
+
+        cached = self._mmaps.get(symbol)
+        if cached is not None and cached[0] == mtime:
+            return cached[1]
+
+        bars = np.asarray(np.load(path, mmap_mode="r"))
+        self._mmaps[symbol] = (mtime, bars)
+        return bars
+
+    def last_date(self, symbol: str) -> Optional[np.datetime64]:
+        """마지막 저장 거래일"""
+        bars = self.read(symbol)
+        return bars["date"][-1] if len(bars) else None
+
+    def _write(self, symbol: str, bars: np.ndarray):
+        """임시 파일에 쓴 뒤 교체 (읽는 쪽은 항상 완성된 파일만 봄)"""
+        self.root.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.root, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                np.save(f, bars)
+            os.replace(tmp_path, self._path(symbol))
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def upsert(self, symbol: str, bars: np.ndarray) -> int:
+        """종목 일봉 upsert, 새로 추가된 거래일 수 반환"""
+        if len(bars) == 0:
+            return 0
+        existing = np.array(self.read(symbol))
+        merged = merge_bars(existing, bars)
+        self._write(symbol, merged)
+        return len(merged) - len(existing)
+
+    def upsert_matrix(self, matrix: PriceMatrix) -> int:
+        """가격 행렬 전체를 일괄 upsert"""
+        added = 0
+        symbol_bars = {}
+        for row, symbol in enumerate(matrix.tickers):
+            bars = matrix_row_to_bars(matrix, row)
+            added += self.upsert(symbol, bars)
+            symbol_bars[symbol] = bars
+
+        if self.mirror_to_db and symbol_bars:
+            self._mirror_to_db(symbol_bars)
+        return added
+
+    def _mirror_to_db(self, symbol_bars: Dict[str, np.ndarray]):
+        """StockPrice 테이블에 일괄 upsert (실패해도 파일 스토어는 유지)"""
+        from sqlalchemy import select
+        from app.models.stock import Stock, StockPrice
+
+        if engine_main.dialect.name == "postgresql":
+            from sqlalchemy.dialects.postgresql import insert
+        else:
+            from sqlalchemy.dialects.sqlite import insert
+
+        try:
+            if not self._db_ready:
+                init_main_db(Stock, StockPrice)
+                self._db_ready = True
+
+            with get_main_db() as session:
+                session.execute(
+                    insert(Stock).on_conflict_do_nothing(index_elements=["symbol"]),
+                    [{"symbol": symbol, "name": symbol} for symbol in symbol_bars]
+                )
+                stock_ids = dict(session.execute(
+                    select(Stock.symbol, Stock.id).where(Stock.symbol.in_(list(symbol_bars)))
+                ).all())
+
+                rows = []
+                for symbol, bars in symbol_bars.items():
+                    dates = np.datetime_as_string(bars["date"], unit="D")
+                    for i in range(len(bars)):
+                        rows.append({
+                            "stock_id": stock_ids[symbol],
+                            "date": str(dates[i]),
+                            "open": float(bars["open"][i]),
+                            "high": float(bars["high"][i]),
+                            "low": float(bars["low"][i]),
+                            "close": float(bars["close"][i]),
+                            "volume": float(np.nan_to_num(bars["volume"][i])),
+                        })
+
+                if rows:
+                    stmt = insert(StockPrice)
+                    stmt = stmt.on_conflict_do_update(
+                        index_elements=["stock_id", "date"],
+                        set_={
+                            column: getattr(stmt.excluded, column)
+                            for column in ("open", "high", "low", "close", "volume", "updated_at")
+                        }
+                    )
+                    session.execute(stmt, rows)
+                session.commit()
+        except Exception as e:
+            print(f"⚠️ StockPrice 테이블 동기화 실패: {e}")
+
+    def load_matrix(self, symbols: Iterable[str], start: Optional[str] = None) -> PriceMatrix:
+        """저장된 일봉을 (종목 × 거래일) 행렬로 로드"""
+        start_date = np.datetime64(start, "D") if start else None
+
+        series = {}
+        for symbol in symbols:
+            bars = self.read(symbol)
+            if start_date is not None and len(bars):
+                bars = bars[np.searchsorted(bars["date"], start_date):]
+            if len(bars):
+                series[symbol] = bars
+
+        if not series:
+            return PriceMatrix.empty()
+
+        tickers = sorted(series)
+        dates = np.unique(np.concatenate([series[symbol]["date"] for symbol in tickers]))
+        shape = (len(tickers), len(dates))
+        fields = {name: np.full(shape, np.nan) for name in ("open", "high", "low", "close", "volume")}
+
+        for row, symbol in enumerate(tickers):
+            bars = series[symbol]
+            cols = np.searchsorted(dates, bars["date"])
+            for name, values in fields.items():
+                values[row, cols] = bars[name]
+
+        return PriceMatrix(
+            tickers=tickers,
+            dates=pd.DatetimeIndex(dates),
+            open=fields["open"],
+            high=fields["high"],
+            low=fields["low"],
+            close=fields["close"],
+            volume=fields["volume"],
+        )
+
+    def sync_tickers(self, symbols: Iterable[str], lookback: str = DEFAULT_LOOKBACK) -> Tuple[int, List[str]]:
+        """
+        증분 동기화: 종목별 마지막 저장일 이후의 봉만 다운로드
+
+        마지막 저장일도 다시 받아 장중에 저장된 미완성 봉을 덮어씁니다.
+        Returns: (신규 봉 수, 실제로 데이터를 받은 종목)
+        """
+        start_time = time.time()
+
+        # 마지막 저장일이 같은 종목끼리 묶어서 다운로드
+        groups: Dict[Optional[str], List[str]] = {}
+        for symbol in sorted(set(symbols)):
+            last = self.last_date(symbol)
+            groups.setdefault(str(last) if last is not None else None, []).append(symbol)
+
+        added = 0
+        received: List[str] = []
+        for start, group in groups.items():
+            frame = download_ohlcv(group, period=lookback if start is None else None, start=start)
+            matrix = PriceMatrix.from_frame(frame)
+            added += self.upsert_matrix(matrix)
+            received.extend(matrix.tickers)
+
+        elapsed = time.time() - start_time
+        print(f"✅ 가격 스토어 동기화: {len(groups)}개 그룹, 신규 {added}봉 ({elapsed:.1f}초)")
+        return added, received
+
+    def sync(self, symbols: Iterable[str], lookback: str = DEFAULT_LOOKBACK) -> int:
+        """증분 동기화, 신규 봉 수 반환"""
+        return self.sync_tickers(symbols, lookback)[0]
+
+    def sync_and_load(self, symbols: Iterable[str], days: int = 366) -> PriceMatrix:
+        """증분 동기화 후 최근 N일 행렬 로드"""
+        symbols = list(symbols)
+        self.sync(symbols)
+        start = str(np.datetime64("today", "D") - days)
+        return self.load_matrix(symbols, start=start)
+
+
+# 프로세스 공용 스토어
+price_store = PriceStore()
@@ -0,0 +1,206 @@
+"""
+계층형 증분 갱신 스케줄러
+유니버스 종목을 갱신 주기가 다른 계층(tier)으로 나누고,
+갱신 주기가 지난 종목의 가격만 업스트림에서 다시 받도록 합니다.
+
+- hot: 초대형주, 52주 신고가/신저가 근처 종목 (대시보드에 노출되는 종목)
+- warm: 대형주
+- cold: 중소형주 등 나머지
+
+장이 닫혀 있으면 계층과 무관하게 마감 후 종가가 확정된 뒤 한 번만 받습니다
+(야간/주말/휴장일에는 업스트림 호출 없음).
+
+받지 않은 종목은 로컬 가격 스토어에 이미 있는 봉을 그대로 쓰므로,
+스냅샷은 매번 전체 유니버스로 다시 계산되지만 업스트림 호출은 주기가 된 종목뿐입니다.
+
+종목별 마지막 갱신 시각과 계층은 공유 JSON 파일에 저장하므로
+리더 워커가 바뀌거나 재시작해도 전체 종목을 다시 받지 않습니다.
+"""
+
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence
+import json
+import os
+import tempfile
+import threading
+import time
+
+from app.database import DATA_DIR
+from app.services.market_calendar import NYSE, SETTLE_DELAY, ExchangeCalendar
+
+# 워커 간 공유하는 갱신 상태 파일 (종목별 마지막 갱신 시각, 계층)
+SCHEDULE_STATE_PATH = DATA_DIR / "refresh_schedule.json"
+
+
+@dataclass(frozen=True)
+class RefreshTier:
+    """갱신 계층 (장중 갱신 주기)"""
+    name: str
+    open_interval: timedelta
+
+
+REFRESH_TIERS = (
+    RefreshTier("hot", open_interval=timedelta(minutes=5)),
+    RefreshTier("warm", open_interval=timedelta(minutes=15)),
+    RefreshTier("cold", open_interval=timedelta(hours=1)),
+)
+
+# 스냅샷에 아직 없는 종목 (신규 편입 등)은 바로 받도록 hot으로 취급
+DEFAULT_TIER = "hot"
+
+
+def assign_tier(record: dict) -> str:
+    """52주 스냅샷의 종목 데이터로 갱신 계층 결정"""
+    if record.get("is_near_high") or record.get("is_near_low"):
+        return "hot"
+    category = record.get("market_cap_category", "")
+    if "Mega" in category:
+        return "hot"
+    if "Large" in category:
+        return "warm"
+    return "cold"
+
+
+class TieredRefreshScheduler:
+    """
+    종목별 마지막 갱신 시각과 계층을 추적
+
+    상태는 path(JSON)에 저장하고, 파일 mtime이 바뀌면 다시 읽어
+    다른 워커(이전 리더)가 기록한 갱신 시각을 이어받습니다.
+    """
+
+    def __init__(
+        self,
+        tiers: Sequence[RefreshTier] = REFRESH_TIERS,
+        default_tier: str = DEFAULT_TIER,
+        calendar: ExchangeCalendar = NYSE,
+        path: Optional[Path] = SCHEDULE_STATE_PATH,
+    ):
+        self.tiers = {tier.name: tier for tier in tiers}
+        self.calendar = calendar
+        self.default_tier = default_tier
+        self.path = Path(path) if path else None
+        self._lock = threading.Lock()
+        self._tier_of: Dict[str, str] = {}
+        self._refreshed_at: Dict[str, float] = {}
+        self._seen_mtime: Optional[int] = None
+
+    # ===== 공유 상태 파일 =====
+
+    def _sync_from_disk(self):
+        """락을 잡은 상태에서 호출: 다른 워커가 파일을 갱신했으면 다시 읽기"""
+        if self.path is None:
+            return
+        try:
+            mtime = os.stat(self.path).st_mtime_ns
+        except FileNotFoundError:
+            return
+        if mtime == self._seen_mtime:
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                state = json.load(f)
+            self._refreshed_at = {symbol: float(at) for symbol, at in state.get("refreshed_at", {}).items()}
+            self._tier_of = dict(state.get("tier_of", {}))
+        except Exception as e:
+            print(f"⚠️ 갱신 스케줄 상태 로드 실패: {e}")
+        self._seen_mtime = mtime
+
+    def _save(self):
+        """락을 잡은 상태에서 호출: 임시 파일에 쓴 뒤 원자적으로 교체"""
+        if self.path is None:
+            return
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=self.path.parent, suffix=".tmp")
+            try:
+                with os.fdopen(fd, "w", encoding="utf-8") as f:
+                    json.dump({"refreshed_at": self._refreshed_at, "tier_of": self._tier_of}, f)
+                os.replace(tmp_path, self.path)
+            except Exception:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+                raise
+            self._seen_mtime = os.stat(self.path).st_mtime_ns
+        except Exception as e:
+            print(f"⚠️ 갱신 스케줄 상태 저장 실패: {e}")
+
+    # ===== 계층 / 갱신 대상 =====
+
+    def assign(self, records: Iterable[dict]):
+        """게시된 스냅샷 기준으로 계층 재배정"""
+        tier_of = {record["symbol"]: assign_tier(record) for record in records}
+        with self._lock:
+            self._sync_from_disk()
+            self._tier_of = tier_of
+            self._save()
+
+    def tier_of(self, symbol: str) -> str:
+        with self._lock:
+            self._sync_from_disk()
+            return self._tier_of.get(symbol, self.default_tier)
+
+    def _closed_threshold(self, now: float) -> float:
+        """장외: 이 시각 이전에 받은 종목만 다시 받음 (마감 후 종가 확정 시각)"""
+        last_close = self.calendar.last_close(datetime.fromtimestamp(now, self.calendar.tz))
+        settled = (last_close + SETTLE_DELAY).timestamp()
+        # 마감 직후 ~ 종가 확정 전에는 마감 전에 받은 종목만 대상
+        return settled if now >= settled else last_close.timestamp()
+
+    def due(self, symbols: Iterable[str], now: Optional[float] = None) -> List[str]:
+        """갱신 주기가 지난 (또는 한 번도 받지 않은) 종목"""
+        now = time.time() if now is None else now
+        if not self.calendar.is_open(datetime.fromtimestamp(now, self.calendar.tz)):
+            threshold = self._closed_threshold(now)
+            with self._lock:
+                self._sync_from_disk()
+                return [
+                    symbol for symbol in symbols
+                    if self._refreshed_at.get(symbol, 0.0) < threshold
+                ]
+
+        intervals = {name: tier.open_interval.total_seconds() for name, tier in self.tiers.items()}
+        with self._lock:
+            self._sync_from_disk()
+            return [
+                symbol for symbol in symbols
+                if symbol not in self._refreshed_at
+                or now - self._refreshed_at[symbol] >= intervals[self._tier_of.get(symbol, self.default_tier)]
+            ]
+
+    def mark_refreshed(self, symbols: Iterable[str], now: Optional[float] = None):
+        now = time.time() if now is None else now
+        with self._lock:
+            self._sync_from_disk()
+            for symbol in symbols:
+                self._refreshed_at[symbol] = now
+            self._save()
+
+    def status(self, symbols: Sequence[str]) -> dict:
+        """계층별 종목 수 / 현재 갱신 대상 수"""
+        due = set(self.due(symbols))
+        tiers = {
+            name: {
+                "interval_seconds": int(tier.open_interval.total_seconds()),
+                "stocks": 0,
+                "due": 0,
+            }
+            for name, tier in self.tiers.items()
+        }
+        with self._lock:
+            tier_of = dict(self._tier_of)
+        for symbol in symbols:
+            tier = tiers[tier_of.get(symbol, self.default_tier)]
+            tier["stocks"] += 1
+            tier["due"] += symbol in due
+        return {
+            "exchange": self.calendar.name,
+            "market_open": self.calendar.is_open(),
+            "tiers": tiers,
+        }
+
+
+# 52주 유니버스용 스케줄러
+refresh_scheduler = TieredRefreshScheduler()
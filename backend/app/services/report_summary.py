@@ -0,0 +1,464 @@
+"""
+종목별 리포트 요약 (materialized view)
+외부 리포트 DB(report_analysis ⋈ sent_reports)의 종목별 통계를 사이드카 SQLite에
+stock_summary 테이블로 미리 집계해 두고, /api/stocks 목록은 이 테이블만 읽습니다.
+
+- 증분 갱신: report_analysis.id 기준 워터마크 이후에 추가된 행만 읽어 합계/개수에 더함
+- 평균 목표가 / 평균 상승여력은 합계와 개수로 저장해 읽을 때 나눔
+- 리포트 수(COUNT DISTINCT report_id)는 (종목, 리포트) 쌍 테이블로 중복 없이 셈
+- 원본 파일(및 -wal) 수정 시각이 그대로면 원본 DB를 조회하지 않음
+- 이미 반영한 구간의 report_analysis 행 수(기본키 범위 COUNT)가 달라지면(삭제/재작성) 전체 재집계
+- 늦게 들어온 리포트 행이나 제자리 수정은 하루 한 번 전체 재집계로 반영
+- 요청 경로는 첫 집계만 기다리고, 이후 갱신은 백그라운드 스레드에서 수행
+- 갱신 한 번(상태 읽기, 재집계 초기화, 모든 묶음)은 BEGIN IMMEDIATE 트랜잭션 하나
+  (WAL이라 조회는 커밋 전까지 이전 요약을 읽고, 다른 워커의 동시 갱신은 쓰기 잠금으로 직렬화)
+"""
+
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+import threading
+import time
+
+from sqlalchemy import bindparam, text
+from sqlalchemy.exc import OperationalError
+
+from app.database import REPORTS_DB_PATH, get_reports_db, get_reports_sidecar_db, sqlite_mtime
+
+# 원본 DB 변경 확인 주기 (목록 요청 시 이보다 오래됐으면 증분 갱신)
+REPORT_SUMMARY_REFRESH_INTERVAL = timedelta(seconds=60)
+
+# 한 번에 읽어 반영할 원본 행 수
+REPORT_SUMMARY_BATCH_SIZE = 5000
+
+# 워터마크로 잡히지 않는 변경(늦게 들어온 리포트 행, 제자리 수정)을 반영하는 전체 재집계 주기
+REPORT_SUMMARY_REBUILD_INTERVAL = timedelta(hours=24)
+
+SUMMARY_SCHEMA = (
+    """
+    CREATE TABLE IF NOT EXISTS stock_summary (
+        stock_code TEXT PRIMARY KEY,
+        stock_name TEXT,
+        total_reports INTEGER NOT NULL DEFAULT 0,
+        latest_report_date TEXT,
+        latest_analysis_id INTEGER,
+        latest_target_price REAL,
+        latest_recommendation TEXT,
+        target_sum REAL NOT NULL DEFAULT 0,
+        target_count INTEGER NOT NULL DEFAULT 0,
+        upside_sum REAL NOT NULL DEFAULT 0,
+        upside_count INTEGER NOT NULL DEFAULT 0
+    )
+    """,
+    # 목록 정렬(리포트 수, 최신 리포트일) 순서 그대로 읽는 인덱스
+    """
+    CREATE INDEX IF NOT EXISTS ix_stock_summary_rank
+    ON stock_summary (total_reports DESC, latest_report_date DESC)
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS stock_summary_reports (
+        stock_code TEXT NOT NULL,
+        report_id INTEGER NOT NULL,
+        PRIMARY KEY (stock_code, report_id)
+    ) WITHOUT ROWID
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS stock_summary_state (
+        id INTEGER PRIMARY KEY CHECK (id = 1),
+        last_analysis_id INTEGER NOT NULL DEFAULT 0,
+        applied_rows INTEGER NOT NULL DEFAULT 0,
+        refreshed_at TEXT,
+        rebuilt_at TEXT
+    )
+    """,
+)
+
+# 새 원본 행 (report_analysis.id 순)
+SOURCE_ROWS_QUERY = """
+    SELECT
+        ra.id,
+        ra.stock_code,
+        ra.stock_name,
+        ra.report_id,
+        ra.target_price,
+        ra.current_price,
+        ra.recommendation,
+        sr.date
+    FROM report_analysis ra
+    JOIN sent_reports sr ON ra.report_id = sr.id
+    WHERE ra.id > :last_id
+    ORDER BY ra.id
+    LIMIT :limit
+"""
+
+# 워터마크까지의 report_analysis 행 수 (기본키 범위 - 증분 반영이 유효한지 확인)
+SOURCE_COUNT_QUERY = "SELECT COUNT(*) FROM report_analysis WHERE id <= :last_id"
+
+# 한 묶음이 지나간 기본키 구간의 report_analysis 행 수 (조인에서 빠진 행 포함)
+SOURCE_RANGE_COUNT_QUERY = "SELECT COUNT(*) FROM report_analysis WHERE id > :after AND id <= :through"
+
+UPSERT_SUMMARY = """
+    INSERT INTO stock_summary (
+        stock_code, stock_name, latest_report_date, latest_analysis_id,
+        latest_target_price, latest_recommendation,
+        target_sum, target_count, upside_sum, upside_count
+    ) VALUES (
+        :stock_code, :stock_name, :latest_report_date, :latest_analysis_id,
+        :latest_target_price, :latest_recommendation,
+        :target_sum, :target_count, :upside_sum, :upside_count
+    )
+    ON CONFLICT (stock_code) DO UPDATE SET
+        target_sum = stock_summary.target_sum + excluded.target_sum,
+        target_count = stock_summary.target_count + excluded.target_count,
+        upside_sum = stock_summary.upside_sum + excluded.upside_sum,
+        upside_count = stock_summary.upside_count + excluded.upside_count,
+        stock_name = CASE WHEN {newer} THEN excluded.stock_name ELSE stock_summary.stock_name END,
+        latest_target_price = CASE WHEN {newer} THEN excluded.latest_target_price ELSE stock_summary.latest_target_price END,
+        latest_recommendation = CASE WHEN {newer} THEN excluded.latest_recommendation ELSE stock_summary.latest_recommendation END,
+        latest_analysis_id = CASE WHEN {newer} THEN excluded.latest_analysis_id ELSE stock_summary.latest_analysis_id END,
+        latest_report_date = CASE WHEN {newer} THEN excluded.latest_report_date ELSE stock_summary.latest_report_date END
+""".format(newer="""(
+        COALESCE(excluded.latest_report_date, '') > COALESCE(stock_summary.latest_report_date, '')
+        OR (COALESCE(excluded.latest_report_date, '') = COALESCE(stock_summary.latest_report_date, '')
+            AND excluded.latest_analysis_id > stock_summary.latest_analysis_id)
+    )""")
+
+SUMMARY_COLUMNS = """
+    stock_code,
+    stock_name,
+    total_reports,
+    latest_report_date,
+    latest_target_price,
+    latest_recommendation,
+    target_sum / NULLIF(target_count, 0) AS avg_target_price,
+    upside_sum / NULLIF(upside_count, 0) AS avg_upside
+"""
+
+
+def _upside(target_price, current_price) -> Optional[float]:
+    """상승여력 (%) - 목표가/현재가가 모두 양수일 때만"""
+    if current_price and target_price and current_price > 0 and target_price > 0:
+        return (target_price - current_price) / current_price * 100
+    return None
+
+
+def summarize_rows(rows) -> Dict[str, dict]:
+    """원본 행 묶음 -> 종목별 증분 (합계/개수, 묶음 안의 최신 리포트)"""
+    deltas: Dict[str, dict] = {}
+    for analysis_id, stock_code, stock_name, _, target_price, current_price, recommendation, date in rows:
+        delta = deltas.get(stock_code)
+        if delta is None:
+            delta = deltas[stock_code] = {
+                "stock_code": stock_code,
+                "stock_name": stock_name,
+                "latest_report_date": date,
+                "latest_analysis_id": analysis_id,
+                "latest_target_price": target_price,
+                "latest_recommendation": recommendation,
+                "target_sum": 0.0,
+                "target_count": 0,
+                "upside_sum": 0.0,
+                "upside_count": 0,
+            }
+        elif (date or "", analysis_id) > (delta["latest_report_date"] or "", delta["latest_analysis_id"]):
+            delta.update({
+                "stock_name": stock_name,
+                "latest_report_date": date,
+                "latest_analysis_id": analysis_id,
+                "latest_target_price": target_price,
+                "latest_recommendation": recommendation,
+            })
+        if target_price is not None:
+            delta["target_sum"] += target_price
+            delta["target_count"] += 1
+        upside = _upside(target_price, current_price)
+        if upside is not None:
+            delta["upside_sum"] += upside
+            delta["upside_count"] += 1
+    return deltas
+
+
+def summary_row(row) -> dict:
+    """stock_summary 조회 행 -> StockInfo 응답"""
+    return {
+        "stock_code": row[0],
+        "stock_name": row[1],
+        "total_reports": row[2],
+        "latest_report_date": row[3],
+        "latest_target_price": row[4],
+        "latest_recommendation": row[5],
+        "avg_target_price": row[6],
+        "avg_upside": round(row[7], 2) if row[7] else None,
+    }
+
+
+class ReportSummaryStore:
+    """
+    사이드카 DB의 종목별 리포트 요약 테이블
+
+    Args:
+        refresh_interval: 원본 DB 변경 확인 주기
+        batch_size: 한 번에 읽어 반영할 원본 행 수
+        rebuild_interval: 전체 재집계 주기
+    """
+
+    def __init__(
+        self,
+        refresh_interval: timedelta = REPORT_SUMMARY_REFRESH_INTERVAL,
+        batch_size: int = REPORT_SUMMARY_BATCH_SIZE,
+        rebuild_interval: timedelta = REPORT_SUMMARY_REBUILD_INTERVAL,
+    ):
+        self.refresh_interval = refresh_interval
+        self.batch_size = batch_size
+        self.rebuild_interval = rebuild_interval
+        self._lock = threading.Lock()
+        self._schema_ready = False
+        self._built = False
+        self._background = False
+        self._checked_at: Optional[datetime] = None
+        self._synced_mtime: Optional[int] = None
+        self._next_rebuild: Optional[datetime] = None
+        self._last_result: Optional[dict] = None
+        self._rebuilds = 0
+
+    def _ensure_schema(self, session):
+        if self._schema_ready:
+            return
+        # 재집계 트랜잭션 중에도 조회는 이전 버전을 읽도록 (파일에 유지되는 설정)
+        session.execute(text("PRAGMA journal_mode = WAL"))
+        for statement in SUMMARY_SCHEMA:
+            session.execute(text(statement))
+        # 재집계 시각 컬럼이 없던 사이드카 (다음 갱신에서 한 번 전체 재집계됨)
+        columns = {row[1] for row in session.execute(text("PRAGMA table_info(stock_summary_state)"))}
+        if "rebuilt_at" not in columns:
+            session.execute(text("ALTER TABLE stock_summary_state ADD COLUMN rebuilt_at TEXT"))
+        session.execute(text("INSERT OR IGNORE INTO stock_summary_state (id) VALUES (1)"))
+        session.commit()
+        self._schema_ready = True
+
+    def _state(self, session) -> Tuple[int, int, Optional[str]]:
+        row = session.execute(
+            text("SELECT last_analysis_id, applied_rows, rebuilt_at FROM stock_summary_state WHERE id = 1")
+        ).fetchone()
+        return row[0], row[1], row[2]
+
+    # ===== 갱신 =====
+
+    def _apply(self, session, rows) -> int:
+        """원본 행 묶음을 요약 테이블에 반영 (세션 커밋은 호출 측)"""
+        deltas = summarize_rows(rows)
+        session.execute(text(UPSERT_SUMMARY), list(deltas.values()))
+
+        pairs = {(row[1], row[3]) for row in rows}
+        session.execute(
+            text("INSERT OR IGNORE INTO stock_summary_reports (stock_code, report_id) VALUES (:stock_code, :report_id)"),
+            [{"stock_code": code, "report_id": report_id} for code, report_id in pairs],
+        )
+        # 리포트 수는 바뀐 종목만 쌍 테이블(기본키 범위)에서 다시 셈
+        session.execute(
+            text("""
+                UPDATE stock_summary
+                SET total_reports = (
+                    SELECT COUNT(*) FROM stock_summary_reports r
+                    WHERE r.stock_code = stock_summary.stock_code
+                )
+                WHERE stock_code IN :codes
+            """).bindparams(bindparam("codes", expanding=True)),
+            {"codes": list(deltas)},
+        )
+        return len(rows)
+
+    def _reset(self, session, now: datetime):
+        """요약 테이블 비우기 (세션 커밋은 호출 측 - 다시 채운 뒤 함께 커밋)"""
+        for table in ("stock_summary", "stock_summary_reports"):
+            session.execute(text(f"DELETE FROM {table}"))
+        session.execute(
+            text("""
+                UPDATE stock_summary_state
+                SET last_analysis_id = 0, applied_rows = 0, rebuilt_at = :now
+                WHERE id = 1
+            """),
+            {"now": now.isoformat()},
+        )
+
+    def refresh(self, force: bool = False) -> Optional[dict]:
+        """
+        원본 DB에서 새 행만 읽어 요약 테이블 갱신
+
+        refresh_interval 안에 이미 확인했거나, 원본 파일이 그대로이고 재집계 주기 전이면
+        원본 DB를 조회하지 않고 건너뜁니다 (force면 항상 확인).
+        다른 워커가 갱신 중이라 쓰기 잠금을 얻지 못하면 건너뜁니다 (다음 확인에서 다시 시도).
+        Returns:
+            {"added": 반영한 행 수, "rebuilt": 전체 재집계 여부, "seconds": 소요 시간} 또는 None(건너뜀)
+        """
+        with self._lock:
+            now = datetime.now()
+            if not force and self._checked_at and now - self._checked_at < self.refresh_interval:
+                return None
+            mtime = sqlite_mtime(REPORTS_DB_PATH)
+            if not force and self._synced_mtime is not None and mtime == self._synced_mtime \
+               and self._next_rebuild and now < self._next_rebuild:
+                self._checked_at = now
+                return None
+
+            start_time = time.time()
+            rebuilt = False
+            added = 0
+            with get_reports_sidecar_db() as sidecar, get_reports_db() as source:
+                self._ensure_schema(sidecar)
+                # 상태 읽기부터 마지막 묶음까지 한 쓰기 트랜잭션 (워커 간 같은 증분 중복 반영 방지)
+                try:
+                    sidecar.execute(text("BEGIN IMMEDIATE"))
+                except OperationalError as e:
+                    if "locked" not in str(e):
+                        raise
+                    print("⏭️ 리포트 요약: 다른 워커가 갱신 중 - 이번 확인 건너뜀")
+                    self._checked_at = now
+                    return None
+                last_id, applied, rebuilt_at = self._state(sidecar)
+
+                # 이미 반영한 구간의 원본 행 수가 다르면 증분 반영이 깨진 것 (삭제/재작성)
+                drifted = bool(last_id) and \
+                    source.execute(text(SOURCE_COUNT_QUERY), {"last_id": last_id}).scalar() != applied
+                due = rebuilt_at is None or now - datetime.fromisoformat(rebuilt_at) >= self.rebuild_interval
+                if drifted or due:
+                    if last_id:
+                        reason = "원본 DB가 변경되어" if drifted else "재집계 주기가 지나"
+                        print(f"♻️ 리포트 요약: {reason} 전체 재집계")
+                        self._rebuilds += 1
+                        rebuilt = True
+                    self._reset(sidecar, now)
+                    last_id, applied, rebuilt_at = 0, 0, now.isoformat()
+
+                while True:
+                    rows = source.execute(
+                        text(SOURCE_ROWS_QUERY), {"last_id": last_id, "limit": self.batch_size}
+                    ).fetchall()
+                    if not rows:
+                        break
+                    added += self._apply(sidecar, rows)
+                    applied += source.execute(
+                        text(SOURCE_RANGE_COUNT_QUERY), {"after": last_id, "through": rows[-1][0]}
+                    ).scalar()
+                    last_id = rows[-1][0]
+                    sidecar.execute(
+                        text("""
+                            UPDATE stock_summary_state
+                            SET last_analysis_id = :last_id, applied_rows = :applied, refreshed_at = :now
+                            WHERE id = 1
+                        """),
+                        {"last_id": last_id, "applied": applied, "now": datetime.now().isoformat()},
+                    )
+                    if len(rows) < self.batch_size:
+                        break
+                # 재집계면 비우기와 다시 채우기가 한 번에 보임 (실패하면 세션 종료 시 롤백)
+                sidecar.commit()
+
+            # 갱신 도중 원본이 또 바뀌었으면 다음 확인에서 다시 갱신 (갱신 전 시각으로 기록)
+            self._synced_mtime = mtime
+            self._next_rebuild = datetime.fromisoformat(rebuilt_at) + self.rebuild_interval
+            self._checked_at = datetime.now()
+            self._built = True
+            self._last_result = {
+                "added": added,
+                "rebuilt": rebuilt,
+                "seconds": round(time.time() - start_time, 3),
+            }
+            if added:
+                print(f"✅ 리포트 요약 갱신: {added}행 반영 ({self._last_result['seconds']}초)")
+            return self._last_result
+
+    def is_built(self) -> bool:
+        """요약 테이블이 한 번이라도 집계됐는지 (이 프로세스 또는 이전 실행에서)"""
+        if not self._built:
+            with get_reports_sidecar_db() as session:
+                self._ensure_schema(session)
+                refreshed_at = session.execute(
+                    text("SELECT refreshed_at FROM stock_summary_state WHERE id = 1")
+                ).scalar()
+            self._built = refreshed_at is not None
+        return self._built
+
+    def refresh_in_background(self) -> bool:
+        """
+        갱신 확인 주기가 됐으면 백그라운드 스레드에서 refresh (요청 경로는 기다리지 않음)
+
+        Returns: 새 백그라운드 갱신을 시작했는지
+        """
+        with self._lock:
+            if self._background:
+                return False
+            if self._checked_at and datetime.now() - self._checked_at < self.refresh_interval:
+                return False
+            self._background = True
+
+        def run():
+            try:
+                self.refresh()
+            except Exception as e:
+                print(f"❌ 리포트 요약 갱신 실패: {e}")
+            finally:
+                self._background = False
+
+        threading.Thread(target=run, name="report-summary-refresh", daemon=True).start()
+        return True
+
+    # ===== 조회 =====
+
+    def list_stocks(self, page: int, page_size: int, search: Optional[str] = None) -> Tuple[List[dict], int]:
+        """리포트 수, 최신 리포트일 내림차순 종목 목록 한 페이지와 전체 종목 수"""
+        where = ""
+        params = {"limit": page_size, "offset": (page - 1) * page_size}
+        if search:
+            where = "WHERE stock_code LIKE :search OR stock_name LIKE :search"
+            params["search"] = f"%{search}%"
+
+        with get_reports_sidecar_db() as session:
+            self._ensure_schema(session)
+            rows = session.execute(
+                text(f"""
+                    SELECT {SUMMARY_COLUMNS}
+                    FROM stock_summary
+                    {where}
+                    ORDER BY total_reports DESC, latest_report_date DESC
+                    LIMIT :limit OFFSET :offset
+                """),
+                params,
+            ).fetchall()
+            total = session.execute(
+                text(f"SELECT COUNT(*) FROM stock_summary {where}"),
+                {"search": params["search"]} if search else {},
+            ).scalar()
+        return [summary_row(row) for row in rows], total
+
+    def get(self, stock_code: str) -> Optional[dict]:
+        """종목 하나의 요약 (없으면 None)"""
+        with get_reports_sidecar_db() as session:
+            self._ensure_schema(session)
+            row = session.execute(
+                text(f"SELECT {SUMMARY_COLUMNS} FROM stock_summary WHERE stock_code = :stock_code"),
+                {"stock_code": stock_code},
+            ).fetchone()
+        return summary_row(row) if row else None
+
+    def status(self) -> dict:
+        with get_reports_sidecar_db() as session:
+            self._ensure_schema(session)
+            last_id, applied, rebuilt_at = self._state(session)
+            stocks = session.execute(text("SELECT COUNT(*) FROM stock_summary")).scalar()
+            refreshed_at = session.execute(
+                text("SELECT refreshed_at FROM stock_summary_state WHERE id = 1")
+            ).scalar()
+        return {
+            "stocks": stocks,
+            "applied_rows": applied,
+            "last_analysis_id": last_id,
+            "refreshed_at": refreshed_at,
+            "rebuilt_at": rebuilt_at,
+            "checked_at": self._checked_at.isoformat() if self._checked_at else None,
+            "last_refresh": self._last_result,
+            "rebuilds": self._rebuilds,
+        }
+
+
+# 프로세스 공용 요약 저장소
+report_summary = ReportSummaryStore()
@@ -0,0 +1,212 @@
+"""
+섹터 ETF 데이터 엔진
+11개 SPDR 섹터 ETF를 한 번의 배치 다운로드로 (섹터 × 거래일) 가격 행렬에 담고,
+모든 섹터의 기간별 수익률을 행렬 연산 한 번으로 계산해 불변 스냅샷으로 만듭니다.
+스냅샷 갱신 주기(장 세션 기준)와 게시는 API 쪽 RefreshCoordinator가 담당합니다.
+"""
+
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from app.services.price_source import PriceMatrix, fetch_price_matrix
+from app.services.week52_engine import forward_fill
+
+# 섹터 ETF 매핑
+SECTOR_ETFS = {
+    "XLK": {"name": "기술", "description": "소프트웨어, 하드웨어, 반도체", "size": 28},
+    "XLF": {"name": "금융", "description": "은행, 보험, 자산관리", "size": 13},
+    "XLV": {"name": "헬스케어", "description": "제약, 생명공학, 의료기기", "size": 14},
+    "XLY": {"name": "소비재", "description": "자동차, 소매, 레저", "size": 12},
+    "XLC": {"name": "통신", "description": "미디어, 엔터테인먼트, 통신", "size": 9},
+    "XLI": {"name": "산업재", "description": "항공우주, 건설, 제조", "size": 10},
+    "XLE": {"name": "에너지", "description": "석유, 가스, 에너지", "size": 4},
+    "XLU": {"name": "유틸리티", "description": "전력, 수도, 가스 공급", "size": 3},
+    "XLRE": {"name": "부동산", "description": "부동산 투자 신탁", "size": 3},
+    "XLB": {"name": "소재", "description": "화학, 건설자재, 금속", "size": 3},
+    "XLP": {"name": "필수소비재", "description": "식품, 음료, 생활용품", "size": 6},
+}
+
+# yfinance 종목 섹터 -> 섹터 ETF (52주 유니버스 섹터 브레드스 표시용)
+YFINANCE_SECTOR_ETFS = {
+    "Technology": "XLK",
+    "Financial Services": "XLF",
+    "Healthcare": "XLV",
+    "Consumer Cyclical": "XLY",
+    "Communication Services": "XLC",
+    "Industrials": "XLI",
+    "Energy": "XLE",
+    "Utilities": "XLU",
+    "Real Estate": "XLRE",
+    "Basic Materials": "XLB",
+    "Consumer Defensive": "XLP",
+}
+
+# 상대강도 / 로테이션 분석 기준 지수 (가격 행렬에 함께 수집)
+SECTOR_BENCHMARK = "SPY"
+
+# 가격 행렬 수집 기간 (전년 말 종가와 로테이션 지표용 여유분)
+SECTOR_PRICE_PERIOD = "2y"
+
+# 응답 필드 -> N 거래일 전 대비 수익률 (ytd는 전년 마지막 거래일 종가 대비 - year_to_date_returns)
+RETURN_HORIZONS = (
+    ("daily", 1),
+    ("weekly", 5),
+    ("monthly", 21),
+)
+
+# 응답 수익률 필드 (표시 순서)
+RETURN_FIELDS = tuple(field for field, _ in RETURN_HORIZONS) + ("ytd",)
+
+
+def returns_since(close: np.ndarray, base: int) -> np.ndarray:
+    """모든 종목의 base 열 종가 대비 마지막 열 수익률 (%) - 기준 종가가 없으면 NaN"""
+    if not 0 <= base < close.shape[1]:
+        return np.full(close.shape[0], np.nan)
+    current = close[:, -1]
+    past = close[:, base]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        returns = (current - past) / past * 100
+    returns[~(past > 0)] = np.nan
+    return returns
+
+
+def trailing_returns(close: np.ndarray, days_ago: int) -> np.ndarray:
+    """
+    모든 종목의 N 거래일 전 대비 수익률 (%)
+
+    close는 forward_fill된 행렬이어야 하며, 히스토리가 부족하면 NaN
+    """
+    return returns_since(close, close.shape[1] - days_ago - 1)
+
+
+def year_to_date_returns(close: np.ndarray, dates: pd.DatetimeIndex) -> np.ndarray:
+    """
+    모든 종목의 연초 대비 수익률 (%) - 마지막 거래일이 속한 해의 전년 마지막 거래일 종가 기준
+
+    행렬이 올해 첫 거래일부터 시작하면(전년 종가 없음) NaN
+    """
+    if not len(dates):
+        return np.full(close.shape[0], np.nan)
+    year_start = pd.Timestamp(year=dates[-1].year, month=1, day=1)
+    return returns_since(close, int(dates.searchsorted(year_start)) - 1)
+
+
+def _rounded(value: float) -> float:
+    """수익률 값 (계산 불가면 0 - 기존 응답 형식 유지)"""
+    return round(float(value), 2) if np.isfinite(value) else 0
+
+
+@dataclass(frozen=True)
+class SectorSnapshot:
+    """
+    게시된 섹터 데이터 (불변)
+
+    matrix: 섹터 ETF + 기준 지수 가격 행렬 (종가는 forward_fill 적용)
+    performance: /performance 응답의 섹터 행 (SECTOR_ETFS 순서)
+    missing: 이번 수집에서 가격을 받지 못한 ETF (직전 값 또는 0으로 채움)
+    """
+    matrix: PriceMatrix
+    performance: Tuple[dict, ...]
+    missing: Tuple[str, ...] = ()
+
+    @property
+    def complete(self) -> bool:
+        return not self.missing
+
+    def performance_response(self) -> dict:
+        return {"sectors": list(self.performance)}
+
+
+def build_sector_snapshot(matrix: PriceMatrix, previous: Optional[SectorSnapshot] = None) -> SectorSnapshot:
+    """가격 행렬로 섹터 스냅샷 생성 (수익률은 모든 섹터를 한 번에 계산)"""
+    close = forward_fill(matrix.close)
+    matrix = PriceMatrix(
+        tickers=matrix.tickers,
+        dates=matrix.dates,
+        open=matrix.open,
+        high=matrix.high,
+        low=matrix.low,
+        close=close,
+        volume=matrix.volume,
+    )
+    returns: Dict[str, np.ndarray] = {
+        field: trailing_returns(close, days_ago) for field, days_ago in RETURN_HORIZONS
+    }
+    returns["ytd"] = year_to_date_returns(close, matrix.dates)
+
+    previous_rows = {row["symbol"]: row for row in previous.performance} if previous else {}
+    performance: List[dict] = []
+    missing: List[str] = []
+    for symbol, info in SECTOR_ETFS.items():
+        row = matrix.index_of(symbol)
+        if row is None:
+            missing.append(symbol)
+            if symbol in previous_rows:
+                # 이번에 받지 못한 섹터: 마지막 정상 값 사용
+                performance.append({**previous_rows[symbol], "stale": True})
+            else:
+                performance.append({
+                    "name": info["name"],
+                    "symbol": symbol,
+                    **{field: 0 for field in RETURN_FIELDS},
+                    "description": info["description"],
+                    "size": info["size"],
+                })
+            continue
+
+        performance.append({
+            "name": info["name"],
+            "symbol": symbol,
+            **{field: _rounded(values[row]) for field, values in returns.items()},
+            "description": info["description"],
+            "size": info["size"],
+        })
+
+    return SectorSnapshot(matrix=matrix, performance=tuple(performance), missing=tuple(missing))
+
+
+def daily_changes(close: np.ndarray) -> np.ndarray:
+    """(종목 × 거래일) 일간 등락률 (%) - 첫 거래일 열은 계산 불가로 제외"""
+    with np.errstate(divide="ignore", invalid="ignore"):
+        changes = (close[:, 1:] - close[:, :-1]) / close[:, :-1] * 100
+    changes[~(close[:, :-1] > 0)] = np.nan
+    return np.round(changes, 2)
+
+
+def sector_history(snapshot: SectorSnapshot, days: int, today: Optional[pd.Timestamp] = None) -> List[dict]:
+    """
+    최근 N일(달력 기준)간 날짜별 섹터 일간 등락률
+
+    모든 섹터의 등락률을 행렬 한 번으로 계산한 뒤 날짜 행으로 펼칩니다.
+    반환: [{"date": "YYYY-MM-DD", 섹터 이름: 등락률, ...}] (값이 없는 섹터는 생략)
+    """
+    matrix = snapshot.matrix
+    if len(matrix.dates) < 2:
+        return []
+
+    today = (today or pd.Timestamp.today()).normalize()
+    dates = matrix.dates[1:]
+    # 기간 시작일 이후 거래일 (첫날도 전일 종가가 있으므로 등락률 계산 가능)
+    first = int(dates.searchsorted(today - pd.Timedelta(days=days)))
+    if first >= len(dates):
+        return []
+
+    # 기간에 필요한 열(전일 종가 1열 포함)만 잘라서 계산
+    changes = daily_changes(matrix.close[:, first:])
+    names = [SECTOR_ETFS[symbol]["name"] for symbol in matrix.tickers if symbol in SECTOR_ETFS]
+    rows = [i for i, symbol in enumerate(matrix.tickers) if symbol in SECTOR_ETFS]
+    pivot = changes[rows].T.tolist()  # 거래일 × 섹터
+
+    labels = dates[first:].strftime("%Y-%m-%d")
+    return [
+        {"date": date, **{name: value for name, value in zip(names, values) if value == value}}
+        for date, values in zip(labels, pivot)
+    ]
+
+
+def fetch_sector_matrix(period: str = SECTOR_PRICE_PERIOD) -> PriceMatrix:
+    """모든 섹터 ETF와 기준 지수를 한 번의 멀티 심볼 다운로드로 가져오기"""
+    return fetch_price_matrix(list(SECTOR_ETFS) + [SECTOR_BENCHMARK], period=period)
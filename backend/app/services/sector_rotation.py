@@ -0,0 +1,382 @@
+"""
+섹터 로테이션 / 상대강도 분석 엔진
+섹터 스냅샷의 가격 행렬(기준 지수 SPY 포함)로 대시보드용 지표를 미리 계산합니다.
+- 상대강도: 섹터/SPY 비율선과 RS-Ratio (비율선 ÷ 이동평균 × 100)
+- 모멘텀 순위: 1/3/6/12개월 수익률별 순위와 평균 순위
+- 상관계수 행렬: 일간 수익률의 이동 상관 (21/63/126 거래일)
+- RRG 사분면: RS-Ratio × RS-Momentum (Leading / Weakening / Lagging / Improving)
+
+새 스냅샷이 게시되면 직전 상태에서 이어지는 봉만 반영합니다. 이동 합계는 봉 추가 /
+마지막 봉 교체(장중 갱신) 시 차이만 더하고 빼므로 전체 히스토리를 다시 계산하지 않고,
+이어지지 않으면(종목 구성 변경, 과거 봉 수정) 처음부터 다시 쌓습니다.
+"""
+
+from collections import deque
+from typing import Deque, List, Optional
+import threading
+
+import numpy as np
+import pandas as pd
+
+from app.services.sector_engine import SECTOR_BENCHMARK, SECTOR_ETFS, SectorSnapshot
+
+# RS-Ratio 이동평균 기간 / RS-Momentum 비교 간격 (거래일)
+RS_RATIO_WINDOW = 50
+RS_MOMENTUM_LAG = 10
+
+# 상대강도 히스토리 보관 기간 (거래일, /relative-strength 최대 1년)
+RS_HISTORY_LIMIT = 260
+
+# RRG 꼬리: TAIL_STEP 거래일(주) 간격으로 최대 MAX_TAIL개 점
+TAIL_STEP = 5
+MAX_TAIL = 12
+
+# 모멘텀 순위 기간 (응답 키 -> 거래일)
+MOMENTUM_HORIZONS = (
+    ("1m", 21),
+    ("3m", 63),
+    ("6m", 126),
+    ("12m", 252),
+)
+
+# 상관계수 행렬 기간 (거래일)
+CORRELATION_WINDOWS = (21, 63, 126)
+
+RRG_QUADRANTS = ("Leading", "Weakening", "Lagging", "Improving")
+
+
+def rrg_quadrant(rs_ratio: float, rs_momentum: float) -> Optional[str]:
+    """RS-Ratio / RS-Momentum (100 기준) 사분면"""
+    if not (np.isfinite(rs_ratio) and np.isfinite(rs_momentum)):
+        return None
+    if rs_ratio >= 100:
+        return "Leading" if rs_momentum >= 100 else "Weakening"
+    return "Improving" if rs_momentum >= 100 else "Lagging"
+
+
+def rank_descending(values: np.ndarray) -> np.ndarray:
+    """큰 값이 1위인 순위 (NaN은 순위 없음)"""
+    ranks = np.full(len(values), np.nan)
+    valid = np.flatnonzero(np.isfinite(values))
+    order = valid[np.argsort(-values[valid], kind="stable")]
+    ranks[order] = np.arange(1, len(order) + 1)
+    return ranks
+
+
+def _value(value: float, decimals: int = 2) -> Optional[float]:
+    return round(float(value), decimals) if np.isfinite(value) else None
+
+
+class RollingSum:
+    """
+    최근 window개 값(벡터/행렬)의 합
+
+    push: 새 봉 추가 (window를 넘으면 가장 오래된 값 제거)
+    replace_last: 마지막 봉 값 교체 (장중에 같은 날 봉이 다시 들어올 때)
+    """
+
+    def __init__(self, window: int):
+        self.window = window
+        self.items: Deque[np.ndarray] = deque()
+        self.total: Optional[np.ndarray] = None
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+    @property
+    def full(self) -> bool:
+        return len(self.items) >= self.window
+
+    def push(self, value: np.ndarray):
+        self.total = value.copy() if self.total is None else self.total + value
+        self.items.append(value)
+        if len(self.items) > self.window:
+            self.total = self.total - self.items.popleft()
+
+    def replace_last(self, value: np.ndarray):
+        self.total = self.total - self.items[-1] + value
+        self.items[-1] = value
+
+    def mean(self) -> np.ndarray:
+        return self.total / len(self.items)
+
+
+class RollingCorrelation:
+    """최근 window개 일간 수익률 벡터의 상관계수 행렬 (합 / 곱합 누적)"""
+
+    def __init__(self, window: int):
+        self.window = window
+        self.sums = RollingSum(window)
+        self.products = RollingSum(window)
+
+    @property
+    def full(self) -> bool:
+        return self.sums.full
+
+    def push(self, returns: np.ndarray):
+        self.sums.push(returns)
+        self.products.push(np.outer(returns, returns))
+
+    def replace_last(self, returns: np.ndarray):
+        self.sums.replace_last(returns)
+        self.products.replace_last(np.outer(returns, returns))
+
+    def matrix(self) -> np.ndarray:
+        mean = self.sums.mean()
+        covariance = self.products.mean() - np.outer(mean, mean)
+        deviation = np.sqrt(np.clip(np.diag(covariance), 0, None))
+        with np.errstate(divide="ignore", invalid="ignore"):
+            correlation = covariance / np.outer(deviation, deviation)
+        return np.clip(correlation, -1, 1)
+
+
+class SectorRotationEngine:
+    """섹터 스냅샷 게시마다 로테이션 지표를 증분 갱신하고 응답을 미리 만들어 둠"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._reset([])
+        self.version: Optional[int] = None
+        self._view: dict = {}
+        self._updates = 0
+        self._rebuilds = 0
+        self._bars_applied = 0
+
+    def _reset(self, symbols: List[str]):
+        """symbols: 섹터 심볼 (순서 = 행렬 행 순서, 마지막 행은 기준 지수)"""
+        self.symbols = symbols
+        self._bars = 0
+        self._dates: Deque[pd.Timestamp] = deque(maxlen=RS_HISTORY_LIMIT)
+        self._closes: Deque[np.ndarray] = deque(maxlen=max(days for _, days in MOMENTUM_HORIZONS) + 1)
+        self._rs_sum = RollingSum(RS_RATIO_WINDOW)
+        self._rs_ratio: Deque[np.ndarray] = deque(maxlen=RS_HISTORY_LIMIT)
+        self._rs_momentum: Deque[np.ndarray] = deque(maxlen=RS_HISTORY_LIMIT)
+        self._correlations = {window: RollingCorrelation(window) for window in CORRELATION_WINDOWS}
+
+    # ===== 봉 반영 =====
+
+    def _rs_ratio_of(self, close: np.ndarray) -> np.ndarray:
+        """봉의 RS-Ratio (rs 이동합에 이미 반영된 상태, 이동평균 기간이 차기 전에는 NaN)"""
+        if not self._rs_sum.full:
+            return np.full(len(close) - 1, np.nan)
+        return 100 * (close[:-1] / close[-1]) / self._rs_sum.mean()
+
+    def _rs_momentum_of(self, ratio: np.ndarray, offset: int) -> np.ndarray:
+        """
+        RS_MOMENTUM_LAG 봉 전 대비 RS-Ratio 비율 × 100
+
+        offset: _rs_ratio 끝에 현재 봉이 이미 있으면 1 (마지막 봉 교체), 없으면 0 (새 봉)
+        """
+        if len(self._rs_ratio) < RS_MOMENTUM_LAG + offset:
+            return np.full(len(ratio), np.nan)
+        return 100 * ratio / self._rs_ratio[-RS_MOMENTUM_LAG - offset]
+
+    def _push(self, date: pd.Timestamp, close: np.ndarray):
+        """새 봉 추가"""
+        if self._closes:
+            returns = np.nan_to_num(close / self._closes[-1] - 1)
+            for correlation in self._correlations.values():
+                correlation.push(returns[:-1])
+        self._bars += 1
+        self._dates.append(date)
+        self._closes.append(close)
+
+        self._rs_sum.push(close[:-1] / close[-1])
+        ratio = self._rs_ratio_of(close)
+        momentum = self._rs_momentum_of(ratio, offset=0)
+        self._rs_ratio.append(ratio)
+        self._rs_momentum.append(momentum)
+
+    def _replace_last(self, date: pd.Timestamp, close: np.ndarray):
+        """마지막 봉 교체 (같은 거래일의 장중 값 -> 새 값)"""
+        if self._bars > 1:
+            returns = np.nan_to_num(close / self._closes[-2] - 1)
+            for correlation in self._correlations.values():
+                correlation.replace_last(returns[:-1])
+        self._dates[-1] = date
+        self._closes[-1] = close
+
+        self._rs_sum.replace_last(close[:-1] / close[-1])
+        ratio = self._rs_ratio_of(close)
+        momentum = self._rs_momentum_of(ratio, offset=1)
+        self._rs_ratio[-1] = ratio
+        self._rs_momentum[-1] = momentum
+
+    def update(self, snapshot: SectorSnapshot, version: Optional[int] = None):
+        """
+        섹터 스냅샷 반영
+
+        직전에 반영한 마지막 거래일이 새 행렬에 있고 그 전 봉이 그대로면
+        마지막 봉 교체 + 새 봉 추가만 하고, 아니면 전체 재계산합니다.
+        """
+        matrix = snapshot.matrix
+        symbols = [symbol for symbol in SECTOR_ETFS if matrix.index_of(symbol) is not None]
+        if matrix.index_of(SECTOR_BENCHMARK) is None or not symbols:
+            with self._lock:
+                self._reset([])
+                self._view = {}
+                self.version = version
+            return
+
+        close = matrix.select(symbols + [SECTOR_BENCHMARK]).close
+        dates = matrix.dates
+
+        with self._lock:
+            start = None
+            if symbols == self.symbols and self._dates:
+                position = int(dates.searchsorted(self._dates[-1]))
+                if position < len(dates) and dates[position] == self._dates[-1]:
+                    previous_intact = self._bars < 2 or (
+                        position > 0 and np.allclose(close[:, position - 1], self._closes[-2], equal_nan=True)
+                    )
+                    if previous_intact:
+                        start = position
+
+            if start is None:
+                self._reset(symbols)
+                # 모든 종목 가격이 있는 첫 거래일부터 쌓음
+                complete = np.flatnonzero(np.isfinite(close).all(axis=0))
+                if len(complete) == 0:
+                    self._view = {}
+                    self.version = version
+                    return
+                for i in range(complete[0], len(dates)):
+                    self._push(dates[i], close[:, i])
+                self._rebuilds += 1
+                applied = len(dates) - int(complete[0])
+            else:
+                self._replace_last(dates[start], close[:, start])
+                for i in range(start + 1, len(dates)):
+                    self._push(dates[i], close[:, i])
+                applied = len(dates) - start
+
+            self._updates += 1
+            self._bars_applied += applied
+            self._view = self._build_view()
+            self.version = version
+
+    # ===== 응답 생성 =====
+
+    def _sector(self, i: int) -> dict:
+        symbol = self.symbols[i]
+        return {"symbol": symbol, "name": SECTOR_ETFS[symbol]["name"]}
+
+    def _build_view(self) -> dict:
+        dates = [date.strftime("%Y-%m-%d") for date in self._dates]
+        names = [SECTOR_ETFS[symbol]["name"] for symbol in self.symbols]
+        ratio = self._rs_ratio[-1]
+        momentum = self._rs_momentum[-1]
+        close = self._closes[-1]
+
+        # 상대강도: 최신 값 + 날짜별 RS-Ratio
+        rs = close[:-1] / close[-1]
+        month_ago = self._closes[-22] if len(self._closes) > 21 else None
+        relative = []
+        for i in range(len(self.symbols)):
+            change = (rs[i] / (month_ago[i] / month_ago[-1]) - 1) * 100 if month_ago is not None else np.nan
+            relative.append({
+                **self._sector(i),
+                "rs": _value(rs[i], 4),
+                "rs_change_1m": _value(change),
+                "rs_ratio": _value(ratio[i]),
+            })
+        history_dates = dates[-len(self._rs_ratio):]
+        rs_history = [
+            {"date": date, **{name: _value(v) for name, v in zip(names, values)}}
+            for date, values in zip(history_dates, self._rs_ratio)
+        ]
+
+        # 모멘텀 순위
+        returns = {}
+        for key, days in MOMENTUM_HORIZONS:
+            if len(self._closes) > days:
+                past = self._closes[-days - 1]
+                returns[key] = (close[:-1] / past[:-1] - 1) * 100
+            else:
+                returns[key] = np.full(len(self.symbols), np.nan)
+        ranks = {key: rank_descending(values) for key, values in returns.items()}
+        stacked = np.vstack(list(ranks.values()))
+        counts = np.isfinite(stacked).sum(axis=0)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            composite = np.where(counts > 0, np.nansum(stacked, axis=0) / counts, np.nan)
+        momentum_rows = []
+        for i in range(len(self.symbols)):
+            momentum_rows.append({
+                **self._sector(i),
+                "returns": {key: _value(values[i]) for key, values in returns.items()},
+                "ranks": {key: int(values[i]) if np.isfinite(values[i]) else None for key, values in ranks.items()},
+                "composite_rank": _value(composite[i]),
+            })
+        momentum_rows.sort(key=lambda row: (row["composite_rank"] is None, row["composite_rank"]))
+
+        # 상관계수 행렬
+        correlations = {}
+        for window, rolling in self._correlations.items():
+            if not rolling.full:
+                continue
+            matrix = np.round(rolling.matrix(), 3)
+            correlations[window] = {
+                "window": window,
+                "symbols": list(self.symbols),
+                "names": names,
+                "matrix": [[_value(v, 3) for v in row] for row in matrix],
+            }
+
+        # RRG: 현재 점 + 주 단위 꼬리 (과거 -> 현재)
+        rrg = []
+        for i in range(len(self.symbols)):
+            tail = []
+            for k in range(MAX_TAIL - 1, -1, -1):
+                position = len(self._rs_ratio) - 1 - k * TAIL_STEP
+                if position < 0 or not np.isfinite(self._rs_momentum[position][i]):
+                    continue
+                tail.append({
+                    "date": history_dates[position],
+                    "rs_ratio": _value(self._rs_ratio[position][i]),
+                    "rs_momentum": _value(self._rs_momentum[position][i]),
+                })
+            rrg.append({
+                **self._sector(i),
+                "rs_ratio": _value(ratio[i]),
+                "rs_momentum": _value(momentum[i]),
+                "quadrant": rrg_quadrant(ratio[i], momentum[i]),
+                "tail": tail,
+            })
+
+        quadrants = {quadrant: [] for quadrant in RRG_QUADRANTS}
+        for point in rrg:
+            if point["quadrant"]:
+                quadrants[point["quadrant"]].append(point["name"])
+
+        return {
+            "as_of": dates[-1],
+            "benchmark": SECTOR_BENCHMARK,
+            "relative_strength": relative,
+            "rs_history": rs_history,
+            "momentum": momentum_rows,
+            "correlations": correlations,
+            "rrg": rrg,
+            "quadrants": quadrants,
+        }
+
+    # ===== 조회 =====
+
+    def view(self) -> dict:
+        """미리 계산된 지표 (스냅샷이 없거나 기준 지수가 없으면 빈 dict)"""
+        return self._view
+
+    def status(self) -> dict:
+        with self._lock:
+            return {
+                "version": self.version,
+                "sectors": len(self.symbols),
+                "bars": self._bars,
+                "as_of": self._view.get("as_of"),
+                "updates": self._updates,
+                "rebuilds": self._rebuilds,
+                "bars_applied": self._bars_applied,
+            }
+
+
+# 프로세스 공용 엔진 (섹터 스냅샷 게시 알림으로 갱신)
+sector_rotation = SectorRotationEngine()
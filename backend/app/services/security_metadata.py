@@ -0,0 +1,246 @@
+"""
+종목 메타데이터 캐시
+이름, 섹터, 발행주식수, 거래소처럼 장중에 거의 바뀌지 않는 정보를
+하루 TTL로 디스크(JSON)에 보관합니다.
+시가총액은 저장하지 않고 발행주식수 × 현재가로 계산하므로
+장중 갱신에는 가격 봉만 있으면 됩니다.
+"""
+
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import asdict, dataclass
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional
+import json
+import os
+import tempfile
+import threading
+
+import yfinance as yf
+
+from app.database import DATA_DIR, engine_main, get_main_db, init_main_db
+from app.utils.upstream import UpstreamUnavailable, yfinance_upstream
+
+METADATA_PATH = DATA_DIR / "security_metadata.json"
+
+# 메타데이터 유효 기간
+METADATA_TTL = timedelta(days=1)
+
+# 수집 실패(상장폐지, 일시 오류 등) 종목을 다시 시도하기까지의 대기 시간
+METADATA_FAILURE_TTL = timedelta(hours=1)
+
+# 메타데이터 수집 동시 실행 수 (실제 호출 속도는 yfinance 프로바이더가 제한)
+METADATA_WORKERS = 10
+
+
+@dataclass(frozen=True)
+class SecurityMetadata:
+    """종목 메타데이터 (시가총액은 shares_outstanding × 가격으로 계산)"""
+    symbol: str
+    name: str
+    sector: str
+    shares_outstanding: Optional[float]
+    exchange: Optional[str]
+    fetched_at: str  # ISO 형식
+
+    def market_cap(self, price: float) -> float:
+        """현재가 기준 시가총액 (달러, 발행주식수를 모르면 0)"""
+        return float(self.shares_outstanding or 0) * price
+
+    def is_expired(self, ttl: timedelta = METADATA_TTL) -> bool:
+        return datetime.now() - datetime.fromisoformat(self.fetched_at) > ttl
+
+
+def fetch_security_metadata(symbol: str) -> SecurityMetadata:
+    """yfinance Ticker.info 에서 메타데이터 추출 (공용 속도 제한 경유)"""
+    info = yfinance_upstream.call(lambda: yf.Ticker(symbol).info) or {}
+
+    shares = info.get("sharesOutstanding") or info.get("impliedSharesOutstanding")
+    if not shares:
+        # 발행주식수가 없으면 info 시점의 시총/가격으로 역산
+        price = info.get("regularMarketPrice") or info.get("previousClose")
+        if info.get("marketCap") and price:
+            shares = info["marketCap"] / price
+
+    return SecurityMetadata(
+        symbol=symbol,
+        name=info.get("longName") or info.get("shortName") or symbol,
+        sector=info.get("sector", "Unknown"),
+        shares_outstanding=float(shares) if shares else None,
+        exchange=info.get("exchange"),
+        fetched_at=datetime.now().isoformat(),
+    )
+
+
+class SecurityMetadataCache:
+    """디스크에 저장되는 종목 메타데이터 캐시"""
+
+    def __init__(
+        self,
+        path: Path = METADATA_PATH,
+        ttl: timedelta = METADATA_TTL,
+        failure_ttl: timedelta = METADATA_FAILURE_TTL,
+    ):
+        self.path = Path(path)
+        self.ttl = ttl
+        self.failure_ttl = failure_ttl
+        self._lock = threading.Lock()
+        self._entries: Dict[str, SecurityMetadata] = {}
+        # 수집 실패 시각 (failure_ttl 동안은 갱신 대상에서 제외)
+        self._failures: Dict[str, datetime] = {}
+        self._seen_mtime: Optional[int] = None
+
+    def _ensure_loaded(self):
+        """
+        락을 잡은 상태에서 호출: 파일이 바뀌었으면(다른 워커가 저장) 다시 읽기
+
+        저장 직전에도 호출하므로 다른 워커가 추가한 항목을 덮어쓰지 않습니다.
+        """
+        try:
+            mtime = os.stat(self.path).st_mtime_ns
+        except FileNotFoundError:
+            return
+        if mtime == self._seen_mtime:
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                raw = json.load(f)
+            self._entries = {symbol: SecurityMetadata(**entry) for symbol, entry in raw.items()}
+        except Exception as e:
+            print(f"⚠️ 메타데이터 캐시 로드 실패: {e}")
+        self._seen_mtime = mtime
+
+    def _save(self):
+        """락을 잡은 상태에서 호출: 임시 파일에 쓴 뒤 원자적으로 교체"""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.path.parent, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump({s: asdict(m) for s, m in self._entries.items()}, f, ensure_ascii=False)
+            os.replace(tmp_path, self.path)
+            self._seen_mtime = os.stat(self.path).st_mtime_ns
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def get_many(self, symbols: Iterable[str]) -> Dict[str, SecurityMetadata]:
+        """저장된 메타데이터 (만료 여부와 무관)"""
+        with self._lock:
+            self._ensure_loaded()
+            return {s: self._entries[s] for s in symbols if s in self._entries}
+
+    def _recently_failed(self, symbol: str, now: datetime) -> bool:
+        """락을 잡은 상태에서 호출: failure_ttl 안에 수집이 실패한 종목인지"""
+        failed_at = self._failures.get(symbol)
+        return failed_at is not None and now - failed_at <= self.failure_ttl
+
+    def stale_symbols(self, symbols: Iterable[str]) -> List[str]:
+        """없거나 TTL이 지난 종목 (최근 수집에 실패한 종목 제외)"""
+        now = datetime.now()
+        with self._lock:
+            self._ensure_loaded()
+            return [
+                s for s in symbols
+                if (s not in self._entries or self._entries[s].is_expired(self.ttl))
+                and not self._recently_failed(s, now)
+            ]
+
+    def refresh(
+        self,
+        symbols: Iterable[str],
+        progress: Optional[Callable[[int, int], None]] = None,
+    ) -> int:
+        """
+        만료된 종목만 다시 수집해 저장
+
+        업스트림 서킷이 열리면 남은 종목은 건너뛰고 기존(만료된) 값을 계속 사용합니다.
+        수집에 실패한 종목은 failure_ttl 동안 다시 요청하지 않습니다.
+        Returns: 새로 수집한 종목 수
+        """
+        stale = self.stale_symbols(symbols)
+        if not stale:
+            return 0
+
+        print(f"🏷️ 메타데이터 수집: {len(stale)}개 종목 (만료/신규)")
+        fetched: Dict[str, SecurityMetadata] = {}
+        failed: List[str] = []
+        with ThreadPoolExecutor(max_workers=METADATA_WORKERS) as executor:
+            future_to_symbol = {executor.submit(fetch_security_metadata, s): s for s in stale}
+            for done, future in enumerate(as_completed(future_to_symbol), 1):
+                symbol = future_to_symbol[future]
+                try:
+                    fetched[symbol] = future.result()
+                except UpstreamUnavailable as e:
+                    print(f"🚫 메타데이터 수집 중단: {e}")
+                    for pending in future_to_symbol:
+                        pending.cancel()
+                    break
+                except Exception as e:
+                    print(f"Error fetching info {symbol}: {e}")
+                    failed.append(symbol)
+                if progress:
+                    progress(done, len(stale))
+
+        with self._lock:
+            now = datetime.now()
+            for symbol in failed:
+                self._failures[symbol] = now
+            for symbol in fetched:
+                self._failures.pop(symbol, None)
+        if failed:
+            print(f"⚠️ 메타데이터 수집 실패 {len(failed)}개 종목 ({self.failure_ttl} 후 재시도)")
+
+        if fetched:
+            with self._lock:
+                # 수집하는 동안 다른 워커가 저장한 항목 위에 병합
+                self._ensure_loaded()
+                self._entries.update(fetched)
+                try:
+                    self._save()
+                except Exception as e:
+                    print(f"⚠️ 메타데이터 캐시 저장 실패: {e}")
+            self._mirror_to_db(list(fetched.values()))
+        return len(fetched)
+
+    def ensure(
+        self,
+        symbols: Iterable[str],
+        progress: Optional[Callable[[int, int], None]] = None,
+    ) -> Dict[str, SecurityMetadata]:
+        """만료된 종목을 갱신한 뒤 전체 메타데이터 반환"""
+        symbols = list(symbols)
+        self.refresh(symbols, progress=progress)
+        return self.get_many(symbols)
+
+    def _mirror_to_db(self, entries: List[SecurityMetadata]):
+        """Stock 테이블의 이름/섹터/거래소 갱신 (실패해도 파일 캐시는 유지)"""
+        from app.models.stock import Stock
+
+        if engine_main.dialect.name == "postgresql":
+            from sqlalchemy.dialects.postgresql import insert
+        else:
+            from sqlalchemy.dialects.sqlite import insert
+
+        try:
+            init_main_db(Stock)
+            with get_main_db() as session:
+                stmt = insert(Stock)
+                stmt = stmt.on_conflict_do_update(
+                    index_elements=["symbol"],
+                    set_={
+                        column: getattr(stmt.excluded, column)
+                        for column in ("name", "sector", "exchange", "updated_at")
+                    }
+                )
+                session.execute(stmt, [
+                    {"symbol": m.symbol, "name": m.name, "sector": m.sector, "exchange": m.exchange}
+                    for m in entries
+                ])
+                session.commit()
+        except Exception as e:
+            print(f"⚠️ 메타데이터 DB 반영 실패: {e}")
+
+
+# 프로세스 공용 캐시
+security_metadata = SecurityMetadataCache()
@@ -0,0 +1,610 @@
+"""
+외부 리포트/뉴스 DB 사이드카 인덱스
+reports.db / news.db는 다른 도구가 소유하므로 인덱스를 직접 만들 수 없습니다.
+대신 정렬/필터에 쓰는 컬럼만 사이드카 SQLite에 파생 테이블로 복사해 커버링 인덱스를 걸고,
+원본 연결에 ATTACH된 사이드카(sidecar 스키마)에서 인덱스 범위 스캔으로 행을 고른 뒤
+원본 행은 기본키로만 조인합니다.
+
+- 파생 컬럼: 목표가 상승여력(upside_percent)을 미리 계산해 정렬 인덱스에 포함
+- 증분 갱신: 원본 파일(및 -wal) 수정 시각이 바뀌면 원본 id 워터마크 이후 행만 복사
+- 전체 재구성: 이미 복사한 구간의 행 수가 달라졌거나(삭제/재작성) 재구성 주기가 지나면
+- 갱신은 항상 백그라운드 스레드에서 실행 (요청 경로는 기다리지 않음)
+- 사이드카가 원본보다 뒤처졌거나 갱신에 실패한 동안에는 같은 쿼리를 원본 테이블에서 실행
+- 실행 계획 검증: python -m app.services.sidecar_index 로 목록 쿼리의 EXPLAIN QUERY PLAN 확인
+"""
+
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Callable, List, Optional, Tuple
+import sys
+import threading
+import time
+
+from sqlalchemy import text
+
+from app.database import (
+    NEWS_DB_PATH,
+    REPORTS_DB_PATH,
+    SIDECAR_SCHEMA,
+    get_news_db,
+    get_reports_db,
+    sqlite_mtime,
+)
+
+# 원본의 제자리 수정(목표가 정정 등)은 워터마크로 잡히지 않으므로 주기적으로 전체 재구성
+SIDECAR_FULL_REBUILD_INTERVAL = timedelta(hours=24)
+
+STATE_SCHEMA = f"""
+    CREATE TABLE IF NOT EXISTS {SIDECAR_SCHEMA}.sidecar_state (
+        name TEXT PRIMARY KEY,
+        last_id INTEGER NOT NULL DEFAULT 0,
+        synced_at TEXT,
+        rebuilt_at TEXT
+    )
+"""
+
+
+@dataclass(frozen=True)
+class DerivedTable:
+    """
+    원본 테이블 하나에서 파생한 사이드카 테이블
+
+    name: 사이드카 테이블 이름 (쿼리 템플릿의 {name} 자리)
+    source: 원본 테이블 (정수 기본키 id를 워터마크로 사용)
+    key: 원본 id를 담는 파생 테이블 기본키
+    schema: CREATE TABLE / CREATE INDEX 문
+    select: 원본에서 파생 테이블과 같은 열(같은 순서)을 만드는 SELECT
+            (사이드카가 준비되지 않았을 때는 이 SELECT가 테이블 자리에 들어감)
+    fixups: 복사 뒤 보정 (늦게 들어온 조인 값 채우기 등)
+    """
+    name: str
+    source: str
+    key: str
+    schema: Tuple[str, ...]
+    select: str
+    fixups: Tuple[str, ...] = ()
+
+    @property
+    def fill(self) -> str:
+        """원본 (:last_id, :top_id] 구간을 복사하는 INSERT ... SELECT"""
+        return f"""
+            INSERT OR REPLACE INTO {SIDECAR_SCHEMA}.{self.name}
+            SELECT * FROM ({self.select})
+            WHERE {self.key} > :last_id AND {self.key} <= :top_id
+        """
+
+
+# ===== 리포트 DB 파생 테이블 =====
+
+REPORT_LIST = DerivedTable(
+    name="report_list",
+    source="sent_reports",
+    key="report_id",
+    schema=(
+        f"""
+        CREATE TABLE IF NOT EXISTS {SIDECAR_SCHEMA}.report_list (
+            report_id INTEGER PRIMARY KEY,
+            date TEXT,
+            category TEXT
+        )
+        """,
+        # 리포트 목록 (날짜 내림차순, 카테고리별)
+        f"CREATE INDEX IF NOT EXISTS {SIDECAR_SCHEMA}.ix_report_list_date ON report_list (date)",
+        f"CREATE INDEX IF NOT EXISTS {SIDECAR_SCHEMA}.ix_report_list_category ON report_list (category, date)",
+    ),
+    select="""
+        SELECT id AS report_id, date, category
+        FROM main.sent_reports
+    """,
+)
+
+REPORT_ROWS = DerivedTable(
+    name="report_rows",
+    source="report_analysis",
+    key="analysis_id",
+    schema=(
+        f"""
+        CREATE TABLE IF NOT EXISTS {SIDECAR_SCHEMA}.report_rows (
+            analysis_id INTEGER PRIMARY KEY,
+            report_id INTEGER,
+            stock_code TEXT,
+            report_date TEXT,
+            analysis_date TEXT,
+            recommendation TEXT,
+            upside_percent REAL
+        )
+        """,
+        # 종목 상세 / 목표가 히스토리 (리포트일 순, 같은 날은 analysis_id 순)
+        f"CREATE INDEX IF NOT EXISTS {SIDECAR_SCHEMA}.ix_report_rows_stock ON report_rows (stock_code, report_date)",
+        # 리포트별 종목 분석
+        f"CREATE INDEX IF NOT EXISTS {SIDECAR_SCHEMA}.ix_report_rows_report ON report_rows (report_id, analysis_date)",
+        # 분석 목록 (분석일 내림차순, 종목별)
+        f"CREATE INDEX IF NOT EXISTS {SIDECAR_SCHEMA}.ix_report_rows_analysis_date ON report_rows (analysis_date)",
+        f"CREATE INDEX IF NOT EXISTS {SIDECAR_SCHEMA}.ix_report_rows_stock_analysis ON report_rows (stock_code, analysis_date)",
+        # 상위 추천 (투자의견별 상승여력 내림차순)
+        f"CREATE INDEX IF NOT EXISTS {SIDECAR_SCHEMA}.ix_report_rows_upside ON report_rows (recommendation, upside_percent)",
+        # 리포트 행보다 먼저 들어온 분석 행 (리포트일 보정 대상)
+        f"""
+        CREATE INDEX IF NOT EXISTS {SIDECAR_SCHEMA}.ix_report_rows_undated
+        ON report_rows (report_id) WHERE report_date IS NULL
+        """,
+    ),
+    select="""
+        SELECT
+            ra.id AS analysis_id,
+            ra.report_id,
+            ra.stock_code,
+            sr.date AS report_date,
+            ra.analysis_date,
+            ra.recommendation,
+            CASE
+                WHEN ra.current_price > 0 AND ra.target_price IS NOT NULL
+                THEN (ra.target_price - ra.current_price) * 100.0 / ra.current_price
+            END AS upside_percent
+        FROM main.report_analysis ra
+        LEFT JOIN main.sent_reports sr ON sr.id = ra.report_id
+    """,
+    fixups=(
+        f"""
+        UPDATE {SIDECAR_SCHEMA}.report_rows
+        SET report_date = (SELECT sr.date FROM main.sent_reports sr WHERE sr.id = report_rows.report_id)
+        WHERE report_date IS NULL
+        """,
+    ),
+)
+
+# ===== 뉴스 DB 파생 테이블 =====
+
+NEWS_ROWS = DerivedTable(
+    name="news_rows",
+    source="news",
+    key="news_id",
+    schema=(
+        f"""
+        CREATE TABLE IF NOT EXISTS {SIDECAR_SCHEMA}.news_rows (
+            news_id INTEGER PRIMARY KEY,
+            sent_at TEXT,
+            source TEXT
+        )
+        """,
+        # 뉴스 목록 (발송 시각 내림차순, 소스별)
+        f"CREATE INDEX IF NOT EXISTS {SIDECAR_SCHEMA}.ix_news_rows_sent_at ON news_rows (sent_at)",
+        f"CREATE INDEX IF NOT EXISTS {SIDECAR_SCHEMA}.ix_news_rows_source ON news_rows (source, sent_at)",
+    ),
+    select="""
+        SELECT id AS news_id, sent_at, source
+        FROM main.news
+    """,
+)
+
+
+class SidecarIndex:
+    """
+    원본 DB 하나에 대한 사이드카 파생 테이블 묶음
+
+    Args:
+        name: 로그/상태 표시 이름
+        session_factory: 사이드카가 ATTACH된 원본 DB 세션 (get_reports_db 등)
+        source_path: 원본 SQLite 파일 (수정 시각으로 변경 감지)
+        tables: 파생 테이블 (조인 값 보정 순서대로)
+        full_rebuild_interval: 전체 재구성 주기
+    """
+
+    def __init__(
+        self,
+        name: str,
+        session_factory: Callable,
+        source_path: Path,
+        tables: Tuple[DerivedTable, ...],
+        full_rebuild_interval: timedelta = SIDECAR_FULL_REBUILD_INTERVAL,
+    ):
+        self.name = name
+        self.session_factory = session_factory
+        self.source_path = Path(source_path)
+        self.tables = tables
+        self.full_rebuild_interval = full_rebuild_interval
+        self._lock = threading.Lock()
+        self._schema_ready = False
+        self._background = False
+        self._synced_mtime: Optional[int] = None
+        self._next_rebuild: Optional[datetime] = None
+        self._last_result: Optional[dict] = None
+        self._last_error: Optional[str] = None
+        self._rebuilds = 0
+
+    def _ensure_schema(self, session):
+        if self._schema_ready:
+            return
+        # 사이드카 쓰기 중에도 조회가 막히지 않도록 (파일에 유지되는 설정)
+        session.execute(text(f"PRAGMA {SIDECAR_SCHEMA}.journal_mode = WAL"))
+        session.execute(text(STATE_SCHEMA))
+        for table in self.tables:
+            for statement in table.schema:
+                session.execute(text(statement))
+        session.commit()
+        self._schema_ready = True
+
+    # ===== 갱신 =====
+
+    def _sync_table(self, session, table: DerivedTable, now: datetime) -> dict:
+        """파생 테이블 하나를 원본에 맞춤 (세션 커밋은 호출 측)"""
+        state = session.execute(
+            text(f"SELECT last_id, rebuilt_at FROM {SIDECAR_SCHEMA}.sidecar_state WHERE name = :name"),
+            {"name": table.name},
+        ).fetchone()
+        last_id, rebuilt_at = (state[0], state[1]) if state else (0, None)
+
+        rebuild = False
+        if last_id:
+            copied = session.execute(text(f"SELECT COUNT(*) FROM {SIDECAR_SCHEMA}.{table.name}")).scalar()
+            source_rows = session.execute(
+                text(f"SELECT COUNT(*) FROM main.{table.source} WHERE id <= :last_id"),
+                {"last_id": last_id},
+            ).scalar()
+            due = rebuilt_at is None or now - datetime.fromisoformat(rebuilt_at) >= self.full_rebuild_interval
+            rebuild = copied != source_rows or due
+        if rebuild or not last_id:
+            session.execute(text(f"DELETE FROM {SIDECAR_SCHEMA}.{table.name}"))
+            last_id, rebuilt_at = 0, now.isoformat()
+
+        top_id = session.execute(text(f"SELECT MAX(id) FROM main.{table.source}")).scalar() or 0
+        added = 0
+        if top_id > last_id:
+            added = session.execute(text(table.fill), {"last_id": last_id, "top_id": top_id}).rowcount
+        for statement in table.fixups:
+            session.execute(text(statement))
+
+        session.execute(
+            text(f"""
+                INSERT INTO {SIDECAR_SCHEMA}.sidecar_state (name, last_id, synced_at, rebuilt_at)
+                VALUES (:name, :last_id, :synced_at, :rebuilt_at)
+                ON CONFLICT (name) DO UPDATE SET
+                    last_id = excluded.last_id,
+                    synced_at = excluded.synced_at,
+                    rebuilt_at = excluded.rebuilt_at
+            """),
+            {"name": table.name, "last_id": top_id, "synced_at": now.isoformat(), "rebuilt_at": rebuilt_at},
+        )
+        return {"added": added, "rebuilt": rebuild, "rebuilt_at": rebuilt_at}
+
+    def ensure_fresh(self, force: bool = False) -> Optional[dict]:
+        """
+        원본 DB가 바뀌었으면 사이드카 파생 테이블을 증분 갱신 (블로킹 - 요청 경로에서 호출 금지)
+
+        원본 파일 수정 시각이 그대로이고 재구성 주기 전이면 stat 한 번으로 끝납니다.
+        갱신에 실패하면 경고를 남기고, 다음 성공 전까지 ready()가 False가 되어
+        목록 쿼리는 원본 테이블에서 실행됩니다.
+        Returns:
+            {"tables": {이름: {"added", "rebuilt"}}, "seconds": 소요 시간} 또는 None(건너뜀/실패)
+        """
+        mtime = sqlite_mtime(self.source_path)
+        if not force and self._fresh(mtime):
+            return None
+
+        with self._lock:
+            if not force and self._fresh(mtime):
+                return None
+            start_time = time.time()
+            now = datetime.now()
+            try:
+                with self.session_factory() as session:
+                    self._ensure_schema(session)
+                    results = {table.name: self._sync_table(session, table, now) for table in self.tables}
+                    session.commit()
+            except Exception as e:
+                self._last_error = str(e)
+                print(f"⚠️ {self.name} 사이드카 인덱스 갱신 실패: {e}")
+                return None
+
+            # 갱신 도중 원본이 또 바뀌었으면 다음 확인에서 다시 갱신 (갱신 전 시각으로 기록)
+            self._synced_mtime = mtime
+            self._last_error = None
+            oldest = min(datetime.fromisoformat(result.pop("rebuilt_at")) for result in results.values())
+            self._next_rebuild = oldest + self.full_rebuild_interval
+            rebuilt = [name for name, result in results.items() if result["rebuilt"]]
+            if rebuilt:
+                self._rebuilds += 1
+                print(f"♻️ {self.name} 사이드카: 원본 변경/재구성 주기로 전체 재구성 ({', '.join(rebuilt)})")
+            self._last_result = {
+                "tables": results,
+                "seconds": round(time.time() - start_time, 3),
+            }
+            added = sum(result["added"] for result in results.values())
+            if added:
+                print(f"✅ {self.name} 사이드카 인덱스 갱신: {added}행 반영 ({self._last_result['seconds']}초)")
+            return self._last_result
+
+    def _fresh(self, mtime: Optional[int]) -> bool:
+        return (
+            self._synced_mtime is not None
+            and mtime == self._synced_mtime
+            and self._next_rebuild is not None
+            and datetime.now() < self._next_rebuild
+        )
+
+    def refresh_in_background(self) -> bool:
+        """갱신이 필요하면 백그라운드 스레드에서 ensure_fresh (Returns: 새로 시작했는지)"""
+        with self._lock:
+            if self._background:
+                return False
+            self._background = True
+
+        def run():
+            try:
+                self.ensure_fresh()
+            finally:
+                self._background = False
+
+        threading.Thread(target=run, name=f"sidecar-{self.source_path.stem}", daemon=True).start()
+        return True
+
+    def ready(self) -> bool:
+        """
+        사이드카가 원본과 같은 상태라 인덱스 쿼리를 써도 되는지
+
+        원본이 바뀌었거나 재구성 주기가 지났으면 백그라운드 갱신을 시작합니다.
+        재구성 중에도 이전 사이드카는 원본과 같으므로 계속 True.
+        """
+        mtime = sqlite_mtime(self.source_path)
+        if not self._fresh(mtime):
+            self.refresh_in_background()
+        return self._synced_mtime is not None and mtime == self._synced_mtime and self._last_error is None
+
+    # ===== 조회 =====
+
+    def render(self, template: str, indexed: Optional[bool] = None) -> str:
+        """
+        쿼리 템플릿의 {파생 테이블} 자리를 채움
+
+        indexed가 True면 사이드카 테이블, False면 원본 테이블에서 같은 열을 만드는 SELECT
+        (None이면 ready()로 결정)
+        """
+        if indexed is None:
+            indexed = self.ready()
+        return template.format(**{
+            table.name: f"{SIDECAR_SCHEMA}.{table.name}" if indexed else f"({table.select})"
+            for table in self.tables
+        })
+
+    def explain(self, query: str, params: Optional[dict] = None) -> List[str]:
+        """쿼리의 EXPLAIN QUERY PLAN 단계 (detail 열)"""
+        with self.session_factory() as session:
+            rows = session.execute(text(f"EXPLAIN QUERY PLAN {query}"), params or {}).fetchall()
+        return [row[3] for row in rows]
+
+    def status(self) -> dict:
+        with self.session_factory() as session:
+            self._ensure_schema(session)
+            state = {
+                row[0]: {"last_id": row[1], "synced_at": row[2], "rebuilt_at": row[3]}
+                for row in session.execute(
+                    text(f"SELECT name, last_id, synced_at, rebuilt_at FROM {SIDECAR_SCHEMA}.sidecar_state")
+                )
+            }
+            for table in self.tables:
+                state.setdefault(table.name, {})["rows"] = session.execute(
+                    text(f"SELECT COUNT(*) FROM {SIDECAR_SCHEMA}.{table.name}")
+                ).scalar()
+        return {
+            "source": str(self.source_path),
+            "ready": self.ready(),
+            "tables": state,
+            "next_rebuild": self._next_rebuild.isoformat() if self._next_rebuild else None,
+            "last_sync": self._last_result,
+            "last_error": self._last_error,
+            "rebuilds": self._rebuilds,
+        }
+
+
+# 프로세스 공용 사이드카 인덱스
+reports_index = SidecarIndex("리포트", get_reports_db, REPORTS_DB_PATH, (REPORT_LIST, REPORT_ROWS))
+news_index = SidecarIndex("뉴스", get_news_db, NEWS_DB_PATH, (NEWS_ROWS,))
+
+
+# ===== 사이드카 인덱스를 거치는 목록 쿼리 (템플릿 - SidecarIndex.render로 채움) =====
+# 사이드카 테이블을 바깥 루프로 고정하려고 CROSS JOIN을 씁니다
+# (SQLite는 CROSS JOIN의 조인 순서를 바꾸지 않음 - 원본 행은 기본키로만 조회)
+
+STOCK_REPORTS_QUERY = """
+    SELECT
+        ra.id,
+        ra.report_id,
+        sr.date as report_date,
+        sr.title as report_title,
+        sr.category as report_category,
+        h.name as house_name,
+        a.name as analyst_name,
+        ra.current_price,
+        ra.target_price,
+        ra.recommendation,
+        ra.adjustment_type,
+        ra.profit_impact,
+        CASE WHEN ra.target_price > 0 THEN ROUND(x.upside_percent, 2) END as upside_percent,
+        sr.pdf_url
+    FROM {report_rows} x
+    CROSS JOIN report_analysis ra ON ra.id = x.analysis_id
+    CROSS JOIN sent_reports sr ON sr.id = x.report_id
+    LEFT JOIN houses h ON ra.house_id = h.id
+    LEFT JOIN analysts a ON ra.analyst_id = a.id
+    WHERE x.stock_code = :stock_code
+    ORDER BY x.report_date DESC, x.analysis_id DESC
+    LIMIT :limit OFFSET :offset
+"""
+
+TARGET_PRICE_HISTORY_QUERY = """
+    SELECT
+        sr.date,
+        ra.target_price,
+        ra.current_price,
+        h.name as house_name,
+        ra.recommendation
+    FROM {report_rows} x
+    CROSS JOIN report_analysis ra ON ra.id = x.analysis_id
+    CROSS JOIN sent_reports sr ON sr.id = x.report_id
+    LEFT JOIN houses h ON ra.house_id = h.id
+    WHERE x.stock_code = :stock_code
+    AND ra.target_price IS NOT NULL
+    ORDER BY x.report_date ASC
+"""
+
+RECOMMENDATION_SUMMARY_QUERY = """
+    SELECT
+        x.recommendation,
+        COUNT(*) as count,
+        AVG(ra.target_price) as avg_target,
+        MAX(sr.date) as latest_date
+    FROM {report_rows} x
+    CROSS JOIN report_analysis ra ON ra.id = x.analysis_id
+    CROSS JOIN sent_reports sr ON sr.id = x.report_id
+    WHERE x.stock_code = :stock_code
+    AND x.recommendation IS NOT NULL
+    GROUP BY x.recommendation
+    ORDER BY count DESC
+"""
+
+
+def report_list_query(by_category: bool) -> str:
+    """리포트 목록 (날짜 내림차순)"""
+    return """
+        SELECT sr.id, sr.date, sr.category, sr.title, sr.file_path, sr.pdf_url, sr.sent
+        FROM {report_list} x
+        CROSS JOIN sent_reports sr ON sr.id = x.report_id
+        """ + ("WHERE x.category = :category" if by_category else "") + """
+        ORDER BY x.date DESC
+        LIMIT :limit OFFSET :offset
+    """
+
+
+REPORT_STOCKS_QUERY = """
+    SELECT ra.stock_name, ra.recommendation, ra.target_price, ra.current_price,
+           ra.adjustment_type, ra.profit_impact
+    FROM {report_rows} x
+    CROSS JOIN report_analysis ra ON ra.id = x.analysis_id
+    WHERE x.report_id = :report_id AND ra.stock_name IS NOT NULL
+    LIMIT 3
+"""
+
+
+def report_analysis_query(by_report: bool, by_stock: bool) -> str:
+    """리포트 분석 목록 (분석일 내림차순, 리포트/종목 필터 선택)"""
+    filters = ""
+    if by_report:
+        filters += " AND x.report_id = :report_id"
+    if by_stock:
+        filters += " AND x.stock_code = :stock_code"
+    return """
+        SELECT
+            ra.id, ra.report_id, ra.stock_code, ra.stock_name,
+            ra.current_price, ra.target_price, ra.price_change,
+            ra.recommendation, ra.adjustment_type, ra.profit_impact,
+            ra.analysis_date,
+            sr.title, sr.category, sr.pdf_url
+        FROM {report_rows} x
+        CROSS JOIN report_analysis ra ON ra.id = x.analysis_id
+        LEFT JOIN sent_reports sr ON ra.report_id = sr.id
+        WHERE 1=1""" + filters + """
+        ORDER BY x.analysis_date DESC
+        LIMIT :limit
+    """
+
+
+TOP_RECOMMENDATIONS_QUERY = """
+    SELECT
+        ra.stock_code, ra.stock_name,
+        ra.current_price, ra.target_price,
+        x.upside_percent,
+        ra.recommendation, ra.analysis_date,
+        sr.title AS report_title, sr.pdf_url
+    FROM {report_rows} x
+    CROSS JOIN report_analysis ra ON ra.id = x.analysis_id
+    CROSS JOIN sent_reports sr ON sr.id = x.report_id
+    WHERE x.recommendation = 'BUY'
+      AND x.upside_percent IS NOT NULL
+    ORDER BY x.upside_percent DESC
+    LIMIT :limit
+"""
+
+
+def news_list_query(by_source: bool) -> str:
+    """뉴스 목록 (발송 시각 내림차순)"""
+    return """
+        SELECT n.id, n.title, n.link, n.source, n.sent_at
+        FROM {news_rows} x
+        CROSS JOIN news n ON n.id = x.news_id
+        """ + ("WHERE x.source = :source" if by_source else "") + """
+        ORDER BY x.sent_at DESC
+        LIMIT :limit OFFSET :offset
+    """
+
+
+NEWS_COUNT_BY_SOURCE_QUERY = "SELECT COUNT(*) FROM {news_rows} x WHERE x.source = :source"
+
+
+# ===== 실행 계획 검증 =====
+
+# (이름, 사이드카 인덱스, 쿼리 템플릿, 예시 파라미터) - 인덱스 범위 스캔이어야 하는 목록 쿼리
+PLAN_CHECKS: Tuple[Tuple[str, SidecarIndex, str, dict], ...] = (
+    ("stock_reports", reports_index, STOCK_REPORTS_QUERY, {"stock_code": "005930", "limit": 50, "offset": 0}),
+    ("target_price_history", reports_index, TARGET_PRICE_HISTORY_QUERY, {"stock_code": "005930"}),
+    ("reports", reports_index, report_list_query(False), {"limit": 25, "offset": 0}),
+    ("reports_by_category", reports_index, report_list_query(True), {"category": "기업", "limit": 25, "offset": 0}),
+    ("report_stocks", reports_index, REPORT_STOCKS_QUERY, {"report_id": 1}),
+    ("report_analysis", reports_index, report_analysis_query(False, False), {"limit": 50}),
+    ("report_analysis_by_stock", reports_index, report_analysis_query(False, True), {"stock_code": "005930", "limit": 50}),
+    ("top_recommendations", reports_index, TOP_RECOMMENDATIONS_QUERY, {"limit": 10}),
+    ("news", news_index, news_list_query(False), {"limit": 25, "offset": 0}),
+    ("news_by_source", news_index, news_list_query(True), {"source": "reuters", "limit": 25, "offset": 0}),
+    ("news_count_by_source", news_index, NEWS_COUNT_BY_SOURCE_QUERY, {"source": "reuters"}),
+)
+
+
+def plan_problems(plan: List[str]) -> List[str]:
+    """인덱스 없이 테이블 전체를 읽거나 정렬용 임시 B-트리를 만드는 단계"""
+    problems = []
+    for detail in plan:
+        if detail.startswith("SCAN") and "USING" not in detail:
+            problems.append(detail)
+        elif "USE TEMP B-TREE" in detail:
+            problems.append(detail)
+    return problems
+
+
+def verify_query_plans(sync: bool = True) -> List[dict]:
+    """
+    PLAN_CHECKS 쿼리의 사이드카 실행 계획 확인
+
+    Args:
+        sync: 확인 전에 사이드카를 갱신 (블로킹 - 테이블/인덱스가 있어야 계획이 의미 있음)
+    """
+    if sync:
+        for index in {id(index): index for _, index, _, _ in PLAN_CHECKS}.values():
+            index.ensure_fresh()
+
+    results = []
+    for name, index, template, params in PLAN_CHECKS:
+        try:
+            plan = index.explain(index.render(template, indexed=True), params)
+            problems = plan_problems(plan)
+        except Exception as e:
+            plan, problems = [], [f"실행 계획 조회 실패: {e}"]
+        results.append({"name": name, "plan": plan, "problems": problems, "ok": not problems})
+    return results
+
+
+if __name__ == "__main__":
+    """목록 쿼리 실행 계획 검증 (문제가 있으면 종료 코드 1)"""
+    print("\n🔍 사이드카 인덱스 실행 계획 검증\n" + "=" * 60)
+
+    results = verify_query_plans()
+    for result in results:
+        print(f"\n{'✅' if result['ok'] else '❌'} {result['name']}")
+        for detail in result["plan"]:
+            print(f"    {detail}")
+        for problem in result["problems"]:
+            print(f"  ⚠️ {problem}")
+
+    failed = [result["name"] for result in results if not result["ok"]]
+    print("\n" + "=" * 60)
+    print(f"{len(results) - len(failed)}/{len(results)} 통과" + (f" (실패: {', '.join(failed)})" if failed else ""))
+    sys.exit(1 if failed else 0)
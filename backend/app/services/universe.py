@@ -0,0 +1,255 @@
+"""
+종목 유니버스 레지스트리
+52주 스캔 대상(S&P 500 + NASDAQ 100 + 추가 종목)을 버전과 적용일이 붙은
+로컬 파일로 관리합니다.
+
+- 최초 실행 / 오프라인: 저장소에 포함된 universe_bundled.json 사용
+- 위키피디아 구성종목 조회는 하루에 한 번만 (갱신 루프에서 HTML 파싱 제거)
+- 구성종목이 바뀌면 새 버전을 만들고 추가/제외 종목 diff를 변경 로그에 기록
+- 조회 결과가 비정상적으로 작으면(일부 실패) 기존 버전을 유지해 스캔 대상이 줄지 않음
+"""
+
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+import json
+import os
+import tempfile
+import threading
+
+import pandas as pd
+
+from app.database import DATA_DIR
+
+UNIVERSE_DIR = DATA_DIR / "universe"
+BUNDLED_UNIVERSE_PATH = Path(__file__).parent / "universe_bundled.json"
+
+# 위키피디아 재조회 주기
+UNIVERSE_REFRESH_INTERVAL = timedelta(days=1)
+
+# 조회 결과를 받아들이는 최소 종목 수 (이보다 작으면 파싱 실패로 간주)
+MIN_INDEX_SIZE = {"sp500": 450, "nasdaq100": 90}
+
+WIKIPEDIA_SOURCES = {
+    "sp500": ("https://en.wikipedia.org/wiki/List_of_S%26P_500_companies", ("Symbol", "Ticker", "Ticker symbol")),
+    "nasdaq100": ("https://en.wikipedia.org/wiki/NASDAQ-100", ("Ticker", "Symbol", "Ticker symbol")),
+}
+
+
+@dataclass(frozen=True)
+class UniverseVersion:
+    """유니버스 한 버전 (지수별 구성종목)"""
+    version: int
+    effective_date: str
+    source: str
+    indexes: Dict[str, Tuple[str, ...]]
+    checked_at: Optional[str] = None  # 마지막으로 원본과 대조한 시각
+
+    @property
+    def tickers(self) -> List[str]:
+        """전체 스캔 대상 (중복 제거, 정렬)"""
+        return sorted({symbol for members in self.indexes.values() for symbol in members})
+
+    def to_dict(self) -> dict:
+        data = asdict(self)
+        data["indexes"] = {name: list(members) for name, members in self.indexes.items()}
+        return data
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "UniverseVersion":
+        return cls(
+            version=data["version"],
+            effective_date=data["effective_date"],
+            source=data["source"],
+            indexes={name: tuple(members) for name, members in data["indexes"].items()},
+            checked_at=data.get("checked_at"),
+        )
+
+
+@dataclass(frozen=True)
+class UniverseDiff:
+    """두 버전 사이 구성종목 변경"""
+    from_version: int
+    to_version: int
+    effective_date: str
+    added: Dict[str, List[str]] = field(default_factory=dict)
+    removed: Dict[str, List[str]] = field(default_factory=dict)
+
+    @property
+    def is_empty(self) -> bool:
+        return not any(self.added.values()) and not any(self.removed.values())
+
+
+def diff_universe(old: UniverseVersion, new: UniverseVersion) -> UniverseDiff:
+    """지수별 추가/제외 종목 계산"""
+    added, removed = {}, {}
+    for name in sorted(set(old.indexes) | set(new.indexes)):
+        before = set(old.indexes.get(name, ()))
+        after = set(new.indexes.get(name, ()))
+        if after - before:
+            added[name] = sorted(after - before)
+        if before - after:
+            removed[name] = sorted(before - after)
+    return UniverseDiff(
+        from_version=old.version,
+        to_version=new.version,
+        effective_date=new.effective_date,
+        added=added,
+        removed=removed,
+    )
+
+
+def fetch_wikipedia_index(name: str) -> List[str]:
+    """위키피디아 구성종목 표에서 티커 목록 추출 (BRK.B -> BRK-B)"""
+    import requests
+
+    url, columns = WIKIPEDIA_SOURCES[name]
+    response = requests.get(url, headers={'User-Agent': 'Mozilla/5.0'}, timeout=10)
+    response.raise_for_status()
+    for table in pd.read_html(response.content):
+        for col in columns:
+            if col in table.columns:
+                return sorted(set(table[col].astype(str).str.replace('.', '-').str.strip()))
+    raise ValueError(f"{name}: 티커 컬럼을 찾을 수 없습니다")
+
+
+class UniverseRegistry:
+    """로컬 파일 기반 유니버스 레지스트리"""
+
+    def __init__(self, root: Path = UNIVERSE_DIR, bundled_path: Path = BUNDLED_UNIVERSE_PATH):
+        self.root = Path(root)
+        self.bundled_path = Path(bundled_path)
+        self.current_path = self.root / "current.json"
+        self.changes_path = self.root / "changes.jsonl"
+        self._lock = threading.Lock()
+        self._current: Optional[UniverseVersion] = None
+
+    # ===== 저장 =====
+
+    def _load(self) -> UniverseVersion:
+        """락을 잡은 상태에서 호출: 로컬 버전, 없으면 번들 스냅샷"""
+        if self._current is not None:
+            return self._current
+        for path in (self.current_path, self.bundled_path):
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    self._current = UniverseVersion.from_dict(json.load(f))
+                return self._current
+            except FileNotFoundError:
+                continue
+            except Exception as e:
+                print(f"⚠️ 유니버스 로드 실패 ({path.name}): {e}")
+        raise RuntimeError("유니버스 파일이 없습니다")
+
+    def _save(self, universe: UniverseVersion):
+        """락을 잡은 상태에서 호출: 임시 파일에 쓴 뒤 원자적으로 교체"""
+        self.root.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.root, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(universe.to_dict(), f, ensure_ascii=False, indent=1)
+            os.replace(tmp_path, self.current_path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        self._current = universe
+
+    def _append_change(self, diff: UniverseDiff):
+        self.root.mkdir(parents=True, exist_ok=True)
+        with open(self.changes_path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(asdict(diff), ensure_ascii=False) + "\n")
+
+    # ===== 조회 =====
+
+    def current(self) -> UniverseVersion:
+        with self._lock:
+            return self._load()
+
+    def tickers(self) -> List[str]:
+        return self.current().tickers
+
+    def changes(self, limit: int = 20) -> List[dict]:
+        """최근 구성종목 변경 이력 (최신순)"""
+        try:
+            with open(self.changes_path, "r", encoding="utf-8") as f:
+                lines = f.readlines()
+        except FileNotFoundError:
+            return []
+        return [json.loads(line) for line in reversed(lines[-limit:])]
+
+    # ===== 갱신 =====
+
+    def is_due(self) -> bool:
+        current = self.current()
+        if current.checked_at is None:
+            return True
+        return datetime.now() - datetime.fromisoformat(current.checked_at) > UNIVERSE_REFRESH_INTERVAL
+
+    def refresh(self, force: bool = False) -> Optional[UniverseDiff]:
+        """
+        원본(위키피디아)과 대조해 구성종목이 바뀌었으면 새 버전 저장
+
+        하루에 한 번만 실제로 조회합니다 (force=True면 즉시).
+        조회에 실패하거나 결과가 너무 작은 지수는 기존 구성을 유지합니다.
+        Returns: 변경이 있으면 diff, 없으면 None
+        """
+        if not force and not self.is_due():
+            return None
+
+        fetched = {}
+        for name in WIKIPEDIA_SOURCES:
+            try:
+                members = fetch_wikipedia_index(name)
+            except Exception as e:
+                print(f"⚠️ {name} 구성종목 조회 실패: {e}")
+                continue
+            if len(members) < MIN_INDEX_SIZE.get(name, 1):
+                print(f"⚠️ {name} 구성종목이 {len(members)}개뿐이라 무시합니다")
+                continue
+            fetched[name] = tuple(members)
+
+        now = datetime.now()
+        with self._lock:
+            current = self._load()
+            indexes = {**current.indexes, **fetched}
+            candidate = UniverseVersion(
+                version=current.version + 1,
+                effective_date=now.strftime("%Y-%m-%d"),
+                source="wikipedia" if fetched else current.source,
+                indexes=indexes,
+                checked_at=now.isoformat(),
+            )
+            diff = diff_universe(current, candidate)
+
+            if diff.is_empty:
+                # 구성 변경 없음: 대조 시각만 기록
+                self._save(UniverseVersion(
+                    version=current.version,
+                    effective_date=current.effective_date,
+                    source=current.source,
+                    indexes=current.indexes,
+                    checked_at=now.isoformat(),
+                ))
+                return None
+
+            self._save(candidate)
+            self._append_change(diff)
+
+        added = sum(len(v) for v in diff.added.values())
+        removed = sum(len(v) for v in diff.removed.values())
+        print(f"🔁 유니버스 v{diff.to_version}: 추가 {added}개, 제외 {removed}개")
+        return diff
+
+    def refresh_if_due(self) -> Optional[UniverseDiff]:
+        """갱신 주기가 지났으면 대조 (실패해도 현재 버전 유지)"""
+        try:
+            return self.refresh()
+        except Exception as e:
+            print(f"⚠️ 유니버스 갱신 실패: {e}")
+            return None
+
+
+# 프로세스 공용 레지스트리
+universe_registry = UniverseRegistry()
@@ -0,0 +1,191 @@
+"""
+52주 신고가/신저가 스냅샷 수집
+유니버스 종목의 가격을 갱신 계층별로 동기화하고 52주 지표·메타데이터로 종목 레코드를 만든 뒤
+불변 스냅샷으로 게시합니다. 라우터(/api/52week, /api/sectors/breadth)는 이 모듈의
+접근자로 현재 스냅샷만 읽습니다.
+"""
+
+from typing import Dict, List, Optional
+import time
+
+import numpy as np
+import pandas as pd
+
+from app.services.breadth_history import breadth_history, compute_daily_breadth
+from app.services.market_calendar import NYSE
+from app.services.price_store import price_store
+from app.services.refresh_scheduler import REFRESH_TIERS, refresh_scheduler
+from app.services.security_metadata import SecurityMetadata, security_metadata
+from app.services.universe import universe_registry
+from app.services.week52_engine import Week52Result, compute_week52
+from app.services.week52_snapshot import WEEK52_SNAPSHOT_FORMAT, RecordColumns, Week52Snapshot, build_snapshot
+from app.services.week52_stream import week52_stream
+from app.utils.refresh import RefreshCoordinator
+from app.utils.shared_snapshot import SharedSnapshotStore
+
+
+def get_all_tickers() -> List[str]:
+    """
+    스캔 대상 종목 (S&P 500 + NASDAQ 100 + 추가 종목, 중복 제거)
+    
+    로컬 유니버스 레지스트리에서 읽고, 구성종목 대조는 하루에 한 번만 합니다.
+    """
+    universe_registry.refresh_if_due()
+    universe = universe_registry.current()
+    tickers = universe.tickers
+    counts = ", ".join(f"{name}: {len(members)}" for name, members in universe.indexes.items())
+    print(f"✅ 총 {len(tickers)}개 종목 로드 (유니버스 v{universe.version}, {universe.effective_date} / {counts})")
+    return tickers
+
+
+def categorize_market_cap(market_cap_billions: float) -> str:
+    """시총 기준 분류 (단위: 십억 달러)"""
+    market_cap = market_cap_billions * 1000  # 조 -> 십억 달러
+    if market_cap >= 200:
+        return "대형주 (Mega Cap)"
+    elif market_cap >= 10:
+        return "대형주 (Large Cap)"
+    elif market_cap >= 2:
+        return "중형주 (Mid Cap)"
+    else:
+        return "소형주 (Small Cap)"
+
+
+def build_stock_records(result: Week52Result, metadata: Dict[str, SecurityMetadata]) -> List[dict]:
+    """
+    52주 엔진 결과와 메타데이터로 종목 데이터 목록 생성
+    
+    시가총액은 발행주식수 × 현재가로 계산합니다.
+    """
+    records = []
+    for i, symbol in enumerate(result.tickers):
+        current_price = result.price[i]
+        if pd.isna(current_price) or current_price <= 0:
+            continue
+        
+        meta = metadata.get(symbol)
+        near_high = bool(result.near_high[i])
+        near_low = bool(result.near_low[i])
+        
+        market_cap_value = meta.market_cap(float(current_price)) if meta else 0
+        market_cap_billions = round(market_cap_value / 1e12, 2)  # 조 달러
+        market_cap_category = categorize_market_cap(market_cap_billions)
+        
+        records.append({
+            "symbol": symbol,
+            "name": meta.name if meta else symbol,
+            "price": round(float(current_price), 2),
+            "high_52week": round(float(result.high_52week[i]), 2),
+            "low_52week": round(float(result.low_52week[i]), 2),
+            "change": round(float(result.change[i]), 2),
+            "change_percent": round(float(result.change_percent[i]), 2),
+            "days_at_high": int(result.days_at_high[i]) if near_high else None,
+            "days_at_low": int(result.days_at_low[i]) if near_low else None,
+            "sector": meta.sector if meta else "Unknown",
+            "market_cap": market_cap_billions,
+            "market_cap_value": float(market_cap_value),  # 달러 (반올림 전 - 시총 정렬/가중치용)
+            "volume": round(float(result.volume[i]) / 1e6, 1),  # 백만
+            "market_cap_category": market_cap_category,
+            "is_near_high": near_high,
+            "is_near_low": near_low
+        })
+    return records
+
+
+def fetch_all_stocks_data() -> List[dict]:
+    """
+    모든 종목 데이터 가져오기
+    
+    가격은 갱신 계층별 주기가 지난 종목만 업스트림에서 받아 로컬 스토어에 병합하고,
+    52주 계산은 스토어 전체로 다시 수행합니다 (나머지 종목은 저장된 봉 사용).
+    """
+    week52_refresh.report_progress("종목 리스트 로드")
+    tickers = get_all_tickers()
+    
+    market_open = NYSE.is_open()
+    due = refresh_scheduler.due(tickers)
+    print(f"📊 {len(tickers)}개 종목 중 {len(due)}개 가격 갱신 (장 {'중' if market_open else '외'})...")
+    start_time = time.time()
+    
+    # 주기가 된 종목만 증분 동기화 (데이터를 받은 종목만 갱신 완료 처리)
+    week52_refresh.report_progress("가격 동기화", 0, len(due))
+    if due:
+        _, received = price_store.sync_tickers(due)
+        refresh_scheduler.mark_refreshed(received)
+    
+    # 2년치 행렬을 로컬 스토어에서 로드해 벡터 연산
+    # (브레드스 히스토리 1년치에 52주 윈도우가 다 차도록)
+    start = str(np.datetime64("today", "D") - 730)
+    matrix = price_store.load_matrix(tickers, start=start)
+    week52_refresh.report_progress("52주 계산", len(matrix), len(tickers))
+    result = compute_week52(matrix)
+    
+    # 메타데이터는 하루 TTL 캐시에서 읽고, 만료된 종목만 다시 수집
+    metadata = security_metadata.ensure(
+        matrix.tickers,
+        progress=lambda done, total: week52_refresh.report_progress("메타데이터 수집", done, total),
+    )
+    all_data = build_stock_records(result, metadata)
+    
+    # 다음 갱신의 계층 배정 (신고가/신저가 근처, 시총 기준)
+    refresh_scheduler.assign(all_data)
+    
+    # 일별 브레드스 히스토리 적재 (최초 1회 백필, 이후 거래일당 1행)
+    week52_refresh.report_progress("브레드스 히스토리 적재")
+    breadth_history.record(compute_daily_breadth(matrix, result))
+    
+    elapsed = time.time() - start_time
+    print(f"✅ {len(all_data)}개 종목 데이터 수집 완료 ({elapsed:.1f}초)")
+    
+    return all_data
+
+
+def load_week52_snapshot() -> Week52Snapshot:
+    """스냅샷 loader: 전체 종목 수집 결과와 조회 인덱스를 불변 스냅샷으로 반환"""
+    data = fetch_all_stocks_data()
+    if not data:
+        # 빈 결과로 기존 스냅샷을 덮어쓰지 않도록 실패 처리
+        raise RuntimeError("수집된 종목 데이터가 없습니다")
+    week52_refresh.report_progress("조회 인덱스 생성")
+    return build_snapshot(data)
+
+
+# 52주 스냅샷 갱신 코디네이터 (stale-while-revalidate)
+# 장중 5분마다, 마감 후 종가 확정 시 한 번, 이후 다음 개장까지 갱신하지 않음
+# 매 갱신에서 업스트림 호출은 계층별 주기가 된 종목만 (refresh_scheduler)
+# 멀티 워커에서는 한 워커만 수집하고 나머지는 공유 스냅샷 파일을 읽음
+week52_refresh = RefreshCoordinator(
+    "week52",
+    load_week52_snapshot,
+    max_age=lambda built_at: NYSE.refresh_interval(
+        built_at, open_interval=min(tier.open_interval for tier in REFRESH_TIERS)
+    ),
+    # 스냅샷 형식이 바뀌면 파일 이름도 바꿔 이전 형식을 읽지 않도록 함
+    shared=SharedSnapshotStore(f"week52-v{WEEK52_SNAPSHOT_FORMAT}"),
+)
+
+
+# 새 스냅샷이 게시될 때마다 구독 중인 대시보드에 변경분 전송 (GET /api/52week/stream)
+week52_refresh.subscribe(week52_stream.on_publish)
+# 리더 워커가 적재한 브레드스 히스토리 행을 팔로워의 인메모리 사본에도 반영
+week52_refresh.on_adopt(lambda snapshot: breadth_history.invalidate())
+
+
+_EMPTY_SNAPSHOT = Week52Snapshot.empty()
+
+
+def get_cached_snapshot() -> Week52Snapshot:
+    """현재 52주 스냅샷 (만료 시 백그라운드 갱신만 트리거)"""
+    snapshot = week52_refresh.get()
+    return snapshot.data if snapshot else _EMPTY_SNAPSHOT
+
+
+def get_cached_data() -> RecordColumns:
+    """현재 스냅샷의 종목 데이터"""
+    return get_cached_snapshot().records
+
+
+def get_last_update() -> Optional[str]:
+    """현재 스냅샷 생성 시각"""
+    snapshot = week52_refresh.snapshot
+    return snapshot.built_at.isoformat() if snapshot else None
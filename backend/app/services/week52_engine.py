@@ -0,0 +1,154 @@
+"""
+52주 신고가/신저가 벡터 연산 엔진
+(종목 × 거래일) 가격 행렬 전체에 대해 한 번에
+롤링 252일 최고/최저가, 근접 여부, 연속 일수를 계산합니다.
+"""
+
+from dataclasses import dataclass
+from typing import List, Tuple
+
+import numpy as np
+import pandas as pd
+
+from app.services.price_source import PriceMatrix
+
+# 52주 = 252 거래일
+WEEK52_WINDOW = 252
+
+# 52주 고가/저가 대비 근접 기준 (3%)
+NEAR_THRESHOLD = 0.03
+
+
+@dataclass(frozen=True)
+class Week52Result:
+    """종목별 52주 지표 (모든 배열의 첫 번째 축은 tickers 순서)"""
+
+    tickers: List[str]
+    dates: pd.DatetimeIndex
+    price: np.ndarray
+    prev_close: np.ndarray
+    change: np.ndarray
+    change_percent: np.ndarray
+    volume: np.ndarray
+    high_52week: np.ndarray
+    low_52week: np.ndarray
+    near_high: np.ndarray
+    near_low: np.ndarray
+    days_at_high: np.ndarray
+    days_at_low: np.ndarray
+    # (종목 × 거래일) 일별 근접 여부 - 브레드스 히스토리 계산용
+    near_high_daily: np.ndarray
+    near_low_daily: np.ndarray
+
+
+def forward_fill(values: np.ndarray) -> np.ndarray:
+    """거래일 축(axis=1) 방향으로 결측값을 직전 값으로 채우기"""
+    if values.size == 0:
+        return values
+    mask = np.isnan(values)
+    idx = np.where(~mask, np.arange(values.shape[1]), 0)
+    np.maximum.accumulate(idx, axis=1, out=idx)
+    filled = values[np.arange(values.shape[0])[:, None], idx]
+    # 첫 유효값 이전 구간은 NaN 유지
+    filled[np.cumsum(~mask, axis=1) == 0] = np.nan
+    return filled
+
+
+def rolling_max(values: np.ndarray, window: int) -> np.ndarray:
+    """거래일 축 방향 롤링 최댓값 (NaN 무시)"""
+    if values.size == 0:
+        return values
+    frame = pd.DataFrame(values.T)
+    return frame.rolling(window, min_periods=1).max().to_numpy().T
+
+
+def rolling_min(values: np.ndarray, window: int) -> np.ndarray:
+    """거래일 축 방향 롤링 최솟값 (NaN 무시)"""
+    if values.size == 0:
+        return values
+    frame = pd.DataFrame(values.T)
+    return frame.rolling(window, min_periods=1).min().to_numpy().T
+
+
+def trailing_streak(flags: np.ndarray) -> np.ndarray:
+    """마지막 거래일부터 거슬러 올라가며 연속으로 True인 일수"""
+    if flags.size == 0:
+        return np.zeros(flags.shape[0], dtype=int)
+    reversed_flags = flags[:, ::-1]
+    all_true = reversed_flags.all(axis=1)
+    first_false = np.argmin(reversed_flags, axis=1)
+    return np.where(all_true, flags.shape[1], first_false)
+
+
+def last_two_bars(values: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    종목별 마지막 유효 봉과 그 직전 유효 봉의 값
+
+    티어별 갱신으로 오늘 봉이 아직 없는 종목은 마지막 열이 비어 있으므로,
+    forward_fill된 마지막 두 열이 아니라 각 행의 실제 마지막 두 봉을 씁니다
+    (그렇지 않으면 등락이 0으로 계산되어 보합으로 집계됨).
+    직전 봉이 없으면 마지막 봉 값, 유효 봉이 없으면 NaN
+    """
+    rows = np.arange(values.shape[0])
+    columns = np.arange(values.shape[1])
+    valid = ~np.isnan(values)
+    last = values.shape[1] - 1 - np.argmax(valid[:, ::-1], axis=1)
+    before = valid & (columns < last[:, None])
+    prev = values.shape[1] - 1 - np.argmax(before[:, ::-1], axis=1)
+
+    latest = np.where(valid.any(axis=1), values[rows, last], np.nan)
+    previous = np.where(before.any(axis=1), values[rows, prev], latest)
+    return latest, previous
+
+
+def compute_week52(
+    matrix: PriceMatrix,
+    window: int = WEEK52_WINDOW,
+    threshold: float = NEAR_THRESHOLD,
+) -> Week52Result:
+    """가격 행렬 전체에 대해 52주 지표를 한 번에 계산"""
+    close = forward_fill(matrix.close)
+    # 고가/저가가 비어있는 봉은 종가로 대체
+    high = np.where(np.isnan(matrix.high), matrix.close, matrix.high)
+    low = np.where(np.isnan(matrix.low), matrix.close, matrix.low)
+
+    rolling_high = rolling_max(high, window)
+    rolling_low = rolling_min(low, window)
+
+    with np.errstate(invalid="ignore"):
+        near_high_daily = close >= rolling_high * (1 - threshold)
+        near_low_daily = close <= rolling_low * (1 + threshold)
+
+    if close.shape[1] == 0:
+        empty = np.empty(close.shape[0])
+        return Week52Result(
+            tickers=matrix.tickers, dates=matrix.dates,
+            price=empty, prev_close=empty, change=empty, change_percent=empty,
+            volume=empty, high_52week=empty, low_52week=empty,
+            near_high=empty.astype(bool), near_low=empty.astype(bool),
+            days_at_high=empty.astype(int), days_at_low=empty.astype(int),
+            near_high_daily=near_high_daily, near_low_daily=near_low_daily,
+        )
+
+    price, prev_close = last_two_bars(matrix.close)
+    change = price - prev_close
+    with np.errstate(invalid="ignore", divide="ignore"):
+        change_percent = np.where(prev_close > 0, change / prev_close * 100, 0.0)
+
+    return Week52Result(
+        tickers=matrix.tickers,
+        dates=matrix.dates,
+        price=price,
+        prev_close=prev_close,
+        change=np.nan_to_num(change),
+        change_percent=np.nan_to_num(change_percent),
+        volume=np.nan_to_num(forward_fill(matrix.volume)[:, -1]),
+        high_52week=rolling_high[:, -1],
+        low_52week=rolling_low[:, -1],
+        near_high=near_high_daily[:, -1],
+        near_low=near_low_daily[:, -1],
+        days_at_high=trailing_streak(near_high_daily),
+        days_at_low=trailing_streak(near_low_daily),
+        near_high_daily=near_high_daily,
+        near_low_daily=near_low_daily,
+    )
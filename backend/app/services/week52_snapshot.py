@@ -0,0 +1,332 @@
+"""
+52주 스냅샷 + 조회용 인덱스 / 집계
+스냅샷을 게시할 때 신고가/신저가/상승/하락 종목을 시총 내림차순으로 정렬한
+인덱스 배열을 시총 구분 조합별로 미리 만들어 둡니다.
+요청 처리는 필터에 맞는 배열을 고른 뒤 limit 만큼 잘라내기만 합니다.
+
+/stats, /stats/by-market-cap, /advance-decline 이 쓰는 집계값과
+섹터별 브레드스(/api/sectors/breadth)도 게시 시점에 한 번 계산해 스냅샷에 함께 담습니다.
+
+종목 데이터는 필드별 numpy 배열(RecordColumns)로 담아 공유 스냅샷 파일에서
+워커들이 복사 없이 같은 페이지를 참조하고, 응답에 필요한 행만 dict로 만듭니다.
+"""
+
+from dataclasses import dataclass, field
+from itertools import combinations
+from typing import Any, Dict, FrozenSet, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.services.breadth_history import classify_breadth
+
+# 스냅샷 직렬화 형식 버전 (필드가 바뀌면 올려서 이전 공유 스냅샷 파일을 읽지 않도록 함)
+WEEK52_SNAPSHOT_FORMAT = 5
+
+# 시총 구분 (표시 순서)
+MARKET_CAP_CATEGORIES = (
+    "대형주 (Mega Cap)",
+    "대형주 (Large Cap)",
+    "중형주 (Mid Cap)",
+    "소형주 (Small Cap)",
+)
+
+# 미리 정렬해 두는 종목 집합
+SNAPSHOT_VIEWS = ("highs", "lows", "advancers", "decliners")
+
+# 종목 레코드 필드 (응답 키 순서) -> 열 종류
+# str: 고정폭 유니코드 배열, float: float64, bool: bool, optional_int: float64 (NaN = None)
+RECORD_FIELDS = (
+    ("symbol", "str"),
+    ("name", "str"),
+    ("price", "float"),
+    ("high_52week", "float"),
+    ("low_52week", "float"),
+    ("change", "float"),
+    ("change_percent", "float"),
+    ("days_at_high", "optional_int"),
+    ("days_at_low", "optional_int"),
+    ("sector", "str"),
+    ("market_cap", "float"),
+    ("market_cap_value", "float"),
+    ("volume", "float"),
+    ("market_cap_category", "str"),
+    ("is_near_high", "bool"),
+    ("is_near_low", "bool"),
+)
+
+
+def _column(values: List[Any], kind: str) -> np.ndarray:
+    if kind == "str":
+        column = np.array([value or "" for value in values], dtype=str)
+    elif kind == "bool":
+        column = np.array([bool(value) for value in values], dtype=bool)
+    else:
+        column = np.array([np.nan if value is None else value for value in values], dtype=np.float64)
+    column.setflags(write=False)
+    return column
+
+
+def _value(column: np.ndarray, i: int, kind: str) -> Any:
+    value = column[i]
+    if kind == "str":
+        return str(value)
+    if kind == "bool":
+        return bool(value)
+    if np.isnan(value):
+        return None
+    return int(value) if kind == "optional_int" else float(value)
+
+
+class RecordColumns:
+    """
+    종목 레코드 목록의 열 저장 (불변)
+
+    필드마다 numpy 배열 하나라 pickle 프로토콜 5에서 out-of-band 버퍼로 나가고,
+    인덱스로 꺼낼 때만 응답용 dict를 만듭니다 (시퀀스처럼 len / [] / 반복 가능).
+    """
+
+    def __init__(self, columns: Dict[str, np.ndarray], size: int):
+        self.columns = columns
+        self.size = size
+
+    @classmethod
+    def from_records(cls, records: Sequence[dict]) -> "RecordColumns":
+        return cls(
+            {name: _column([r.get(name) for r in records], kind) for name, kind in RECORD_FIELDS},
+            len(records),
+        )
+
+    def __len__(self) -> int:
+        return self.size
+
+    def __getitem__(self, i) -> dict:
+        i = int(i)
+        if i < 0:
+            i += self.size
+        if not 0 <= i < self.size:
+            raise IndexError(i)
+        return {name: _value(self.columns[name], i, kind) for name, kind in RECORD_FIELDS}
+
+    def __iter__(self) -> Iterator[dict]:
+        return (self[i] for i in range(self.size))
+
+
+@dataclass(frozen=True)
+class Week52Snapshot:
+    """
+    게시된 52주 종목 데이터 (불변)
+
+    records: 종목 데이터 (수집 순서, 열 저장 - 인덱스로 꺼내면 dict)
+    categories: 스냅샷에 존재하는 시총 구분
+    indexes: view -> 시총 구분 집합 -> records 인덱스 배열 (시총 내림차순)
+    aggregates: 전체/시총 구분/섹터별 신고가·신저가·등락 집계
+    """
+    records: RecordColumns
+    categories: Tuple[str, ...]
+    indexes: Dict[str, Dict[FrozenSet[str], np.ndarray]] = field(repr=False)
+    aggregates: dict = field(repr=False)
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def match_categories(self, market_cap: Optional[str]) -> FrozenSet[str]:
+        """시총 필터 문자열(부분 일치)에 해당하는 구분 집합"""
+        if not market_cap:
+            return frozenset(self.categories)
+        return frozenset(c for c in self.categories if market_cap in c)
+
+    def select(
+        self,
+        view: str,
+        market_cap: Optional[str] = None,
+        limit: Optional[int] = None,
+    ) -> Tuple[List[dict], int]:
+        """
+        view 종목을 시총 내림차순으로 limit개 반환
+
+        Returns:
+            (종목 목록, 필터 적용 후 전체 개수)
+        """
+        index = self.indexes[view].get(self.match_categories(market_cap))
+        if index is None:
+            return [], 0
+        selected = index if limit is None else index[:limit]
+        return [self.records[i] for i in selected], len(index)
+
+    @classmethod
+    def empty(cls) -> "Week52Snapshot":
+        return build_snapshot(())
+
+
+def classify_sentiment(ad_ratio: float) -> str:
+    """상승/하락 종목 비율로 시장 심리 판단"""
+    if ad_ratio > 2:
+        return "매우 강세"
+    elif ad_ratio > 1.5:
+        return "강세"
+    elif ad_ratio > 1:
+        return "약한 강세"
+    elif ad_ratio > 0.67:
+        return "약한 약세"
+    elif ad_ratio > 0.5:
+        return "약세"
+    else:
+        return "매우 약세"
+
+
+def _ratio(numerator: int, denominator: int) -> float:
+    return round(numerator / denominator, 2) if denominator > 0 else 0
+
+
+def compute_aggregates(
+    categories: Sequence[str],
+    category_code: np.ndarray,
+    masks: Dict[str, np.ndarray],
+) -> dict:
+    """전체 및 시총 구분별 집계"""
+    highs_count = int(masks["highs"].sum())
+    lows_count = int(masks["lows"].sum())
+    advancing = int(masks["advancers"].sum())
+    declining = int(masks["decliners"].sum())
+    total = int(len(category_code))
+    ratio = _ratio(highs_count, lows_count)
+    ad_ratio = _ratio(advancing, declining)
+
+    # 구분별 개수는 bincount 한 번씩으로 계산
+    size = len(categories)
+    totals = np.bincount(category_code, minlength=size)
+    highs = np.bincount(category_code[masks["highs"]], minlength=size)
+    lows = np.bincount(category_code[masks["lows"]], minlength=size)
+    by_market_cap = tuple(
+        {
+            "category": category,
+            "highs_count": int(highs[code]),
+            "lows_count": int(lows[code]),
+            "ratio": _ratio(int(highs[code]), int(lows[code])),
+            "total_stocks": int(totals[code]),
+        }
+        for code, category in enumerate(categories)
+    )
+
+    return {
+        "highs_count": highs_count,
+        "lows_count": lows_count,
+        "ratio": ratio,
+        "market_breadth": classify_breadth(ratio),
+        "total_stocks": total,
+        "advancing": advancing,
+        "declining": declining,
+        "unchanged": int(masks["unchanged"].sum()),
+        "ad_ratio": ad_ratio,
+        "market_sentiment": classify_sentiment(ad_ratio),
+        "by_market_cap": by_market_cap,
+    }
+
+
+def compute_sector_aggregates(
+    sectors: Sequence[str],
+    sector_code: np.ndarray,
+    masks: Dict[str, np.ndarray],
+    market_cap: np.ndarray,
+    change_percent: np.ndarray,
+) -> Tuple[dict, ...]:
+    """
+    섹터별 신고가/신저가 개수, 상승 비율, 시총 가중 등락률 (종목 수 내림차순)
+
+    market_cap은 반올림 전 달러 값 (조 단위로 반올림하면 소형주 가중치가 0이 됨)
+    시총 정보가 없는 섹터의 가중 등락률은 단순 평균으로 대신합니다.
+    """
+    size = len(sectors)
+    totals = np.bincount(sector_code, minlength=size)
+    counts = {
+        view: np.bincount(sector_code[masks[view]], minlength=size)
+        for view in ("highs", "lows", "advancers", "decliners", "unchanged")
+    }
+    cap_sum = np.bincount(sector_code, weights=market_cap, minlength=size)
+    weighted_change = np.bincount(sector_code, weights=market_cap * change_percent, minlength=size)
+    change_sum = np.bincount(sector_code, weights=change_percent, minlength=size)
+
+    rows = []
+    for code in np.argsort(-totals, kind="stable"):
+        total = int(totals[code])
+        if cap_sum[code] > 0:
+            cap_weighted = weighted_change[code] / cap_sum[code]
+        else:
+            cap_weighted = change_sum[code] / total if total else 0
+        rows.append({
+            "sector": sectors[code],
+            "total_stocks": total,
+            "highs_count": int(counts["highs"][code]),
+            "lows_count": int(counts["lows"][code]),
+            "ratio": _ratio(int(counts["highs"][code]), int(counts["lows"][code])),
+            "advancing": int(counts["advancers"][code]),
+            "declining": int(counts["decliners"][code]),
+            "unchanged": int(counts["unchanged"][code]),
+            "percent_advancing": round(counts["advancers"][code] / total * 100, 1) if total else 0,
+            "cap_weighted_change": round(float(cap_weighted), 2),
+            "market_cap": round(float(cap_sum[code]) / 1e12, 2),  # 조 달러
+        })
+    return tuple(rows)
+
+
+def _category_subsets(categories: Sequence[str]) -> List[FrozenSet[str]]:
+    """비어있지 않은 모든 구분 조합 (구분이 4개면 15개)"""
+    return [
+        frozenset(subset)
+        for size in range(1, len(categories) + 1)
+        for subset in combinations(categories, size)
+    ]
+
+
+def build_snapshot(records: Sequence[dict]) -> Week52Snapshot:
+    """종목 데이터로 스냅샷과 조회 인덱스 생성"""
+    records = tuple(records)
+    present = {r.get("market_cap_category", "Unknown") for r in records}
+    categories = tuple(c for c in MARKET_CAP_CATEGORIES if c in present) + \
+        tuple(sorted(present - set(MARKET_CAP_CATEGORIES)))
+
+    category_code = np.array(
+        [categories.index(r.get("market_cap_category", "Unknown")) for r in records], dtype=np.int16
+    )
+    sectors = tuple(sorted({r.get("sector") or "Unknown" for r in records}))
+    sector_position = {sector: code for code, sector in enumerate(sectors)}
+    sector_code = np.array(
+        [sector_position[r.get("sector") or "Unknown"] for r in records], dtype=np.int16
+    )
+    # 반올림 전 시총 (달러, 이전 형식 레코드는 조 단위 값에서 환산)
+    market_cap = np.array(
+        [r.get("market_cap_value") or (r.get("market_cap") or 0) * 1e12 for r in records], dtype=np.float64
+    )
+    change_percent = np.array([r.get("change_percent", 0) for r in records], dtype=np.float64)
+    masks = {
+        "highs": np.array([bool(r.get("is_near_high")) for r in records], dtype=bool),
+        "lows": np.array([bool(r.get("is_near_low")) for r in records], dtype=bool),
+        "advancers": change_percent > 0,
+        "decliners": change_percent < 0,
+        "unchanged": change_percent == 0,
+    }
+
+    # 시총 내림차순 (같으면 수집 순서 유지)
+    by_market_cap = np.argsort(-market_cap, kind="stable")
+    subsets = _category_subsets(categories)
+
+    indexes = {}
+    for view in SNAPSHOT_VIEWS:
+        ordered = by_market_cap[masks[view][by_market_cap]]
+        codes = category_code[ordered]
+        view_index = {}
+        for subset in subsets:
+            wanted = [categories.index(c) for c in subset]
+            view_index[subset] = ordered[np.isin(codes, wanted)]
+            view_index[subset].setflags(write=False)
+        indexes[view] = view_index
+
+    return Week52Snapshot(
+        records=RecordColumns.from_records(records),
+        categories=categories,
+        indexes=indexes,
+        aggregates={
+            **compute_aggregates(categories, category_code, masks),
+            "by_sector": compute_sector_aggregates(sectors, sector_code, masks, market_cap, change_percent),
+        },
+    )
@@ -0,0 +1,328 @@
+"""
+52주 스냅샷 변경분 스트림 (Server-Sent Events)
+새 스냅샷이 게시되면 직전 스냅샷과 비교한 변경분(diff)만 구독 중인 클라이언트에 보냅니다.
+- 신고가/신저가 목록에 새로 들어온 종목(레코드 포함)과 빠진 종목(심볼만)
+- 값이 바뀐 집계 항목 (/stats, /stats/by-market-cap, /advance-decline)
+
+클라이언트별로 아직 보내지 못한 변경분은 하나로 합쳐(coalescing) 느린 클라이언트도
+대기열이 늘어나지 않습니다. 재접속(Last-Event-ID) 복구용으로 최근 변경분만 제한된
+개수(backlog)로 보관하고, 그보다 오래된 버전이면 전체 요약(snapshot 이벤트)을 보냅니다.
+"""
+
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Deque, Dict, FrozenSet, List, Optional
+import asyncio
+import json
+import threading
+
+from app.services.week52_snapshot import Week52Snapshot
+
+# 변경분에서 비교하는 집계 항목 (/stats, /stats/by-market-cap, /advance-decline)
+STREAM_AGGREGATE_KEYS = (
+    "highs_count",
+    "lows_count",
+    "ratio",
+    "market_breadth",
+    "total_stocks",
+    "advancing",
+    "declining",
+    "unchanged",
+    "ad_ratio",
+    "market_sentiment",
+    "by_market_cap",
+)
+
+# 변경분을 추적하는 종목 목록
+STREAM_VIEWS = ("highs", "lows")
+
+
+def view_symbols(snapshot: Week52Snapshot, view: str) -> FrozenSet[str]:
+    """스냅샷의 view(신고가/신저가) 전체 종목 심볼"""
+    index = snapshot.indexes[view].get(frozenset(snapshot.categories))
+    if index is None:
+        return frozenset()
+    return frozenset(str(symbol) for symbol in snapshot.records.columns["symbol"][index])
+
+
+def stream_aggregates(snapshot: Week52Snapshot) -> dict:
+    aggregates = snapshot.aggregates
+    return {
+        key: list(aggregates[key]) if key == "by_market_cap" else aggregates[key]
+        for key in STREAM_AGGREGATE_KEYS
+    }
+
+
+@dataclass
+class Week52Diff:
+    """
+    두 스냅샷 버전 사이의 변경분
+
+    entered / left: view -> 새로 들어온 / 빠진 종목 심볼
+    counts: 값이 바뀐 집계 항목 -> 새 값
+    snapshot: 도착 버전의 스냅샷 (새로 들어온 종목 레코드 조회용)
+    """
+    from_version: int
+    version: int
+    entered: Dict[str, FrozenSet[str]]
+    left: Dict[str, FrozenSet[str]]
+    counts: dict
+    snapshot: Week52Snapshot = field(repr=False)
+
+    def is_empty(self) -> bool:
+        return not self.counts and \
+            not any(self.entered.values()) and not any(self.left.values())
+
+    def merge(self, later: "Week52Diff") -> "Week52Diff":
+        """
+        이어지는 변경분을 하나로 합침 (self.version == later.from_version)
+
+        들어왔다가 다시 빠진 종목(또는 그 반대)은 양쪽에서 모두 지워집니다.
+        """
+        entered = {}
+        left = {}
+        for view in STREAM_VIEWS:
+            entered[view] = (self.entered[view] - later.left[view]) | \
+                (later.entered[view] - self.left[view])
+            left[view] = (self.left[view] - later.entered[view]) | \
+                (later.left[view] - self.entered[view])
+        return Week52Diff(
+            from_version=self.from_version,
+            version=later.version,
+            entered=entered,
+            left=left,
+            counts={**self.counts, **later.counts},
+            snapshot=later.snapshot,
+        )
+
+    def to_event(self) -> dict:
+        """SSE diff 이벤트 본문"""
+        records = self.snapshot.records
+        position = {}
+        if any(self.entered[view] for view in STREAM_VIEWS):
+            position = {str(symbol): i for i, symbol in enumerate(records.columns["symbol"])}
+        return {
+            "from_version": self.from_version,
+            "version": self.version,
+            **{
+                view: {
+                    "entered": [records[position[s]] for s in sorted(self.entered[view]) if s in position],
+                    "left": sorted(self.left[view]),
+                }
+                for view in STREAM_VIEWS
+            },
+            "counts": self.counts,
+        }
+
+
+def compute_diff(
+    previous: Week52Snapshot,
+    current: Week52Snapshot,
+    from_version: int,
+    version: int,
+) -> Week52Diff:
+    """두 스냅샷의 신고가/신저가 종목 집합과 집계값 비교"""
+    entered = {}
+    left = {}
+    for view in STREAM_VIEWS:
+        before = view_symbols(previous, view)
+        after = view_symbols(current, view)
+        entered[view] = after - before
+        left[view] = before - after
+
+    before = stream_aggregates(previous)
+    after = stream_aggregates(current)
+    counts = {key: after[key] for key in STREAM_AGGREGATE_KEYS if after[key] != before[key]}
+
+    return Week52Diff(
+        from_version=from_version,
+        version=version,
+        entered=entered,
+        left=left,
+        counts=counts,
+        snapshot=current,
+    )
+
+
+def snapshot_event(snapshot: Week52Snapshot, version: int) -> dict:
+    """SSE snapshot 이벤트 본문 (접속 직후 / 변경분으로 따라잡을 수 없을 때)"""
+    return {
+        "version": version,
+        **{
+            view: [snapshot.records[i] for i in snapshot.indexes[view].get(frozenset(snapshot.categories), ())]
+            for view in STREAM_VIEWS
+        },
+        "counts": stream_aggregates(snapshot),
+    }
+
+
+def format_event(event: str, data: dict, event_id: Optional[int] = None) -> str:
+    """SSE 메시지 한 건"""
+    lines = []
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    lines.append(f"event: {event}")
+    lines.append(f"data: {json.dumps(data, ensure_ascii=False, separators=(',', ':'))}")
+    return "\n".join(lines) + "\n\n"
+
+
+class StreamClient:
+    """
+    구독 중인 클라이언트 한 명
+
+    게시 스레드에서 push(), 이벤트 루프에서 take()로 꺼냅니다.
+    보내지 못한 변경분은 pending 하나로 합쳐지고, 이어지지 않는 변경분이 오면
+    전체 요약을 다시 보내도록 reset으로 표시합니다.
+    """
+
+    def __init__(self, loop: asyncio.AbstractEventLoop, version: Optional[int]):
+        self._loop = loop
+        self._lock = threading.Lock()
+        self._wakeup = asyncio.Event()
+        self.version = version  # 클라이언트가 마지막으로 받은 버전
+        self._pending: Optional[Week52Diff] = None
+        self._reset = False
+        self.coalesced = 0
+
+    def push(self, diff: Optional[Week52Diff]):
+        """새 변경분 전달 (None이면 전체 요약을 다시 보내야 함)"""
+        with self._lock:
+            if self._reset:
+                pass
+            elif diff is None:
+                self._reset = True
+                self._pending = None
+            elif self._pending is not None and self._pending.version == diff.from_version:
+                self._pending = self._pending.merge(diff)
+                self.coalesced += 1
+            elif self._pending is None and self.version == diff.from_version:
+                self._pending = diff
+            else:
+                self._reset = True
+                self._pending = None
+        try:
+            self._loop.call_soon_threadsafe(self._wakeup.set)
+        except RuntimeError:
+            # 이벤트 루프가 이미 닫힘 (연결 종료 중)
+            pass
+
+    def take(self):
+        """(reset 여부, 합쳐진 변경분) 꺼내기 - 변경분을 꺼내면 그 버전을 받은 것으로 기록"""
+        with self._lock:
+            reset, pending = self._reset, self._pending
+            self._reset = False
+            self._pending = None
+            self._wakeup.clear()
+            if pending is not None:
+                self.version = pending.version
+        return reset, pending
+
+    def sent_snapshot(self, version: int):
+        """전체 요약을 보낸 뒤 기록 (그 사이 도착한 변경분은 이어지는 것만 남김)"""
+        with self._lock:
+            self.version = version
+            pending = self._pending
+            if pending is None or pending.from_version == version:
+                return
+            self._pending = None
+            if pending.version > version:
+                self._reset = True
+
+    async def wait(self, timeout: float) -> bool:
+        """새 변경분이 올 때까지 대기 (timeout이면 False)"""
+        try:
+            await asyncio.wait_for(self._wakeup.wait(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+
+class Week52StreamBroadcaster:
+    """
+    스냅샷 게시 알림을 받아 변경분을 계산하고 구독 클라이언트에 나눠줌
+
+    변경분은 게시마다 한 번만 계산하고 모든 클라이언트가 같은 객체를 공유합니다.
+
+    Args:
+        backlog: 재접속 복구용으로 보관하는 최근 변경분 개수
+        max_clients: 동시 구독 클라이언트 수 상한
+    """
+
+    def __init__(self, backlog: int = 32, max_clients: int = 1000):
+        self.max_clients = max_clients
+        self._lock = threading.Lock()
+        self._clients: List[StreamClient] = []
+        self._backlog: Deque[Week52Diff] = deque(maxlen=backlog)
+        self._published = 0
+        self._events_sent = 0
+        self._bytes_sent = 0
+
+    def on_publish(self, previous, snapshot):
+        """RefreshCoordinator.subscribe 리스너: 새 스냅샷 게시 시 호출"""
+        diff = None
+        if previous is not None and isinstance(previous.data, Week52Snapshot) \
+                and isinstance(snapshot.data, Week52Snapshot):
+            diff = compute_diff(previous.data, snapshot.data, previous.version, snapshot.version)
+        with self._lock:
+            self._published += 1
+            if diff is None:
+                self._backlog.clear()
+            else:
+                self._backlog.append(diff)
+            clients = list(self._clients)
+        for client in clients:
+            client.push(diff)
+
+    def catch_up(self, version: int, latest: int) -> Optional[Week52Diff]:
+        """
+        보관 중인 변경분으로 version -> latest 변경분 합성
+
+        backlog에 이어지는 변경분이 없으면 None (전체 요약 필요)
+        """
+        with self._lock:
+            backlog = list(self._backlog)
+        merged = None
+        for diff in backlog:
+            if merged is None:
+                if diff.from_version == version:
+                    merged = diff
+            elif diff.from_version == merged.version:
+                merged = merged.merge(diff)
+        if merged is None or merged.version != latest:
+            return None
+        return merged
+
+    def connect(self, loop: asyncio.AbstractEventLoop, version: Optional[int]) -> Optional[StreamClient]:
+        """클라이언트 등록 (상한 초과 시 None)"""
+        with self._lock:
+            if len(self._clients) >= self.max_clients:
+                return None
+            client = StreamClient(loop, version)
+            self._clients.append(client)
+            return client
+
+    def disconnect(self, client: StreamClient):
+        with self._lock:
+            if client in self._clients:
+                self._clients.remove(client)
+
+    def record_sent(self, message: str):
+        with self._lock:
+            self._events_sent += 1
+            self._bytes_sent += len(message.encode("utf-8"))
+
+    def status(self) -> dict:
+        with self._lock:
+            return {
+                "clients": len(self._clients),
+                "max_clients": self.max_clients,
+                "backlog": len(self._backlog),
+                "backlog_limit": self._backlog.maxlen,
+                "published": self._published,
+                "events_sent": self._events_sent,
+                "bytes_sent": self._bytes_sent,
+                "coalesced": sum(c.coalesced for c in self._clients),
+            }
+
+
+week52_stream = Week52StreamBroadcaster()
@@ -0,0 +1,188 @@
+"""
+시계열 다운샘플링 (차트용 데시메이션)
+히스토리 엔드포인트가 max_points 이하로 점 수를 줄여 반환할 때 씁니다.
+
+- lttb: Largest-Triangle-Three-Buckets - 버킷마다 이웃 점과 만드는 삼각형 면적이
+        가장 큰 점 하나를 골라 추세와 급변 구간의 모양을 유지
+- minmax: 버킷마다 최솟값/최댓값 점을 남겨 극값(스파이크)을 보존
+
+여러 값 열(레코드의 키)이 있으면 열마다 점을 고른 뒤 합집합을 반환하므로
+어떤 열의 모양도 잃지 않습니다 (열당 예산 = max_points / 열 수).
+엔드포인트는 다운샘플한 응답을 (시리즈, 범위, max_points) 키로 인메모리 캐시에 둡니다.
+"""
+from typing import Callable, List, Optional, Sequence
+
+import numpy as np
+
+from app.utils.cache import get_cache, set_cache
+
+DOWNSAMPLE_METHODS = ("lttb", "minmax")
+
+# 요청 가능한 max_points 범위
+MIN_POINTS = 3
+MAX_POINTS = 5000
+
+
+def lttb_indices(y: np.ndarray, threshold: int) -> np.ndarray:
+    """LTTB로 고른 점의 위치 (x는 등간격 위치로 간주, 처음/끝 점 포함)"""
+    n = len(y)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+
+    x = np.arange(n, dtype=np.float64)
+    # 처음/끝 점을 제외한 n-2개 점을 threshold-2개 버킷으로 나눔
+    edges = np.linspace(1, n - 1, threshold - 1).astype(np.int64)
+    selected = np.empty(threshold, dtype=np.int64)
+    selected[0] = 0
+    selected[-1] = n - 1
+
+    a = 0
+    for i in range(threshold - 2):
+        start, end = edges[i], max(edges[i + 1], edges[i] + 1)
+        # 다음 버킷 평균점 (마지막 버킷이면 끝 점)
+        next_start = end
+        next_end = edges[i + 2] if i + 2 < len(edges) else n
+        next_end = max(next_end, next_start + 1)
+        avg_x = x[next_start:next_end].mean()
+        avg_y = y[next_start:next_end].mean()
+
+        # 이전 선택점 a, 후보 점, 다음 버킷 평균점이 만드는 삼각형 면적 (벡터 연산)
+        area = np.abs(
+            (x[a] - avg_x) * (y[start:end] - y[a])
+            - (x[a] - x[start:end]) * (avg_y - y[a])
+        )
+        a = start + int(np.argmax(area))
+        selected[i + 1] = a
+    return selected
+
+
+def minmax_indices(y: np.ndarray, threshold: int) -> np.ndarray:
+    """버킷별 최솟값/최댓값 점의 위치 (처음/끝 점 포함, 날짜순)"""
+    n = len(y)
+    if threshold >= n or threshold < 4:
+        return lttb_indices(y, threshold)
+
+    buckets = (threshold - 2) // 2
+    edges = np.linspace(1, n - 1, buckets + 1).astype(np.int64)
+    picks = [0, n - 1]
+    for start, end in zip(edges[:-1], edges[1:]):
+        if end <= start:
+            continue
+        segment = y[start:end]
+        picks.append(start + int(np.argmin(segment)))
+        picks.append(start + int(np.argmax(segment)))
+    return np.unique(picks)
+
+
+_SELECTORS = {
+    "lttb": lttb_indices,
+    "minmax": minmax_indices,
+}
+
+
+def downsample_indices(values: Sequence[Optional[float]], threshold: int, method: str = "lttb") -> np.ndarray:
+    """값 목록(None 허용)에서 남길 위치 - 값이 있는 점만 대상"""
+    y = np.array([np.nan if v is None else v for v in values], dtype=np.float64)
+    present = np.flatnonzero(~np.isnan(y))
+    if len(present) <= threshold:
+        return present
+    return present[_SELECTORS[method](y[present], threshold)]
+
+
+def downsample_records(
+    records: List[dict],
+    max_points: Optional[int],
+    value_keys: Optional[Sequence[str]] = None,
+    method: str = "lttb",
+) -> List[dict]:
+    """
+    레코드 목록(날짜 오름차순)을 max_points 이하로 줄임
+
+    Args:
+        records: [{"date": ..., 값 키: 숫자 또는 None, ...}]
+        max_points: None이면 그대로 반환
+        value_keys: 모양을 보존할 숫자 열 (기본: 레코드에 있는 숫자 값 키 전체)
+        method: lttb / minmax
+    """
+    if not max_points or len(records) <= max_points:
+        return records
+    if method not in _SELECTORS:
+        raise ValueError(f"지원하지 않는 다운샘플링 방식: {method} ({', '.join(DOWNSAMPLE_METHODS)})")
+
+    if value_keys is None:
+        keys = []
+        for record in records:
+            for key, value in record.items():
+                if key not in keys and isinstance(value, (int, float)) and not isinstance(value, bool):
+                    keys.append(key)
+        value_keys = keys
+    if not value_keys:
+        # 숫자 열이 없으면 등간격으로 고름
+        picks = np.linspace(0, len(records) - 1, max_points).astype(np.int64)
+        return [records[i] for i in np.unique(picks)]
+
+    budget = max(MIN_POINTS, max_points // len(value_keys))
+    picks = np.unique(np.concatenate([
+        downsample_indices([record.get(key) for record in records], budget, method)
+        for key in value_keys
+    ] + [np.array([0, len(records) - 1])]))
+    if len(picks) > max_points:
+        # 열이 많아 열당 최소 예산(MIN_POINTS)의 합집합이 max_points를 넘으면
+        # 처음/끝 점을 포함해 등간격으로 솎아 max_points 이하로 맞춤
+        picks = picks[np.unique(np.linspace(0, len(picks) - 1, max_points).astype(np.int64))]
+    return [records[i] for i in picks]
+
+
+def downsample_history(
+    result: dict,
+    max_points: Optional[int],
+    method: str = "lttb",
+    value_keys: Optional[Sequence[str]] = None,
+    key: str = "history",
+) -> dict:
+    """
+    응답의 히스토리 목록을 다운샘플한 새 응답 (원래 점 수는 raw_points로 표시)
+
+    max_points가 없거나 이미 그 이하면 응답을 그대로 반환합니다.
+    """
+    records = result.get(key) or []
+    if not max_points or len(records) <= max_points:
+        return result
+    return {
+        **result,
+        key: downsample_records(records, max_points, value_keys, method),
+        "raw_points": len(records),
+        "downsampled": method,
+    }
+
+
+def cached_history(
+    cache_key: str,
+    max_points: Optional[int],
+    method: str,
+    build: Callable[[], dict],
+    ttl_seconds: int,
+    value_keys: Optional[Sequence[str]] = None,
+    cacheable: Optional[Callable[[dict], bool]] = None,
+) -> dict:
+    """
+    히스토리 응답을 다운샘플해 (시리즈/범위 키, max_points, method) 단위로 캐시
+
+    max_points가 없으면 build() 결과(원본)를 그대로 반환합니다.
+    cache_key에는 시리즈와 범위(필요하면 데이터 버전까지)를 담습니다.
+    히스토리가 비어있거나 cacheable이 False인 응답(수집 전, 일부 실패)은 캐시하지 않습니다.
+    """
+    if not max_points:
+        return build()
+    if method not in _SELECTORS:
+        raise ValueError(f"지원하지 않는 다운샘플링 방식: {method} ({', '.join(DOWNSAMPLE_METHODS)})")
+
+    key = f"{cache_key}:{max_points}:{method}"
+    cached = get_cache(key)
+    if cached is not None:
+        return cached
+    raw = build()
+    result = downsample_history(raw, max_points, method, value_keys)
+    if result.get("history") and (cacheable is None or cacheable(raw)):
+        set_cache(key, result, ttl_seconds=ttl_seconds)
+    return result
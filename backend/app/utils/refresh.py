@@ -0,0 +1,321 @@
+"""
+스냅샷 갱신 코디네이터
+- 락으로 보호되는 single-flight 갱신 (동시에 하나만 실행)
+- stale-while-revalidate: 만료돼도 기존 스냅샷을 즉시 반환하고 백그라운드 갱신
+- 불변 스냅샷 객체를 참조 교체로 원자적으로 게시
+- 갱신 진행 상황 / 소요 시간 상태 조회
+- 새 스냅샷 게시 알림 (subscribe)
+- 다른 워커가 게시한 공유 스냅샷 채택 알림 (on_adopt)
+  요청 경로(get)는 파일 변경 여부만 확인하고, 읽기/역직렬화는 백그라운드 스레드에서
+"""
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Any, Callable, List, Optional, Union
+import threading
+import time
+
+from app.utils.shared_snapshot import SharedSnapshotStore
+
+
+@dataclass(frozen=True)
+class Snapshot:
+    """게시된 불변 스냅샷"""
+    data: Any
+    version: int
+    built_at: datetime
+    duration: float  # 생성에 걸린 시간 (초)
+
+    def age(self) -> timedelta:
+        return datetime.now() - self.built_at
+
+
+class RefreshCoordinator:
+    """
+    단일 데이터 소스의 스냅샷 갱신을 조율
+
+    Args:
+        name: 로그/상태 표시용 이름
+        loader: 새 데이터를 만들어 반환하는 함수 (느린 업스트림 호출)
+        max_age: 이 시간이 지나면 stale로 보고 백그라운드 갱신
+                 (생성 시각 -> 유효 기간 함수도 가능: 장 세션에 맞춘 TTL)
+        retry_after: 갱신 실패 후 재시도까지 대기 시간
+        shared: 워커 간 공유 스냅샷 저장소 (지정 시 리더 워커만 loader 실행)
+    """
+
+    def __init__(
+        self,
+        name: str,
+        loader: Callable[[], Any],
+        max_age: Union[timedelta, Callable[[datetime], timedelta]],
+        retry_after: timedelta = timedelta(minutes=1),
+        shared: Optional[SharedSnapshotStore] = None,
+    ):
+        self.name = name
+        self.loader = loader
+        self.max_age = max_age
+        self.retry_after = retry_after
+        self.shared = shared
+
+        self._lock = threading.Lock()
+        self._done = threading.Condition(self._lock)
+        self._snapshot: Optional[Snapshot] = None
+        self._invalidated = False
+        self._adopting = False
+
+        # 갱신 상태
+        self._in_flight = False
+        self._force = False
+        self._follower_until: Optional[datetime] = None
+        self._started_at: Optional[datetime] = None
+        self._stage: Optional[str] = None
+        self._progress_done = 0
+        self._progress_total = 0
+        self._last_attempt: Optional[datetime] = None
+        self._last_error: Optional[str] = None
+        self._refresh_count = 0
+        self._failure_count = 0
+        self._listeners: List[Callable[[Optional[Snapshot], Snapshot], None]] = []
+        self._adopt_listeners: List[Callable[[Snapshot], None]] = []
+
+    # ===== 읽기 =====
+
+    @property
+    def snapshot(self) -> Optional[Snapshot]:
+        """현재 게시된 스냅샷 (참조 읽기는 원자적)"""
+        return self._snapshot
+
+    def max_age_of(self, snapshot: Snapshot) -> timedelta:
+        """스냅샷의 유효 기간"""
+        if callable(self.max_age):
+            return self.max_age(snapshot.built_at)
+        return self.max_age
+
+    def is_stale(self) -> bool:
+        snapshot = self._snapshot
+        return snapshot is None or self._invalidated or snapshot.age() > self.max_age_of(snapshot)
+
+    def invalidate(self):
+        """현재 스냅샷을 만료 처리 (계속 반환하지만 다음 get()에서 백그라운드 갱신)"""
+        self._invalidated = True
+
+    def get(self) -> Optional[Snapshot]:
+        """
+        현재 스냅샷 반환 (stale-while-revalidate)
+
+        만료됐으면 백그라운드 갱신을 트리거하고 기존 스냅샷을 그대로 반환합니다.
+        다른 워커가 새 공유 스냅샷을 게시했으면 백그라운드에서 채택합니다 (이벤트 루프에서 호출 가능).
+        """
+        self._adopt_shared_in_background()
+        if self.is_stale():
+            self.refresh_async()
+        return self._snapshot
+
+    def _adopt_shared_in_background(self):
+        """공유 스냅샷 파일이 바뀌었으면 (stat만 확인) 백그라운드 스레드에서 채택"""
+        if self.shared is None or not self.shared.has_changed():
+            return
+        with self._lock:
+            if self._adopting:
+                return
+            self._adopting = True
+
+        def run():
+            try:
+                # has_changed가 확인 주기를 이미 소비했으므로 주기 검사 없이 읽음
+                self._adopt_shared(force=True)
+            except Exception as e:
+                print(f"⚠️ [{self.name}] 공유 스냅샷 채택 실패: {e}")
+            finally:
+                self._adopting = False
+
+        threading.Thread(target=run, name=f"adopt-{self.name}", daemon=True).start()
+
+    def _adopt_shared(self, force: bool = False):
+        """다른 워커가 게시한 더 새로운 공유 스냅샷이 있으면 가져오기"""
+        if self.shared is None:
+            return
+        payload = self.shared.read_if_changed(force=force)
+        if payload is None:
+            return
+        version, built_at, duration, data = payload
+        with self._lock:
+            current = self._snapshot
+            if current is not None and built_at <= current.built_at:
+                return
+            snapshot = Snapshot(data=data, version=version, built_at=built_at, duration=duration)
+            self._snapshot = snapshot
+            self._invalidated = False
+        for listener in list(self._adopt_listeners):
+            try:
+                listener(snapshot)
+            except Exception as e:
+                print(f"⚠️ [{self.name}] 공유 스냅샷 채택 알림 실패: {e}")
+        self._notify(current, snapshot)
+
+    # ===== 갱신 =====
+
+    def _can_start(self, force: bool) -> bool:
+        """락을 잡은 상태에서 호출: 새 갱신을 시작해도 되는지"""
+        if self._in_flight:
+            return False
+        if not force and self._last_error and self._last_attempt and \
+           datetime.now() - self._last_attempt < self.retry_after:
+            return False
+        if not force and self._follower_until and datetime.now() < self._follower_until:
+            # 다른 워커가 갱신 중 - 결과가 공유 파일에 올라올 때까지 재시도하지 않음
+            return False
+        self._in_flight = True
+        self._force = force
+        self._started_at = datetime.now()
+        self._last_attempt = self._started_at
+        self._stage = "시작"
+        self._progress_done = 0
+        self._progress_total = 0
+        return True
+
+    def refresh_async(self, force: bool = False) -> bool:
+        """백그라운드 갱신 시작 (이미 진행 중이면 False)"""
+        with self._lock:
+            if not self._can_start(force):
+                return False
+        print(f"🔄 [{self.name}] 백그라운드 갱신 시작...")
+        threading.Thread(target=self._run, name=f"refresh-{self.name}", daemon=True).start()
+        return True
+
+    def refresh(self, timeout: Optional[float] = None) -> Optional[Snapshot]:
+        """
+        동기 갱신 (single-flight)
+
+        이미 다른 갱신이 진행 중이면 새로 시작하지 않고 그 결과를 기다립니다.
+        아직 스냅샷이 없으면 먼저 다른 워커가 게시한 공유 스냅샷을 찾아봅니다.
+        """
+        if self._snapshot is None:
+            self._adopt_shared(force=True)
+            if self._snapshot is not None:
+                return self._snapshot
+        with self._lock:
+            started = self._can_start(force=True)
+            if not started:
+                self._done.wait_for(lambda: not self._in_flight, timeout=timeout)
+                return self._snapshot
+        self._run()
+        return self._snapshot
+
+    def _run(self):
+        start_time = time.time()
+        leader = False
+        try:
+            if self.shared is not None:
+                leader = self.shared.try_acquire_leader()
+                if not leader:
+                    # 다른 워커가 갱신 중: 결과는 공유 스냅샷 파일로 받음
+                    print(f"⏭️ [{self.name}] 다른 워커가 갱신 중 - 공유 스냅샷 사용")
+                    with self._lock:
+                        self._follower_until = datetime.now() + self.retry_after
+                    return
+                # 락을 기다리는 사이 다른 워커가 방금 게시했을 수 있음
+                self._adopt_shared(force=True)
+                if not self._force and not self.is_stale():
+                    return
+
+            data = self.loader()
+            duration = time.time() - start_time
+            self.publish(data, duration=duration)
+            with self._lock:
+                self._last_error = None
+                self._refresh_count += 1
+            print(f"✅ [{self.name}] 갱신 완료 ({duration:.1f}초)")
+        except Exception as e:
+            with self._lock:
+                self._last_error = str(e)
+                self._failure_count += 1
+            print(f"❌ [{self.name}] 갱신 실패: {e}")
+        finally:
+            if leader:
+                self.shared.release_leader()
+            with self._lock:
+                self._in_flight = False
+                self._stage = None
+                self._done.notify_all()
+
+    def publish(self, data: Any, duration: float = 0.0) -> Snapshot:
+        """새 스냅샷을 만들어 원자적으로 교체"""
+        with self._lock:
+            previous = self._snapshot
+            version = previous.version + 1 if previous else 1
+            snapshot = Snapshot(data=data, version=version, built_at=datetime.now(), duration=duration)
+            self._snapshot = snapshot
+            self._invalidated = False
+
+        self._notify(previous, snapshot)
+        if self.shared is not None:
+            try:
+                self.shared.write(snapshot.version, snapshot.built_at, snapshot.duration, snapshot.data)
+            except Exception as e:
+                print(f"⚠️ [{self.name}] 공유 스냅샷 저장 실패: {e}")
+        return snapshot
+
+    # ===== 게시 알림 =====
+
+    def subscribe(self, listener: Callable[[Optional[Snapshot], Snapshot], None]):
+        """
+        새 스냅샷이 게시될 때마다 listener(이전 스냅샷, 새 스냅샷) 호출
+
+        갱신 스레드(또는 공유 스냅샷을 읽은 요청 스레드)에서 호출되므로
+        listener는 빠르게 반환해야 합니다.
+        """
+        with self._lock:
+            self._listeners.append(listener)
+
+    def on_adopt(self, listener: Callable[[Snapshot], None]):
+        """
+        다른 워커가 게시한 공유 스냅샷을 가져올 때 listener(새 스냅샷) 호출
+
+        리더 워커가 스냅샷과 함께 DB/파일에 기록한 부가 상태를
+        이 워커의 인메모리 사본에 다시 읽어 들이는 용도입니다 (subscribe보다 먼저 호출).
+        """
+        with self._lock:
+            self._adopt_listeners.append(listener)
+
+    def _notify(self, previous: Optional[Snapshot], snapshot: Snapshot):
+        for listener in list(self._listeners):
+            try:
+                listener(previous, snapshot)
+            except Exception as e:
+                print(f"⚠️ [{self.name}] 게시 알림 실패: {e}")
+
+    # ===== 상태 =====
+
+    def report_progress(self, stage: str, done: int = 0, total: int = 0):
+        """loader 내부에서 진행 상황 보고"""
+        with self._lock:
+            self._stage = stage
+            self._progress_done = done
+            self._progress_total = total
+
+    def status(self) -> dict:
+        """갱신 진행 상황 및 마지막 스냅샷 정보"""
+        with self._lock:
+            snapshot = self._snapshot
+            running_for = (datetime.now() - self._started_at).total_seconds() \
+                if self._in_flight and self._started_at else None
+            return {
+                "name": self.name,
+                "state": "refreshing" if self._in_flight else "idle",
+                "stage": self._stage,
+                "progress": {
+                    "done": self._progress_done,
+                    "total": self._progress_total,
+                } if self._in_flight else None,
+                "running_seconds": round(running_for, 1) if running_for is not None else None,
+                "version": snapshot.version if snapshot else None,
+                "last_update": snapshot.built_at.isoformat() if snapshot else None,
+                "last_duration_seconds": round(snapshot.duration, 1) if snapshot else None,
+                "age_seconds": round(snapshot.age().total_seconds(), 1) if snapshot else None,
+                "expires_at": (snapshot.built_at + self.max_age_of(snapshot)).isoformat() if snapshot else None,
+                "is_stale": self.is_stale(),
+                "last_error": self._last_error,
+                "refresh_count": self._refresh_count,
+                "failure_count": self._failure_count,
+                "shared": self.shared is not None,
+            }
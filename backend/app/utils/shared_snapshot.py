@@ -0,0 +1,198 @@
+"""
+워커 간 공유 스냅샷
+uvicorn --workers N 환경에서 한 워커(리더)만 업스트림을 갱신하고,
+나머지 워커는 디스크의 버전 스냅샷 파일을 읽어 그대로 사용합니다.
+
+- 리더 선출: 스냅샷별 lock 파일에 대한 flock
+- 게시: 임시 파일에 pickle 후 os.replace (읽는 쪽은 항상 완성된 파일만 봄)
+- 읽기: 파일 mtime이 바뀐 경우에만 mmap으로 열어 역직렬화 (has_changed는 stat만)
+- 배열 공유: pickle 프로토콜 5의 out-of-band 버퍼(numpy 배열 본문)를 파일에 따로 두고
+  읽을 때 mmap 구간을 그대로 참조하므로, 워커마다 배열을 복사하지 않고
+  OS 페이지 캐시의 같은 페이지를 공유합니다 (읽기 전용 배열)
+  큰 레코드 목록은 열(column) 배열로 담아야 공유됩니다 - 파이썬 dict/tuple은 본문에 들어가
+  워커마다 사본이 생김
+"""
+from pathlib import Path
+from typing import Any, List, Optional, Tuple
+import mmap
+import os
+import pickle
+import struct
+import tempfile
+import threading
+import time
+
+from app.database import DATA_DIR
+
+try:
+    import fcntl
+except ImportError:  # Windows: 워커 간 조율 없이 항상 리더로 동작
+    fcntl = None
+
+SNAPSHOT_DIR = DATA_DIR / "snapshots"
+
+# 파일 형식: MAGIC, 버퍼 수(n), 본문 길이, 버퍼 길이 n개, 본문 pickle, 정렬된 버퍼들
+SNAPSHOT_MAGIC = b"SSNAP5\0\0"
+BUFFER_ALIGNMENT = 64
+
+
+def _aligned(offset: int) -> int:
+    return -(-offset // BUFFER_ALIGNMENT) * BUFFER_ALIGNMENT
+
+
+def dump_snapshot(payload: Any, f):
+    """payload를 본문 pickle + out-of-band 버퍼로 기록"""
+    buffers: List[pickle.PickleBuffer] = []
+    body = pickle.dumps(payload, protocol=5, buffer_callback=buffers.append)
+    raws = [buffer.raw() for buffer in buffers]
+    header = SNAPSHOT_MAGIC + struct.pack(f"<QQ{len(raws)}Q", len(raws), len(body), *(raw.nbytes for raw in raws))
+    f.write(header)
+    f.write(body)
+    offset = len(header) + len(body)
+    for raw in raws:
+        start = _aligned(offset)
+        f.write(b"\0" * (start - offset))
+        f.write(raw)
+        offset = start + raw.nbytes
+
+
+def load_snapshot(mapped) -> Any:
+    """dump_snapshot 형식 역직렬화 (버퍼는 mapped를 복사 없이 참조)"""
+    view = memoryview(mapped)
+    if bytes(view[:len(SNAPSHOT_MAGIC)]) != SNAPSHOT_MAGIC:
+        raise ValueError("공유 스냅샷 형식이 다름")
+    offset = len(SNAPSHOT_MAGIC)
+    count, body_length = struct.unpack_from("<QQ", view, offset)
+    offset += 16
+    lengths = struct.unpack_from(f"<{count}Q", view, offset)
+    offset += 8 * count
+    body = view[offset:offset + body_length]
+    offset += body_length
+    buffers = []
+    for length in lengths:
+        start = _aligned(offset)
+        buffers.append(view[start:start + length])
+        offset = start + length
+    return pickle.loads(body, buffers=buffers)
+
+
+class SharedSnapshotStore:
+    """
+    이름 하나에 대한 파일 기반 공유 스냅샷
+
+    파일 내용: (version, built_at, duration, data) 튜플 (dump_snapshot 형식)
+    """
+
+    def __init__(self, name: str, root: Path = SNAPSHOT_DIR, check_interval: float = 1.0):
+        self.name = name
+        self.root = Path(root)
+        self.check_interval = check_interval
+        self.path = self.root / f"{name}.snapshot"
+        self.lock_path = self.root / f"{name}.lock"
+
+        self._lock = threading.Lock()
+        self._leader_lock = threading.Lock()
+        self._leader_fd: Optional[int] = None
+        self._seen_mtime: Optional[int] = None
+        self._last_check = 0.0
+
+    # ===== 리더 선출 =====
+
+    def try_acquire_leader(self, blocking: bool = False) -> bool:
+        """
+        리더 락 획득 (같은 프로세스의 스레드끼리도 배타적)
+
+        blocking=False: 다른 워커/스레드가 갱신 중이면 바로 False
+        blocking=True: 다른 워커/스레드의 갱신이 끝날 때까지 대기 후 획득
+        """
+        if not self._leader_lock.acquire(blocking=blocking):
+            return False
+        if fcntl is None:
+            return True
+
+        self.root.mkdir(parents=True, exist_ok=True)
+        fd = os.open(self.lock_path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX if blocking else fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            os.close(fd)
+            self._leader_lock.release()
+            return False
+        self._leader_fd = fd
+        return True
+
+    def release_leader(self):
+        """try_acquire_leader가 True를 반환한 경우에만 호출"""
+        if self._leader_fd is not None:
+            fcntl.flock(self._leader_fd, fcntl.LOCK_UN)
+            os.close(self._leader_fd)
+            self._leader_fd = None
+        self._leader_lock.release()
+
+    # ===== 읽기/쓰기 =====
+
+    def write(self, version: int, built_at, duration: float, data: Any):
+        """새 스냅샷 버전을 원자적으로 게시"""
+        self.root.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.root, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                dump_snapshot((version, built_at, duration, data), f)
+            os.replace(tmp_path, self.path)
+            with self._lock:
+                self._seen_mtime = os.stat(self.path).st_mtime_ns
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def read(self) -> Optional[Tuple[int, Any, float, Any]]:
+        """
+        현재 스냅샷 파일 읽기 (없거나 형식이 다르면 None)
+
+        mmap은 닫지 않습니다 - 역직렬화된 배열이 참조하는 동안 매핑이 유지되고,
+        참조가 모두 사라지면 함께 해제됩니다 (파일이 교체돼도 기존 매핑은 유효).
+        """
+        try:
+            with open(self.path, "rb") as f:
+                mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            return load_snapshot(mapped)
+        except (FileNotFoundError, ValueError, struct.error, pickle.UnpicklingError):
+            return None
+
+    def has_changed(self) -> bool:
+        """마지막으로 본 이후 파일이 바뀌었는지 (stat만, check_interval 마다 한 번)"""
+        now = time.monotonic()
+        with self._lock:
+            if now - self._last_check < self.check_interval:
+                return False
+            self._last_check = now
+            try:
+                mtime = os.stat(self.path).st_mtime_ns
+            except FileNotFoundError:
+                return False
+            return mtime != self._seen_mtime
+
+    def read_if_changed(self, force: bool = False) -> Optional[Tuple[int, Any, float, Any]]:
+        """
+        마지막으로 본 이후 파일이 바뀌었으면 읽기
+
+        stat 호출도 check_interval 마다 한 번만 수행합니다.
+        """
+        now = time.monotonic()
+        with self._lock:
+            if not force and now - self._last_check < self.check_interval:
+                return None
+            self._last_check = now
+            try:
+                mtime = os.stat(self.path).st_mtime_ns
+            except FileNotFoundError:
+                return None
+            if mtime == self._seen_mtime:
+                return None
+
+        payload = self.read()
+        if payload is not None:
+            with self._lock:
+                self._seen_mtime = mtime
+        return payload
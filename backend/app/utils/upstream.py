@@ -0,0 +1,377 @@
+"""
+업스트림(yfinance, FRED 등) 호출 유틸리티
+- 블로킹 호출을 이벤트 루프 밖(공용 스레드 풀)에서 실행
+- 프로바이더별 토큰 버킷 속도 제한 (스레드/asyncio 겸용)
+  배치 호출은 별도 버킷에서 청크당 토큰 하나 (단건 호출이 배치 대기열 뒤에 서지 않도록)
+- 프로바이더별 동시 호출 수 제한
+- 429/타임아웃이 반복되면 열리는 서킷 브레이커 (열려 있는 동안 호출 즉시 거부)
+  예외를 내지 않고 종목별 실패를 결과에 담는 배치 호출은 결과 검사로 실패를 판정
+- 대기/거부 호출 카운터
+
+모든 라우터와 수집기가 같은 프로바이더 객체를 공유하므로,
+429가 한 번 몰리면 프로세스 전체가 함께 물러납니다.
+"""
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Callable, Dict, Optional, Tuple
+import asyncio
+import functools
+import threading
+import time
+
+# 업스트림 블로킹 호출 전용 스레드 풀
+UPSTREAM_EXECUTOR = ThreadPoolExecutor(max_workers=16, thread_name_prefix="upstream")
+
+
+async def run_blocking(func: Callable, *args, **kwargs) -> Any:
+    """블로킹 함수를 공용 스레드 풀에서 실행 (이벤트 루프를 막지 않음)"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(UPSTREAM_EXECUTOR, functools.partial(func, *args, **kwargs))
+
+
+def is_rate_limit_error(error: Exception) -> bool:
+    """429 / Too Many Requests 계열 에러인지 확인"""
+    message = str(error)
+    return "429" in message or "Too Many Requests" in message or "Rate limited" in message \
+        or type(error).__name__ == "YFRateLimitError"
+
+
+def is_timeout_error(error: Exception) -> bool:
+    """연결/읽기 타임아웃 계열 에러인지 확인"""
+    return isinstance(error, TimeoutError) or "Timeout" in type(error).__name__ \
+        or "timed out" in str(error)
+
+
+def is_upstream_failure(error: Exception) -> bool:
+    """서킷 브레이커 실패로 집계할 에러 (429, 타임아웃)"""
+    return is_rate_limit_error(error) or is_timeout_error(error)
+
+
+def backoff_delay(attempt: int, base: float = 1.0, cap: float = 10.0) -> float:
+    """지수 백오프 대기 시간: 2초, 4초, ... 최대 cap초"""
+    return min(base * (2 ** attempt), cap)
+
+
+class TokenBucket:
+    """
+    토큰 버킷 속도 제한기
+
+    Args:
+        rate: 초당 보충되는 토큰 수
+        capacity: 최대 버스트 크기
+    """
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _reserve(self, tokens: float = 1) -> float:
+        """토큰을 예약하고 사용 가능해질 때까지 기다려야 할 시간 반환"""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= tokens
+            if self._tokens >= 0:
+                return 0.0
+            return -self._tokens / self.rate
+
+    def acquire(self, tokens: float = 1):
+        """토큰 획득 (스레드용, 필요하면 sleep)"""
+        wait = self._reserve(tokens)
+        if wait > 0:
+            time.sleep(wait)
+
+    async def acquire_async(self, tokens: float = 1):
+        """토큰 획득 (asyncio용, 이벤트 루프를 막지 않음)"""
+        wait = self._reserve(tokens)
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+
+class UpstreamUnavailable(Exception):
+    """서킷 브레이커가 열려 있거나 동시 호출 한도 대기 시간을 넘겨 호출이 거부됨"""
+
+    def __init__(self, provider: str, reason: str):
+        super().__init__(f"{provider}: {reason}")
+        self.provider = provider
+        self.reason = reason
+
+
+class CircuitBreaker:
+    """
+    연속 실패 기반 서킷 브레이커
+
+    - closed: 정상 호출
+    - open: failure_threshold번 연속 실패 후 reset_timeout 동안 모든 호출 거부
+    - half_open: reset_timeout 경과 후 시험 호출 1개만 허용 (성공 시 closed, 실패 시 다시 open)
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 60.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._lock = threading.Lock()
+        self._state = "closed"
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self._open_count = 0
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._state == "open" and time.monotonic() - self._opened_at >= self.reset_timeout:
+                return "half_open"
+            return self._state
+
+    def allow(self) -> bool:
+        """호출 허용 여부 (half_open이면 시험 호출 하나만 통과)"""
+        with self._lock:
+            if self._state == "closed":
+                return True
+            if self._state == "open":
+                if time.monotonic() - self._opened_at < self.reset_timeout:
+                    return False
+                self._state = "half_open"
+                self._probe_in_flight = False
+            if self._probe_in_flight:
+                return False
+            self._probe_in_flight = True
+            return True
+
+    def release_probe(self):
+        """호출하지 못한 시험 호출 자격 반납"""
+        with self._lock:
+            self._probe_in_flight = False
+
+    def record_success(self):
+        with self._lock:
+            self._state = "closed"
+            self._failures = 0
+            self._probe_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            self._probe_in_flight = False
+            if self._state == "half_open" or self._failures >= self.failure_threshold:
+                if self._state != "open":
+                    self._open_count += 1
+                self._state = "open"
+                self._opened_at = time.monotonic()
+
+    def retry_in(self) -> float:
+        """open 상태가 끝날 때까지 남은 시간 (초)"""
+        with self._lock:
+            if self._state != "open":
+                return 0.0
+            return max(0.0, self.reset_timeout - (time.monotonic() - self._opened_at))
+
+    def status(self) -> dict:
+        state = self.state
+        with self._lock:
+            return {
+                "state": state,
+                "consecutive_failures": self._failures,
+                "open_count": self._open_count,
+            }
+
+
+class UpstreamProvider:
+    """
+    업스트림 프로바이더 하나에 대한 접근 정책
+
+    Args:
+        name: 프로바이더 이름 (yfinance, fred)
+        rate / capacity: 토큰 버킷 (초당 호출 수 / 버스트 크기)
+        batch_rate / batch_capacity: 배치 호출 전용 토큰 버킷 (초당 배치 수 / 버스트 크기)
+        max_concurrency: 동시에 진행될 수 있는 호출 수
+        failure_threshold / reset_timeout: 서킷 브레이커 설정
+        max_wait: 동시 호출 슬롯을 기다리는 최대 시간 (초과 시 거부)
+    """
+
+    def __init__(
+        self,
+        name: str,
+        rate: float,
+        capacity: float,
+        max_concurrency: int,
+        failure_threshold: int = 5,
+        reset_timeout: float = 60.0,
+        max_wait: float = 30.0,
+        batch_rate: float = 0.5,
+        batch_capacity: float = 2,
+    ):
+        self.name = name
+        self.max_concurrency = max_concurrency
+        self.max_wait = max_wait
+        self.bucket = TokenBucket(rate=rate, capacity=capacity)
+        self.batch_bucket = TokenBucket(rate=batch_rate, capacity=batch_capacity)
+        self.breaker = CircuitBreaker(failure_threshold=failure_threshold, reset_timeout=reset_timeout)
+        self._slots = threading.BoundedSemaphore(max_concurrency)
+
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._counters = {
+            "calls": 0,
+            "succeeded": 0,
+            "failed": 0,
+            "rate_limited": 0,
+            "timeouts": 0,
+            "requests": 0,
+            "batch_failures": 0,
+            "throttled": 0,
+            "rejected_open": 0,
+            "rejected_busy": 0,
+        }
+        self._last_failure: Optional[str] = None
+        self._last_failure_at: Optional[datetime] = None
+
+    def _count(self, key: str):
+        with self._lock:
+            self._counters[key] += 1
+
+    def is_open(self) -> bool:
+        """서킷이 열려 있어 호출이 거부되는 상태인지"""
+        return self.breaker.state == "open"
+
+    def _admit(self):
+        if not self.breaker.allow():
+            self._count("rejected_open")
+            raise UpstreamUnavailable(self.name, f"circuit open ({self.breaker.retry_in():.0f}초 후 재시도)")
+
+    def _record_failure(self, message: str):
+        self.breaker.record_failure()
+        with self._lock:
+            self._last_failure = message
+            self._last_failure_at = datetime.now()
+
+    def _invoke(
+        self,
+        func: Callable,
+        args: Tuple = (),
+        kwargs: Optional[dict] = None,
+        inspect: Optional[Callable[[Any], Optional[Tuple[str, bool]]]] = None,
+    ) -> Any:
+        """
+        동시 호출 슬롯을 잡고 실행, 결과를 서킷 브레이커에 기록
+
+        inspect: 결과 -> (실패 사유, 429 여부) 또는 None. 예외 없이 실패를 결과에 담는
+                 배치 호출을 실패로 집계하기 위함 (결과는 그대로 반환)
+        """
+        if not self._slots.acquire(timeout=self.max_wait):
+            self._count("rejected_busy")
+            self.breaker.release_probe()
+            raise UpstreamUnavailable(self.name, "concurrency limit")
+
+        with self._lock:
+            self._counters["calls"] += 1
+            self._in_flight += 1
+        try:
+            result = func(*args, **(kwargs or {}))
+        except Exception as e:
+            if is_upstream_failure(e):
+                self._count("rate_limited" if is_rate_limit_error(e) else "timeouts")
+                self._record_failure(f"{type(e).__name__}: {e}")
+            else:
+                # 업스트림은 응답했음 (잘못된 심볼 등) - 서킷 관점에서는 성공
+                self.breaker.record_success()
+            self._count("failed")
+            raise
+        finally:
+            with self._lock:
+                self._in_flight -= 1
+            self._slots.release()
+
+        failure = inspect(result) if inspect is not None else None
+        if failure is not None:
+            reason, rate_limited = failure
+            self._count("batch_failures")
+            if rate_limited:
+                self._count("rate_limited")
+            self._record_failure(reason)
+            return result
+
+        self.breaker.record_success()
+        self._count("succeeded")
+        return result
+
+    def _throttle(self, requests: int = 1, bucket: Optional[TokenBucket] = None) -> float:
+        """토큰 하나를 예약하고 대기 시간 반환 (requests는 실제 요청 수 카운터용)"""
+        self._admit()
+        with self._lock:
+            self._counters["requests"] += requests
+        wait = (bucket or self.bucket)._reserve(1)
+        if wait > 0:
+            self._count("throttled")
+        return wait
+
+    def call(self, func: Callable, *args, **kwargs) -> Any:
+        """스레드에서 업스트림 호출 (속도 제한 대기는 sleep)"""
+        wait = self._throttle(1)
+        if wait > 0:
+            time.sleep(wait)
+        return self._invoke(func, args, kwargs)
+
+    def call_batch(
+        self,
+        func: Callable,
+        requests: int,
+        inspect: Callable[[Any], Optional[Tuple[str, bool]]],
+        *args,
+        **kwargs,
+    ) -> Any:
+        """
+        내부에서 요청을 여러 번 보내는 배치 호출 (yf.download 멀티 심볼 등)
+
+        토큰은 배치 전용 버킷에서 호출당 하나만 차감합니다. 종목 수만큼 차감하면
+        큰 청크 하나가 단건 호출 버킷을 수십 초 음수로 만들어 대화형 요청이 밀립니다.
+        requests(실제 요청 수)는 카운터에만 반영하고, 종목별 429/오류를 삼키고
+        빈 결과를 돌려주는 경우는 inspect로 판정해 서킷 브레이커 실패로 기록합니다.
+        """
+        wait = self._throttle(max(1, requests), bucket=self.batch_bucket)
+        if wait > 0:
+            time.sleep(wait)
+        return self._invoke(func, args, kwargs, inspect=inspect)
+
+    async def call_async(self, func: Callable, *args, **kwargs) -> Any:
+        """이벤트 루프에서 업스트림 호출 (대기는 asyncio.sleep, 실행은 스레드 풀)"""
+        wait = self._throttle(1)
+        if wait > 0:
+            await asyncio.sleep(wait)
+        return await run_blocking(self._invoke, func, args, kwargs)
+
+    def status(self) -> dict:
+        with self._lock:
+            return {
+                "name": self.name,
+                "circuit": self.breaker.status(),
+                "retry_in_seconds": round(self.breaker.retry_in(), 1),
+                "in_flight": self._in_flight,
+                "max_concurrency": self.max_concurrency,
+                "rate_per_second": self.bucket.rate,
+                "batch_rate_per_second": self.batch_bucket.rate,
+                "counters": dict(self._counters),
+                "last_failure": self._last_failure,
+                "last_failure_at": self._last_failure_at.isoformat() if self._last_failure_at else None,
+            }
+
+
+# 프로세스 공용 프로바이더
+# yfinance: 초당 4요청, 버스트 8요청, 동시 8개 / 429·타임아웃 5회 연속 시 60초 차단
+# (멀티 심볼 다운로드 청크는 별도 버킷에서 2초에 하나, 버스트 4개 - 갱신 시간은 청크 수에 비례)
+yfinance_upstream = UpstreamProvider("yfinance", rate=4, capacity=8, max_concurrency=8, batch_capacity=4)
+# FRED: 공식 한도 분당 120회 -> 초당 2회, 동시 4개
+fred_upstream = UpstreamProvider("fred", rate=2, capacity=5, max_concurrency=4)
+
+UPSTREAM_PROVIDERS: Dict[str, UpstreamProvider] = {
+    provider.name: provider for provider in (yfinance_upstream, fred_upstream)
+}
+
+
+def upstream_status() -> dict:
+    """전체 프로바이더 상태 (서킷, 카운터)"""
+    return {name: provider.status() for name, provider in UPSTREAM_PROVIDERS.items()}
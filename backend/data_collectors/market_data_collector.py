@@ -129,6 +129,15 @@ class MarketDataCollector:
                 "BRK-B", "UNH", "JNJ", "XOM", "V", "JPM", "PG", "MA"
             ]
     
+    def sync_price_store(self, tickers: List[str]) -> int:
+        """로컬 가격 스토어(StockPrice)에 마지막 저장일 이후 일봉만 추가"""
+        from app.services.price_store import price_store
+        
+        print(f"\n💾 가격 스토어 증분 동기화 ({len(tickers)}개 종목)...")
+        added = price_store.sync(tickers)
+        print(f"  ✅ 신규 일봉 {added}개 저장")
+        return added
+    
     def collect_all(self):
         """모든 시장 데이터 수집"""
         print("\n" + "=" * 60)
@@ -151,6 +160,9 @@ class MarketDataCollector:
         
         results["52week"] = self.get_52week_highs_lows(sp500_tickers[:sample_size])
         
+        # 3. 가격 스토어 증분 동기화 (전체 종목)
+        results["price_store"] = {"added_bars": self.sync_price_store(sp500_tickers)}
+        
         print("\n" + "=" * 60)
         print("✅ 시장 데이터 수집 완료")
         print("=" * 60)
@@ -0,0 +1,45 @@
+"""차트 다운샘플링"""
+
+import numpy as np
+
+from app.utils.downsample import MIN_POINTS, downsample_records, lttb_indices, minmax_indices
+
+
+def test_lttb_keeps_endpoints_and_threshold():
+    y = np.sin(np.linspace(0, 10, 1000))
+    picks = lttb_indices(y, 50)
+    assert len(picks) == 50
+    assert picks[0] == 0 and picks[-1] == 999
+    assert np.all(np.diff(picks) > 0)
+
+
+def test_lttb_keeps_spike():
+    y = np.zeros(500)
+    y[237] = 100.0
+    assert 237 in lttb_indices(y, 20)
+
+
+def test_lttb_returns_all_points_when_under_threshold():
+    np.testing.assert_array_equal(lttb_indices(np.arange(10.0), 10), np.arange(10))
+    np.testing.assert_array_equal(lttb_indices(np.arange(10.0), 2), np.arange(10))
+
+
+def test_minmax_keeps_extremes():
+    y = np.zeros(500)
+    y[100], y[400] = 50.0, -50.0
+    picks = minmax_indices(y, 20)
+    assert 100 in picks and 400 in picks
+    assert len(picks) <= 20
+
+
+def test_downsample_records_never_exceeds_max_points():
+    # 열마다 다른 위치에 스파이크 -> 열당 최소 예산(MIN_POINTS)의 합집합이 max_points보다 큼
+    keys = [f"v{k}" for k in range(10)]
+    records = [
+        {"date": str(i), **{key: 100.0 if i == 10 + k * 15 else 0.0 for k, key in enumerate(keys)}}
+        for i in range(200)
+    ]
+    max_points = MIN_POINTS + 2
+    sampled = downsample_records(records, max_points)
+    assert len(sampled) == max_points
+    assert sampled[0] is records[0] and sampled[-1] is records[-1]
@@ -0,0 +1,62 @@
+"""거래소 휴장일 / 조기 마감 규칙"""
+
+from datetime import date
+
+from app.services.market_calendar import KRX, NYSE, krx_holidays, nyse_early_closes, nyse_holidays
+
+
+def test_nyse_holidays_2026():
+    holidays = nyse_holidays(2026)
+    assert sorted(holidays) == [
+        date(2026, 1, 1),
+        date(2026, 1, 19),
+        date(2026, 2, 16),
+        date(2026, 4, 3),
+        date(2026, 5, 25),
+        date(2026, 6, 19),
+        date(2026, 7, 3),  # 7/4 토요일 -> 금요일 대체
+        date(2026, 9, 7),
+        date(2026, 11, 26),
+        date(2026, 12, 25),
+    ]
+    assert holidays[date(2026, 4, 3)] == "Good Friday"
+
+
+def test_nyse_new_year_on_saturday_is_not_observed():
+    # 2022-01-01 토요일: 전년도 12/31은 정상 거래
+    assert date(2021, 12, 31) not in nyse_holidays(2021)
+    assert date(2021, 12, 31) not in nyse_holidays(2022)
+    assert NYSE.is_trading_day(date(2021, 12, 31))
+
+
+def test_nyse_early_closes_2026():
+    # 7/3은 독립기념일 대체 휴장이므로 조기 마감 없음
+    assert nyse_early_closes(2026) == {date(2026, 11, 27), date(2026, 12, 24)}
+
+
+def test_nyse_early_close_session_ends_at_one_pm():
+    _, close = NYSE.session(date(2026, 11, 27))
+    assert (close.hour, close.minute) == (13, 0)
+    assert NYSE.session(date(2026, 11, 26)) is None
+
+
+def test_krx_holidays_2025_substitutes():
+    holidays = krx_holidays(2025)
+    # 어린이날과 부처님오신날이 5/5에 겹침 -> 5/6 대체
+    assert holidays[date(2025, 5, 5)] == "어린이날"
+    assert holidays[date(2025, 5, 6)] == "대체공휴일 (부처님오신날)"
+    # 추석 연휴(10/5~10/7) 첫날이 일요일 -> 10/8 대체
+    for day in (date(2025, 10, 5), date(2025, 10, 6), date(2025, 10, 7)):
+        assert holidays[day] == "추석"
+    assert holidays[date(2025, 10, 8)] == "대체공휴일 (추석)"
+    assert holidays[date(2025, 10, 9)] == "한글날"
+    # 삼일절(3/1 토요일) 대체 3/3 포함
+    substitutes = sorted(day for day, name in holidays.items() if name.startswith("대체공휴일"))
+    assert substitutes == [date(2025, 3, 3), date(2025, 5, 6), date(2025, 10, 8)]
+
+
+def test_krx_year_end_closing_day():
+    # 2025-12-31 수요일
+    assert krx_holidays(2025)[date(2025, 12, 31)] == "연말 휴장일"
+    assert not KRX.is_trading_day(date(2025, 12, 31))
+    assert KRX.previous_trading_day(date(2026, 1, 2)) == date(2025, 12, 30)
@@ -0,0 +1,81 @@
+"""52주 벡터 연산 엔진 / 일별 브레드스"""
+
+import numpy as np
+import pandas as pd
+
+from app.services.breadth_history import compute_daily_breadth
+from app.services.price_source import PriceMatrix
+from app.services.week52_engine import compute_week52, forward_fill, last_two_bars, trailing_streak
+
+nan = np.nan
+
+
+def make_matrix(close, tickers=None) -> PriceMatrix:
+    close = np.array(close, dtype=np.float64)
+    tickers = tickers or [f"T{i}" for i in range(close.shape[0])]
+    return PriceMatrix(
+        tickers=tickers,
+        dates=pd.bdate_range("2025-01-02", periods=close.shape[1]),
+        open=close.copy(),
+        high=close.copy(),
+        low=close.copy(),
+        close=close,
+        volume=np.ones_like(close),
+    )
+
+
+def test_forward_fill_keeps_leading_nan():
+    filled = forward_fill(np.array([[nan, 1.0, nan, 3.0, nan]]))
+    np.testing.assert_array_equal(filled, [[nan, 1.0, 1.0, 3.0, 3.0]])
+
+
+def test_last_two_bars_skips_missing_today():
+    latest, previous = last_two_bars(np.array([
+        [1.0, 2.0, 3.0],
+        [1.0, 2.0, nan],  # 오늘 봉 아직 없음
+        [nan, nan, 5.0],  # 봉 하나뿐
+        [nan, nan, nan],
+    ]))
+    np.testing.assert_array_equal(latest, [3.0, 2.0, 5.0, nan])
+    np.testing.assert_array_equal(previous, [2.0, 1.0, 5.0, nan])
+
+
+def test_trailing_streak():
+    flags = np.array([
+        [True, False, True, True],
+        [True, True, True, True],
+        [True, True, True, False],
+    ])
+    np.testing.assert_array_equal(trailing_streak(flags), [2, 4, 0])
+
+
+def test_compute_week52_flags_and_change():
+    result = compute_week52(make_matrix([
+        [10, 11, 12, 13, 14],     # 신고가
+        [14, 13, 12, 11, 10],     # 신저가
+        [10, 11, 12, 11.8, nan],  # 오늘 봉 없음: 직전 두 봉으로 등락 계산
+    ]), window=5)
+
+    np.testing.assert_array_equal(result.near_high, [True, False, True])
+    np.testing.assert_array_equal(result.near_low, [False, True, False])
+    np.testing.assert_array_equal(result.high_52week, [14, 14, 12])
+    np.testing.assert_array_equal(result.low_52week, [10, 10, 10])
+    np.testing.assert_allclose(result.change, [1, -1, -0.2])
+    np.testing.assert_allclose(result.change_percent[0], 1 / 13 * 100)
+    assert result.days_at_high[0] == 5
+    assert result.days_at_low[1] == 5
+
+
+def test_daily_breadth_counts_today_over_all_tickers():
+    matrix = make_matrix([
+        [10, 11, 12, 13],
+        [10, 11, 12, nan],  # 아직 오늘 봉이 동기화되지 않은 종목
+    ])
+    rows = compute_daily_breadth(matrix, compute_week52(matrix, window=4), window=4)
+
+    assert [row["date"] for row in rows] == ["2025-01-07"]
+    today = rows[-1]
+    assert today["total_stocks"] == 2
+    assert today["highs_count"] == 2
+    assert today["advancing"] == 2
+    assert today["unchanged"] == 0
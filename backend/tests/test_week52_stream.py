@@ -0,0 +1,44 @@
+"""52주 스트림 변경분 병합"""
+
+from app.services.week52_snapshot import Week52Snapshot
+from app.services.week52_stream import STREAM_VIEWS, Week52Diff
+
+
+def make_diff(from_version, version, entered=None, left=None, counts=None) -> Week52Diff:
+    entered = entered or {}
+    left = left or {}
+    return Week52Diff(
+        from_version=from_version,
+        version=version,
+        entered={view: frozenset(entered.get(view, ())) for view in STREAM_VIEWS},
+        left={view: frozenset(left.get(view, ())) for view in STREAM_VIEWS},
+        counts=counts or {},
+        snapshot=Week52Snapshot.empty(),
+    )
+
+
+def test_merge_chains_versions_and_counts():
+    first = make_diff(1, 2, entered={"highs": {"AAPL"}}, counts={"highs_count": 10, "lows_count": 3})
+    second = make_diff(2, 3, entered={"lows": {"XOM"}}, counts={"highs_count": 11})
+    merged = first.merge(second)
+
+    assert (merged.from_version, merged.version) == (1, 3)
+    assert merged.entered == {"highs": {"AAPL"}, "lows": {"XOM"}}
+    assert merged.counts == {"highs_count": 11, "lows_count": 3}
+    assert merged.snapshot is second.snapshot
+
+
+def test_merge_cancels_enter_then_leave():
+    first = make_diff(1, 2, entered={"highs": {"AAPL", "MSFT"}}, left={"lows": {"XOM"}})
+    second = make_diff(2, 3, entered={"lows": {"XOM"}}, left={"highs": {"AAPL"}})
+    merged = first.merge(second)
+
+    assert merged.entered == {"highs": {"MSFT"}, "lows": frozenset()}
+    assert merged.left == {"highs": frozenset(), "lows": frozenset()}
+    assert not merged.is_empty()
+
+
+def test_merge_of_round_trip_is_empty():
+    first = make_diff(1, 2, entered={"highs": {"AAPL"}})
+    second = make_diff(2, 3, left={"highs": {"AAPL"}})
+    assert first.merge(second).is_empty()